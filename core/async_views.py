@@ -0,0 +1,85 @@
+from functools import wraps
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from users.cache import aget_principal
+
+from .renderers import ORJSONRenderer
+
+User = get_user_model()
+
+_jwt = JWTAuthentication()
+_renderer = ORJSONRenderer()
+
+
+async def authenticate(request):
+    """
+    Autentica o JWT do header Authorization sem bloquear o event loop.
+
+    A validação do token é feita em memória e o usuário vem do cache de
+    principais (users.cache), com o ORM assíncrono apenas nas ausências.
+    Levanta as mesmas exceções que a autenticação das views síncronas.
+    """
+    header = _jwt.get_header(request)
+    raw_token = _jwt.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        raise exceptions.NotAuthenticated()
+
+    token = _jwt.get_validated_token(raw_token)
+    try:
+        user_id = token[jwt_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken('O token não contém uma identificação de usuário reconhecível.')
+
+    try:
+        user = await aget_principal(user_id)
+    except User.DoesNotExist:
+        raise exceptions.AuthenticationFailed('Usuário não encontrado.', code='user_not_found')
+    if not user.is_active:
+        raise exceptions.AuthenticationFailed('Usuário inativo.', code='user_inactive')
+    return user
+
+
+def _render(data, status_code, headers=None):
+    response = HttpResponse(
+        _renderer.render(data), status=status_code, content_type='application/json'
+    )
+    for name, value in (headers or {}).items():
+        response[name] = value
+    return response
+
+
+def async_api_view(view_func):
+    """
+    Equivalente assíncrono de @api_view(['GET']) + IsAuthenticated para leituras.
+
+    A view recebe um Request do DRF (com `user` autenticado) e devolve
+    `(dados, status)`; erros de API viram respostas JSON pelo mesmo
+    EXCEPTION_HANDLER das views síncronas.
+    """
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        drf_request = Request(request, authenticators=())
+        try:
+            if request.method != 'GET':
+                raise exceptions.MethodNotAllowed(request.method)
+            drf_request.user = await authenticate(request)
+            data, status_code = await view_func(drf_request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+                exc.auth_header = _jwt.authenticate_header(drf_request)
+            response = api_settings.EXCEPTION_HANDLER(exc, {'request': drf_request})
+            headers = {'WWW-Authenticate': exc.auth_header} if getattr(exc, 'auth_header', None) else {}
+            if isinstance(exc, exceptions.MethodNotAllowed):
+                headers['Allow'] = 'GET'
+            return _render(response.data, response.status_code, headers)
+        return _render(data, status_code)
+
+    return wrapper
@@ -0,0 +1,111 @@
+"""
+Backend PostgreSQL com pool de conexões por processo.
+
+Mesmo comportamento de django.db.backends.postgresql, mas fechar a conexão
+(fim de cada requisição com CONN_MAX_AGE=0) a devolve ao pool, e abrir uma
+nova a retira dele: o custo de conexão (TCP, autenticação, TLS) sai da
+latência das requisições. Configurado pela chave POOL do banco:
+
+    'POOL': {
+        'MAX_SIZE': 10,             # conexões por processo
+        'TIMEOUT': 5,               # espera máxima (s) por uma conexão livre
+        'MAX_LIFETIME': 3600,       # conexões mais antigas são recicladas
+        'HEALTH_CHECK_AFTER': 30,   # ociosas há mais tempo recebem SELECT 1
+    }
+"""
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from core import metrics
+
+from .pool import close_pools, get_pool, pool_stats
+
+POOL_DEFAULTS = {
+    'MAX_SIZE': 10,
+    'TIMEOUT': 5.0,
+    'MAX_LIFETIME': 3600.0,
+    'HEALTH_CHECK_AFTER': 30.0,
+}
+
+__all__ = ['DatabaseWrapper', 'close_pools', 'pool_stats']
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_pool(self, conn_params):
+        options = {**POOL_DEFAULTS, **self.settings_dict.get('POOL', {})}
+        return get_pool(
+            self.alias,
+            conn_params,
+            max_size=int(options['MAX_SIZE']),
+            timeout=float(options['TIMEOUT']),
+            max_lifetime=float(options['MAX_LIFETIME']),
+            health_check_after=float(options['HEALTH_CHECK_AFTER']),
+        )
+
+    def get_new_connection(self, conn_params):
+        self._pool = self.get_pool(conn_params)
+        connection = self._pool.getconn(
+            lambda: super(DatabaseWrapper, self).get_new_connection(conn_params)
+        )
+        # Conexões reaproveitadas não passam pelo get_new_connection original,
+        # que é quem define o nível de isolamento esperado pelo wrapper
+        self.isolation_level = IsolationLevel(
+            self.settings_dict['OPTIONS'].get('isolation_level', IsolationLevel.READ_COMMITTED)
+        )
+        return connection
+
+    def prewarm_pool(self, count):
+        """Abre até `count` conexões no pool antes das primeiras requisições"""
+        conn_params = self.get_connection_params()
+        pool = self.get_pool(conn_params)
+        opened = [
+            pool.getconn(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+            for _ in range(min(count, pool.max_size))
+        ]
+        for connection in opened:
+            pool.putconn(connection)
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # Fechada dentro de um atomic() o wrapper ainda referencia a conexão,
+        # que portanto não pode ser entregue a outra thread
+        discard = self.in_atomic_block or (self.errors_occurred and not self.is_usable())
+        with self.wrap_database_errors:
+            self._pool.putconn(self.connection, discard=discard)
+
+
+COUNTERS = [
+    ('checkouts', 'Retiradas de conexão do pool'),
+    ('connects', 'Conexões novas abertas pelo pool'),
+    ('waits', 'Retiradas que esperaram por uma conexão livre'),
+    ('timeouts', 'Retiradas que esgotaram o tempo de espera'),
+    ('discarded', 'Conexões descartadas (falha ou expiração)'),
+    ('health_checks', 'Verificações SELECT 1 na retirada'),
+    ('wait_seconds', 'Tempo total de espera por uma conexão livre'),
+]
+
+
+def render_pool_metrics():
+    stats = sorted(pool_stats().items())
+    labels = ('alias', 'database')
+    parts = [
+        metrics.render_samples(
+            'db_pool_connections', 'Conexões do pool por estado', 'gauge',
+            [(key + (state,), values[state]) for key, values in stats for state in ('idle', 'in_use')],
+            labels + ('state',)
+        ),
+        metrics.render_samples(
+            'db_pool_max_size', 'Limite de conexões do pool', 'gauge',
+            [(key, values['max_size']) for key, values in stats], labels
+        ),
+    ]
+    for field, help_text in COUNTERS:
+        parts.append(metrics.render_samples(
+            f'db_pool_{field}_total', help_text, 'counter',
+            [(key, values[field]) for key, values in stats], labels
+        ))
+    return '\n'.join(parts)
+
+
+metrics.register_collector(render_pool_metrics)
@@ -0,0 +1,185 @@
+import os
+import threading
+import time
+from collections import deque
+
+from psycopg2 import Error, OperationalError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+
+class PoolTimeout(OperationalError):
+    """Nenhuma conexão ficou livre dentro do tempo de espera do pool"""
+
+
+class ConnectionPool:
+    """
+    Pool limitado de conexões psycopg2, seguro entre threads.
+
+    Conexões livres são reaproveitadas da mais recente para a mais antiga,
+    mantendo as menos usadas elegíveis para expirar. Na retirada, conexões
+    acima de `max_lifetime` são descartadas e as ociosas há mais de
+    `health_check_after` segundos passam por um `SELECT 1`. Na devolução,
+    uma transação deixada aberta é desfeita antes de a conexão voltar ao pool.
+    """
+
+    def __init__(self, max_size=10, timeout=5.0, max_lifetime=3600.0, health_check_after=30.0):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_after = health_check_after
+        self._idle = deque()
+        self._created_at = {}
+        self._in_use = 0
+        self._condition = threading.Condition()
+        self._stats = dict.fromkeys(
+            ['checkouts', 'connects', 'waits', 'timeouts', 'discarded', 'health_checks'], 0
+        )
+        self._wait_seconds = 0.0
+
+    def getconn(self, connect):
+        """Retira uma conexão, abrindo uma nova com `connect()` se houver vaga"""
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            self._stats['checkouts'] += 1
+        while True:
+            idle = self._reserve(deadline)
+            if idle is None:
+                return self._connect(connect)
+            connection, last_used = idle
+            if self._healthy(connection, last_used):
+                return connection
+            self._discard(connection)
+
+    def putconn(self, connection, discard=False):
+        """Devolve a conexão ao pool (ou a fecha, se `discard` ou inutilizável)"""
+        if not discard and not connection.closed:
+            try:
+                if connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+            except Error:
+                discard = True
+        if discard or connection.closed:
+            self._discard(connection)
+            return
+        with self._condition:
+            self._in_use -= 1
+            self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    def close(self):
+        """Fecha as conexões livres; as em uso são fechadas na devolução"""
+        with self._condition:
+            idle, self._idle = list(self._idle), deque()
+        for connection, last_used in idle:
+            self._created_at.pop(id(connection), None)
+            connection.close()
+
+    def stats(self):
+        with self._condition:
+            return {
+                **self._stats,
+                'max_size': self.max_size,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'wait_seconds': round(self._wait_seconds, 6),
+            }
+
+    def _reserve(self, deadline):
+        # Devolve uma conexão livre ou None quando a vaga é para uma conexão nova
+        with self._condition:
+            waited_since = None
+            while not self._idle and self._in_use >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if waited_since is None:
+                    waited_since = time.monotonic()
+                    self._stats['waits'] += 1
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    self._wait_seconds += time.monotonic() - waited_since
+                    raise PoolTimeout(
+                        f'Nenhuma conexão livre no pool ({self.max_size}) após {self.timeout}s.'
+                    )
+                self._condition.wait(remaining)
+            if waited_since is not None:
+                self._wait_seconds += time.monotonic() - waited_since
+            self._in_use += 1
+            return self._idle.pop() if self._idle else None
+
+    def _connect(self, connect):
+        try:
+            connection = connect()
+        except BaseException:
+            self._release_slot()
+            raise
+        with self._condition:
+            self._stats['connects'] += 1
+        self._created_at[id(connection)] = time.monotonic()
+        return connection
+
+    def _healthy(self, connection, last_used):
+        if connection.closed:
+            return False
+        now = time.monotonic()
+        if now - self._created_at.get(id(connection), now) > self.max_lifetime:
+            return False
+        if now - last_used < self.health_check_after:
+            return True
+        with self._condition:
+            self._stats['health_checks'] += 1
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+            return True
+        except Error:
+            return False
+
+    def _discard(self, connection):
+        self._created_at.pop(id(connection), None)
+        try:
+            connection.close()
+        except Error:
+            pass
+        with self._condition:
+            self._stats['discarded'] += 1
+        self._release_slot()
+
+    def _release_slot(self):
+        with self._condition:
+            self._in_use -= 1
+            self._condition.notify()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, conn_params, **options):
+    """
+    Pool do alias no processo atual. Parâmetros de conexão diferentes (ex.:
+    o banco de testes) e processos filhos (fork) recebem pools próprios.
+    """
+    key = (alias, conn_params.get('dbname') or conn_params.get('database'),
+           repr(sorted(conn_params.items())), os.getpid())
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(**options)
+        return pool
+
+
+def _own_pools():
+    pid = os.getpid()
+    with _pools_lock:
+        return [(key, pool) for key, pool in _pools.items() if key[3] == pid]
+
+
+def pool_stats():
+    """Estatísticas dos pools do processo atual, por (alias, banco)"""
+    return {(alias, database): pool.stats() for (alias, database, *rest), pool in _own_pools()}
+
+
+def close_pools():
+    for key, pool in _own_pools():
+        pool.close()
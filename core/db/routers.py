@@ -0,0 +1,148 @@
+"""
+Roteamento de leituras para réplicas (DATABASE_REPLICAS).
+
+Vão para uma réplica apenas as leituras feitas durante requisições GET/HEAD/
+OPTIONS, fora de transações. Escritas, select_for_update() e tudo que roda
+dentro de atomic() ficam no primário, assim como comandos de gerenciamento.
+
+Leitura das próprias escritas: toda alteração de saldo fixa os usuários
+envolvidos no primário por DB_REPLICA_PIN_SECONDS (ver pin_to_primary), e
+réplicas com atraso acima de DB_REPLICA_MAX_LAG_SECONDS, ou inacessíveis,
+saem do rodízio até a próxima verificação.
+"""
+import contextvars
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, transaction
+from django.utils.functional import LazyObject
+
+logger = logging.getLogger('digital_wallet')
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_current_request = contextvars.ContextVar('db_routing_request', default=None)
+_lag_checks = {}
+_lag_lock = threading.Lock()
+_rotation = itertools.count()
+
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def _pin_key(user_id):
+    return f'db-pin:{user_id}'
+
+
+def pin_to_primary(user_ids):
+    """
+    Fixa os usuários no primário por DB_REPLICA_PIN_SECONDS após o commit,
+    para que não leiam um saldo anterior à própria movimentação.
+    """
+    if not settings.DATABASE_REPLICAS:
+        return
+    pins = {_pin_key(user_id): 1 for user_id in user_ids}
+    if pins:
+        transaction.on_commit(lambda: cache.set_many(pins, settings.DB_REPLICA_PIN_SECONDS))
+
+
+@contextmanager
+def request_context(request):
+    """Associa a requisição às consultas feitas no contexto atual"""
+    token = _current_request.set(request)
+    try:
+        yield
+    finally:
+        _current_request.reset(token)
+
+
+def _is_pinned(request):
+    pinned = getattr(request, '_db_pinned', None)
+    if pinned is not None:
+        return pinned
+    if request.method not in SAFE_METHODS:
+        request._db_pinned = True
+        return True
+    # Só o usuário já autenticado pela view conta; avaliar o usuário lazy da
+    # sessão aqui faria uma consulta de dentro do próprio roteador
+    user = request.__dict__.get('user')
+    if user is None or isinstance(user, LazyObject) or not user.is_authenticated:
+        return False
+    request._db_pinned = cache.get(_pin_key(user.pk)) is not None
+    return request._db_pinned
+
+
+def _replica_lag(alias):
+    """Atraso de replicação (s) informado pela própria réplica"""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(LAG_SQL)
+        return float(cursor.fetchone()[0])
+
+
+def _is_healthy(alias):
+    now = time.monotonic()
+    with _lag_lock:
+        checked = _lag_checks.get(alias)
+        if checked and now - checked[0] < settings.DB_REPLICA_LAG_CHECK_INTERVAL:
+            return checked[1]
+        # Marca antes de consultar: outras threads usam o valor anterior
+        _lag_checks[alias] = (now, checked[1] if checked else True)
+
+    try:
+        lag = _replica_lag(alias)
+        healthy = lag <= settings.DB_REPLICA_MAX_LAG_SECONDS
+        if not healthy:
+            logger.warning('Réplica %s com atraso de %.1fs; leituras no primário', alias, lag)
+    except DatabaseError:
+        logger.warning('Réplica %s inacessível; leituras no primário', alias, exc_info=True)
+        healthy = False
+    with _lag_lock:
+        _lag_checks[alias] = (now, healthy)
+    return healthy
+
+
+def reset_replica_health():
+    with _lag_lock:
+        _lag_checks.clear()
+
+
+class ReplicaRouter:
+    """Envia leituras seguras às réplicas saudáveis e o restante ao primário"""
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        request = _current_request.get()
+        if not replicas or request is None:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block or _is_pinned(request):
+            return DEFAULT_DB_ALIAS
+
+        start = next(_rotation)
+        for offset in range(len(replicas)):
+            alias = replicas[(start + offset) % len(replicas)]
+            if _is_healthy(alias):
+                return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplicas têm os mesmos dados do primário
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
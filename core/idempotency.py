@@ -0,0 +1,163 @@
+import hashlib
+import json
+import threading
+from collections import Counter
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from transactions.services import run_with_retry
+
+from .exceptions import ConflictException
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_stats():
+    """Contadores do processo atual: acertos no cache, no banco e execuções novas"""
+    with _stats_lock:
+        return {
+            'cache_hits': _stats['cache_hits'],
+            'db_hits': _stats['db_hits'],
+            'misses': _stats['misses'],
+            'conflicts': _stats['conflicts'],
+        }
+
+
+def _cache_key(user_id, key):
+    digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+    return f'idempotency:{user_id}:{digest}'
+
+
+def _request_hash(request):
+    payload = json.dumps(request.data, sort_keys=True, default=str)
+    fingerprint = f'{request.method}:{request.path}:{payload}'
+    return hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()
+
+
+def _replay(stored, request_hash):
+    if stored['request_hash'] != request_hash:
+        _count('conflicts')
+        return Response({
+            "error": "Idempotency-Key já utilizada com uma requisição diferente."
+        }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    return Response(stored['body'], status=stored['status'], headers={REPLAYED_HEADER: 'true'})
+
+
+def _reserve(user_id, key, request_hash, expires_at):
+    """
+    Reserva a chave inserindo a linha dentro da transação da requisição.
+
+    Uma requisição duplicada concorrente bloqueia na verificação de
+    unicidade até a primeira terminar; se ela confirmou, a duplicada
+    recebe IntegrityError e reaproveita a resposta gravada.
+    """
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(
+                user_id=user_id, key=key, request_hash=request_hash, expires_at=expires_at
+            ), None
+    except IntegrityError:
+        record = IdempotencyKey.objects.get(user_id=user_id, key=key)
+        if record.expires_at > timezone.now():
+            return None, record
+        record.delete()
+        return IdempotencyKey.objects.create(
+            user_id=user_id, key=key, request_hash=request_hash, expires_at=expires_at
+        ), None
+
+
+def idempotent(view_func):
+    """
+    Torna uma view de movimentação idempotente pelo header Idempotency-Key.
+
+    Uma chave repetida devolve a resposta armazenada sem tocar nas
+    carteiras. Apenas respostas de sucesso são gravadas; em caso de erro a
+    reserva é desfeita e o cliente pode tentar novamente com a mesma chave.
+    Deve ser aplicado abaixo de @api_view para receber o usuário autenticado.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_func(request, *args, **kwargs)
+
+        if len(key) > 255:
+            return Response({
+                "error": "Idempotency-Key deve ter no máximo 255 caracteres."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        user_id = request.user.pk
+        cache_key = _cache_key(user_id, key)
+        request_hash = _request_hash(request)
+
+        stored = cache.get(cache_key)
+        if stored is not None:
+            _count('cache_hits')
+            return _replay(stored, request_hash)
+
+        ttl = settings.IDEMPOTENCY_KEY_TTL
+
+        def reserve_and_run():
+            with transaction.atomic():
+                record, existing = _reserve(
+                    user_id, key, request_hash, timezone.now() + timedelta(seconds=ttl)
+                )
+                if existing is not None:
+                    _count('db_hits')
+                    stored = {
+                        'request_hash': existing.request_hash,
+                        'status': existing.status_code,
+                        'body': existing.response_body,
+                    }
+                    cache.set(cache_key, stored, ttl)
+                    return _replay(stored, request_hash)
+
+                _count('misses')
+                response = view_func(request, *args, **kwargs)
+                if response.status_code >= 400:
+                    transaction.set_rollback(True)
+                    return response
+
+                # Corpo como o cliente o recebeu (Decimal como número, não
+                # texto), para que a resposta repetida tenha os mesmos bytes
+                body = json.loads(JSONRenderer().render(response.data))
+                record.status_code = response.status_code
+                record.response_body = body
+                record.save(update_fields=['status_code', 'response_body'])
+
+                stored = {
+                    'request_hash': request_hash,
+                    'status': record.status_code,
+                    'body': body,
+                }
+                transaction.on_commit(lambda: cache.set(cache_key, stored, ttl))
+            return response
+
+        # A view roda dentro do bloco da reserva, onde run_with_retry não pode
+        # repetir: um deadlock aborta a transação inteira, então a reserva e a
+        # view são repetidas juntas aqui
+        try:
+            return run_with_retry(reserve_and_run)
+        except ConflictException as e:
+            return Response({"error": e.message}, status=e.status_code)
+
+    return wrapper
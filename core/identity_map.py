@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+
+from wallets.models import Wallet
+
+User = get_user_model()
+
+_MISSING = object()
+
+
+class IdentityMap:
+    """
+    Mapa de identidade com escopo de requisição.
+
+    Garante que cada usuário e carteira seja carregado no máximo uma vez
+    por requisição, permitindo que serializers e views compartilhem os
+    mesmos objetos em vez de repetir consultas.
+    """
+
+    def __init__(self, user=None):
+        self._users_by_email = {}
+        self._wallets_by_user_id = {}
+        if user is not None and user.is_authenticated:
+            self.add_user(user)
+
+    def add_user(self, user):
+        self._users_by_email[user.email] = user
+
+    def get_user_by_email(self, email):
+        """Retorna o usuário com o email informado ou None se não existir"""
+        user = self._users_by_email.get(email, _MISSING)
+        if user is _MISSING:
+            user = User.objects.filter(email=email).first()
+            self._users_by_email[email] = user
+        return user
+
+    def add_wallet(self, wallet, user=None):
+        if user is not None:
+            wallet.user = user
+        self._wallets_by_user_id[wallet.user_id] = wallet
+
+    def get_wallet(self, user):
+        """Retorna a carteira do usuário (com `user` já preenchido) ou None"""
+        wallet = self._wallets_by_user_id.get(user.pk, _MISSING)
+        if wallet is _MISSING:
+            wallet = Wallet.objects.filter(user=user).first()
+            if wallet is not None:
+                wallet.user = user
+            self._wallets_by_user_id[user.pk] = wallet
+        return wallet
+
+
+def get_identity_map(request):
+    """Retorna o mapa de identidade da requisição, criando-o no primeiro uso"""
+    http_request = getattr(request, '_request', request)
+    identity_map = getattr(http_request, '_identity_map', None)
+    if identity_map is None:
+        identity_map = IdentityMap(getattr(request, 'user', None))
+        http_request._identity_map = identity_map
+    return identity_map
@@ -0,0 +1,192 @@
+import json
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http import client as http_client
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.utils.benchmark import latency_summary
+from wallets.models import Wallet
+
+User = get_user_model()
+
+# Rotas de leitura e suas equivalentes assíncronas
+ENDPOINTS = {
+    'wallet': ('wallets:wallet-detail', 'wallets:wallet-detail-async'),
+    'transactions': ('transactions:transaction-list', 'transactions:transaction-list-async'),
+    'profile': ('users:profile', 'users:profile-async'),
+}
+
+
+def _parse_target(value, use_async):
+    label, sep, url = value.partition('=')
+    if not sep or not label or not url:
+        raise CommandError(f'Alvo inválido: {value} (use NOME=URL)')
+    parts = urlsplit(url)
+    if parts.scheme != 'http' or not parts.hostname:
+        raise CommandError(f'Somente URLs http:// são suportadas: {url}')
+    return {
+        'label': label,
+        'url': url.rstrip('/'),
+        'host': parts.hostname,
+        'port': parts.port or 80,
+        'prefix': parts.path.rstrip('/'),
+        'async': use_async,
+    }
+
+
+def _run_worker(target, paths, token, requests, warmup):
+    # Uma conexão keep-alive por thread, como um cliente HTTP real
+    connection = http_client.HTTPConnection(target['host'], target['port'], timeout=30)
+    headers = {'Authorization': f'Bearer {token}', 'Accept': 'application/json'}
+    latencies = {name: [] for name in paths}
+    status_codes = Counter()
+    names = list(paths)
+    try:
+        for step in range(warmup + requests):
+            name = names[step % len(names)]
+            started = time.perf_counter()
+            try:
+                connection.request('GET', target['prefix'] + paths[name], headers=headers)
+                response = connection.getresponse()
+                response.read()
+                code = response.status
+            except (OSError, http_client.HTTPException):
+                connection.close()
+                code = 'error'
+            elapsed = (time.perf_counter() - started) * 1000
+            if step >= warmup:
+                latencies[name].append(elapsed)
+                status_codes[f'{name}:{code}'] += 1
+    finally:
+        connection.close()
+    return latencies, status_codes
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara servidores em execução (ex.: gunicorn WSGI e uvicorn ASGI) nas leituras de '
+        'carteira, transações e perfil, com conexões keep-alive, e grava req/s e latências '
+        'p50/p95/p99 por alvo e endpoint em JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target',
+            action='append',
+            default=[],
+            metavar='NOME=URL',
+            help='Servidor medido nas rotas síncronas (pode repetir)'
+        )
+        parser.add_argument(
+            '--async-target',
+            action='append',
+            default=[],
+            metavar='NOME=URL',
+            help='Servidor medido nas rotas assíncronas (pode repetir)'
+        )
+        parser.add_argument(
+            '--endpoint',
+            action='append',
+            choices=list(ENDPOINTS),
+            help='Endpoints medidos (padrão: todos)'
+        )
+        parser.add_argument('--concurrency', type=int, default=32, help='Conexões simultâneas')
+        parser.add_argument('--requests', type=int, default=200, help='Requisições por conexão')
+        parser.add_argument('--warmup', type=int, default=10, help='Requisições descartadas por conexão')
+        parser.add_argument('--email', default='bench-0@bench.local', help='Usuário autenticado')
+        parser.add_argument('--output', help='Arquivo JSON de saída (padrão: stdout)')
+
+    def _token(self, email):
+        user, created = User.objects.get_or_create(email=email, defaults={'username': email})
+        if created:
+            user.set_unusable_password()
+            user.save(update_fields=['password'])
+        Wallet.objects.get_or_create(user=user)
+        return str(RefreshToken.for_user(user).access_token)
+
+    def _measure(self, target, endpoints, token, options):
+        paths = {
+            name: reverse(ENDPOINTS[name][1 if target['async'] else 0])
+            for name in endpoints
+        }
+        concurrency = options['concurrency']
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [
+                executor.submit(
+                    _run_worker, target, paths, token, options['requests'], options['warmup']
+                )
+                for _ in range(concurrency)
+            ]
+            results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - started
+
+        latencies = {name: [] for name in paths}
+        status_codes = Counter()
+        for worker_latencies, worker_codes in results:
+            for name, values in worker_latencies.items():
+                latencies[name] += values
+            status_codes.update(worker_codes)
+
+        all_latencies = sorted(value for values in latencies.values() for value in values)
+        return {
+            'url': target['url'],
+            'async': target['async'],
+            'requests': len(all_latencies),
+            'elapsed_s': round(elapsed, 3),
+            'throughput_rps': round(len(all_latencies) / elapsed, 1) if elapsed else 0,
+            'latency_ms': latency_summary(all_latencies),
+            'endpoints': {
+                name: {'path': paths[name], 'latency_ms': latency_summary(sorted(values))}
+                for name, values in latencies.items()
+            },
+            'status_codes': dict(sorted(status_codes.items())),
+        }
+
+    def handle(self, *args, **options):
+        targets = (
+            [_parse_target(value, False) for value in options['target']]
+            + [_parse_target(value, True) for value in options['async_target']]
+        )
+        if not targets:
+            raise CommandError('Informe ao menos um --target ou --async-target.')
+        if len({target['label'] for target in targets}) != len(targets):
+            raise CommandError('Os nomes dos alvos devem ser únicos.')
+        if options['concurrency'] < 1 or options['requests'] < 1:
+            raise CommandError('--concurrency e --requests devem ser positivos.')
+
+        endpoints = options['endpoint'] or list(ENDPOINTS)
+        token = self._token(options['email'])
+
+        report = {
+            'config': {
+                key: options[key]
+                for key in ['concurrency', 'requests', 'warmup', 'email']
+            },
+            'endpoints': endpoints,
+            'targets': {},
+        }
+        for target in targets:
+            self.stderr.write(
+                f"{target['label']}: {options['concurrency']} conexões x "
+                f"{options['requests']} requisições em {target['url']}..."
+            )
+            result = self._measure(target, endpoints, token, options)
+            report['targets'][target['label']] = result
+            self.stderr.write(self.style.SUCCESS(
+                f"{target['label']}: {result['throughput_rps']} req/s, "
+                f"p50 {result['latency_ms']['p50']} ms, p99 {result['latency_ms']['p99']} ms."
+            ))
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as report_file:
+                report_file.write(output + '\n')
+        else:
+            self.stdout.write(output)
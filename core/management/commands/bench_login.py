@@ -0,0 +1,185 @@
+import json
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib import error, request as urlrequest
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.views import TokenObtainPairView
+
+from core.utils.benchmark import latency_summary
+from users.login import last_login_buffer
+from users.views import LoginView
+
+User = get_user_model()
+
+PASSWORD = 'bench-login-senha'
+
+# legacy: TokenObtainPairView com hash na thread da requisição e UPDATE de last_login por login
+VIEWS = {
+    'legacy': TokenObtainPairView.as_view(),
+    'pooled': LoginView.as_view(),
+}
+
+
+def _cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class InProcessLogin:
+    def __init__(self, view):
+        self.view = VIEWS[view]
+        self.factory = APIRequestFactory()
+
+    def login(self, email):
+        http_request = self.factory.post(
+            '/api/auth/login/', {'email': email, 'password': PASSWORD}, format='json'
+        )
+        return self.view(http_request).status_code
+
+
+class HTTPLogin:
+    def __init__(self, base_url):
+        self.url = base_url.rstrip('/') + '/api/auth/login/'
+
+    def login(self, email):
+        http_request = urlrequest.Request(
+            self.url,
+            data=json.dumps({'email': email, 'password': PASSWORD}).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        try:
+            with urlrequest.urlopen(http_request, timeout=30) as response:
+                response.read()
+                return response.status
+        except error.HTTPError as exc:
+            return exc.code
+
+
+def _run_worker(transport, emails, requests, seed):
+    chooser = random.Random(seed)
+    latencies = []
+    status_codes = Counter()
+    try:
+        for _ in range(requests):
+            started = time.perf_counter()
+            status_codes[transport.login(chooser.choice(emails))] += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+    finally:
+        connections.close_all()
+    return latencies, status_codes
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede logins por segundo (total e por núcleo) e latências do login atual (pooled) e do '
+        'TokenObtainPairView original (legacy), em processo ou contra um servidor (--url). '
+        'Usa usuários próprios (bench-login-N@bench.local).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--view',
+            action='append',
+            choices=list(VIEWS),
+            help='Implementações medidas em processo (padrão: legacy e pooled)'
+        )
+        parser.add_argument('--workers', type=int, default=16, help='Logins simultâneos')
+        parser.add_argument('--requests', type=int, default=50, help='Logins por worker')
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--url', help='URL base de um servidor em execução (mede apenas o login dele)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Arquivo JSON de saída (padrão: stdout)')
+
+    def _prepare_users(self, count):
+        emails = [f'bench-login-{index}@bench.local' for index in range(count)]
+        existing = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+        User.objects.bulk_create([
+            User(email=email, username=email.split('@')[0])
+            for email in emails if email not in existing
+        ])
+        # Um único hash para todos: o custo de preparação não depende de --users
+        User.objects.filter(email__in=emails).update(password=make_password(PASSWORD), is_active=True)
+        return emails
+
+    def _measure(self, transport_factory, emails, options):
+        workers = options['workers']
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    _run_worker, transport_factory(), emails, options['requests'],
+                    options['seed'] + worker
+                )
+                for worker in range(workers)
+            ]
+            results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(value for worker_latencies, codes in results for value in worker_latencies)
+        status_codes = Counter()
+        for worker_latencies, codes in results:
+            status_codes.update(codes)
+        succeeded = status_codes.get(200, 0)
+        cores = _cores()
+        return {
+            'requests': len(latencies),
+            'elapsed_s': round(elapsed, 3),
+            'logins_per_s': round(succeeded / elapsed, 1) if elapsed else 0,
+            'logins_per_s_per_core': round(succeeded / elapsed / cores, 1) if elapsed else 0,
+            'latency_ms': latency_summary(latencies),
+            'status_codes': {str(code): count for code, count in sorted(status_codes.items())},
+        }
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['requests'] < 1 or options['users'] < 1:
+            raise CommandError('--workers, --requests e --users devem ser positivos.')
+        emails = self._prepare_users(options['users'])
+
+        report = {
+            'config': {
+                key: options[key] for key in ['workers', 'requests', 'users', 'url', 'seed']
+            },
+            'cores': _cores(),
+            'password_hasher': settings.PASSWORD_HASHERS[0],
+            'results': {},
+        }
+
+        if options['url']:
+            labels = {'server': lambda: HTTPLogin(options['url'])}
+        else:
+            labels = {view: (lambda view=view: InProcessLogin(view)) for view in options['view'] or VIEWS}
+
+        for label, transport_factory in labels.items():
+            self.stderr.write(f"{label}: {options['workers']} workers x {options['requests']} logins...")
+            if label == 'legacy':
+                # Comportamento anterior: UPDATE de last_login síncrono a cada login
+                with override_settings(SIMPLE_JWT={**settings.SIMPLE_JWT, 'UPDATE_LAST_LOGIN': True}):
+                    result = self._measure(transport_factory, emails, options)
+            else:
+                result = self._measure(transport_factory, emails, options)
+                last_login_buffer.flush()
+            report['results'][label] = result
+            self.stderr.write(self.style.SUCCESS(
+                f"{label}: {result['logins_per_s']} logins/s "
+                f"({result['logins_per_s_per_core']} por núcleo), p99 {result['latency_ms']['p99']} ms."
+            ))
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as report_file:
+                report_file.write(output + '\n')
+        else:
+            self.stdout.write(output)
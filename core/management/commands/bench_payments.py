@@ -0,0 +1,333 @@
+import json
+import multiprocessing
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from decimal import Decimal
+from urllib import error, request as urlrequest
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Sum
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.utils.benchmark import latency_summary
+from transactions import services
+from wallets.models import Wallet, WalletShard
+
+User = get_user_model()
+
+PATTERNS = ['uniform', 'hot', 'bidirectional']
+OPERATIONS = ['transfer', 'deposit', 'withdraw']
+THROTTLE_SCOPES = ['money_user', 'money_wallet']
+
+
+class InProcessTransport:
+    """Chama as views pela pilha completa do Django, sem rede"""
+
+    def __init__(self, users):
+        self.clients = {}
+        for user in users:
+            client = APIClient(SERVER_NAME='localhost')
+            client.force_authenticate(user=user)
+            self.clients[user.pk] = client
+
+    def post(self, user, url, data):
+        response = self.clients[user.pk].post(url, data, format='json')
+        return response.status_code
+
+
+class HTTPTransport:
+    """Envia requisições reais a um servidor em execução, autenticadas por JWT"""
+
+    def __init__(self, users, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.tokens = {user.pk: str(RefreshToken.for_user(user).access_token) for user in users}
+
+    def post(self, user, url, data):
+        http_request = urlrequest.Request(
+            self.base_url + url,
+            data=json.dumps(data).encode('utf-8'),
+            headers={
+                'Content-Type': 'application/json',
+                'Authorization': f'Bearer {self.tokens[user.pk]}',
+            },
+            method='POST'
+        )
+        try:
+            with urlrequest.urlopen(http_request, timeout=30) as response:
+                response.read()
+                return response.status
+        except error.HTTPError as exc:
+            return exc.code
+
+
+class Workload:
+    """Sorteia operação, valor e participantes conforme o padrão de tráfego"""
+
+    def __init__(self, users, pattern, mix, seed):
+        self.users = users
+        self.pattern = pattern
+        self.operations, self.weights = zip(*mix.items())
+        self.random = random.Random(seed)
+
+    def _pair(self):
+        users = self.users
+        if self.pattern == 'bidirectional':
+            # Os mesmos dois usuários nos dois sentidos: pior caso de ordem de bloqueio
+            return tuple(self.random.sample(users[:2], 2))
+        if self.pattern == 'hot' and self.random.random() < 0.9:
+            return self.random.choice(users[1:]), users[0]
+        return tuple(self.random.sample(users, 2))
+
+    def next(self):
+        operation = self.random.choices(self.operations, self.weights)[0]
+        amount = Decimal(self.random.randint(1, 100)) / 100
+        sender, recipient = self._pair()
+        if operation == 'transfer':
+            url = reverse('transactions:transfer')
+            data = {'recipient_email': recipient.email, 'amount': str(amount)}
+            return operation, sender, url, data, amount
+        if operation == 'deposit':
+            return operation, recipient, reverse('wallets:deposit'), {'amount': str(amount)}, amount
+        return operation, sender, reverse('transactions:withdraw'), {'amount': str(amount)}, amount
+
+
+def _make_transport(users, base_url):
+    return HTTPTransport(users, base_url) if base_url else InProcessTransport(users)
+
+
+def _run_worker(users, base_url, pattern, mix, requests, seed):
+    # Um cliente por worker: APIClient não é seguro para uso entre threads
+    transport = _make_transport(users, base_url)
+    workload = Workload(users, pattern, mix, seed)
+    latencies = []
+    throttled = 0
+    status_codes = Counter()
+    by_operation = Counter()
+    moved = {'deposit': Decimal('0.00'), 'withdraw': Decimal('0.00')}
+    try:
+        for _ in range(requests):
+            operation, user, url, data, amount = workload.next()
+            started = time.perf_counter()
+            status_code = transport.post(user, url, data)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            # Recusas do throttle são rápidas e distorceriam latência e throughput
+            if status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+                throttled += 1
+            else:
+                latencies.append(elapsed_ms)
+            status_codes[status_code] += 1
+            by_operation[f'{operation}:{status_code}'] += 1
+            if status_code < 300 and operation in moved:
+                moved[operation] += amount
+    finally:
+        connections.close_all()
+    return latencies, throttled, status_codes, by_operation, moved
+
+
+def _process_worker(args):
+    user_ids, base_url, pattern, mix, requests, seed = args
+    users = sorted(User.objects.filter(pk__in=user_ids), key=lambda user: user_ids.index(user.pk))
+    before = services.get_retry_stats()
+    result = _run_worker(users, base_url, pattern, mix, requests, seed)
+    after = services.get_retry_stats()
+    return result + ({key: after[key] - before[key] for key in after},)
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede transferências, depósitos e saques sob concorrência (threads ou processos) e '
+        'grava throughput, latências, conflitos de bloqueio e a conservação de saldo em JSON. '
+        'Usa usuários próprios (bench-N@bench.local) e altera seus saldos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Threads ou processos simultâneos')
+        parser.add_argument('--mode', choices=['thread', 'process'], default='thread')
+        parser.add_argument('--requests', type=int, default=200, help='Requisições por worker')
+        parser.add_argument('--pattern', choices=PATTERNS, default='uniform')
+        parser.add_argument('--users', type=int, default=50, help='Quantidade de carteiras envolvidas')
+        parser.add_argument(
+            '--mix',
+            default='transfer:80,deposit:10,withdraw:10',
+            help='Peso de cada operação, ex.: transfer:100'
+        )
+        parser.add_argument('--initial-balance', type=Decimal, default=Decimal('1000.00'))
+        parser.add_argument(
+            '--hot-shards',
+            type=int,
+            default=0,
+            help='Sub-saldos da carteira quente (usuário 0); 0 mantém a carteira comum'
+        )
+        parser.add_argument(
+            '--url',
+            help='URL base de um servidor em execução; sem ela as views são chamadas no processo'
+        )
+        parser.add_argument(
+            '--keep-throttles',
+            action='store_true',
+            help='Mantém os throttles de movimentação nas views chamadas no processo'
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Arquivo JSON de saída (padrão: stdout)')
+
+    def _parse_mix(self, value):
+        mix = {}
+        for part in value.split(','):
+            operation, _, weight = part.partition(':')
+            if operation not in OPERATIONS:
+                raise CommandError(f'Operação desconhecida em --mix: {operation}')
+            mix[operation] = float(weight or 1)
+        return mix
+
+    def _prepare_users(self, count, initial_balance, hot_shards):
+        users = []
+        for index in range(count):
+            user, created = User.objects.get_or_create(
+                email=f'bench-{index}@bench.local',
+                defaults={'username': f'bench-{index}'}
+            )
+            if created:
+                user.set_unusable_password()
+                user.save(update_fields=['password'])
+            users.append(user)
+
+        for user in users:
+            Wallet.objects.get_or_create(user=user)
+        wallets = Wallet.objects.filter(user__in=users)
+        for user in users:
+            services.configure_shards(user, hot_shards if user is users[0] else 0)
+        wallets.update(balance=initial_balance)
+        WalletShard.objects.filter(wallet__in=wallets).update(balance=Decimal('0.00'))
+        return users
+
+    def _total_balance(self, users):
+        wallets = Wallet.objects.filter(user__in=users)
+        shards = WalletShard.objects.filter(wallet__in=wallets).aggregate(total=Sum('balance'))['total']
+        total = wallets.aggregate(total=Sum('balance'))['total'] + (shards or Decimal('0.00'))
+        return total.quantize(Decimal('0.01'))
+
+    def _throttle_settings(self, options):
+        # Sem desligar os baldes, o padrão hot mede recusas 429, não a disputa de bloqueios.
+        # Com --url os throttles valem as variáveis THROTTLE_MONEY_* do servidor
+        if options['url'] or options['keep_throttles']:
+            return nullcontext()
+        return override_settings(REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': dict.fromkeys(THROTTLE_SCOPES),
+        })
+
+    def _run(self, users, mix, seeds, options):
+        workers = len(seeds)
+        started = time.perf_counter()
+        if options['mode'] == 'process':
+            user_ids = [user.pk for user in users]
+            jobs = [
+                (user_ids, options['url'], options['pattern'], mix, options['requests'], seed)
+                for seed in seeds
+            ]
+            # Conexões não podem ser herdadas pelos processos filhos
+            connections.close_all()
+            with multiprocessing.get_context('fork').Pool(workers) as pool:
+                results = pool.map(_process_worker, jobs)
+        else:
+            before = services.get_retry_stats()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(
+                        _run_worker, users, options['url'], options['pattern'], mix,
+                        options['requests'], seed
+                    )
+                    for seed in seeds
+                ]
+                results = [future.result() for future in futures]
+            after = services.get_retry_stats()
+            retry_stats = {key: after[key] - before[key] for key in after}
+            # Os contadores são do processo: atribuídos uma única vez ao total
+            results = [results[0] + (retry_stats,)] + [
+                result + (dict.fromkeys(retry_stats, 0),) for result in results[1:]
+            ]
+        return results, time.perf_counter() - started
+
+    def handle(self, *args, **options):
+        if options['users'] < 2:
+            raise CommandError('--users deve ser pelo menos 2.')
+        mix = self._parse_mix(options['mix'])
+        users = self._prepare_users(options['users'], options['initial_balance'], options['hot_shards'])
+        initial_total = self._total_balance(users)
+        workers = options['workers']
+        seeds = [options['seed'] + worker for worker in range(workers)]
+
+        self.stderr.write(
+            f"{workers} {options['mode']}s x {options['requests']} requisições, "
+            f"padrão {options['pattern']}..."
+        )
+        with self._throttle_settings(options):
+            results, elapsed = self._run(users, mix, seeds, options)
+
+        latencies = []
+        throttled = 0
+        status_codes = Counter()
+        by_operation = Counter()
+        moved = Counter()
+        retry_stats = Counter()
+        for (worker_latencies, worker_throttled, worker_codes, worker_operations, worker_moved,
+                worker_retries) in results:
+            latencies += worker_latencies
+            throttled += worker_throttled
+            status_codes.update(worker_codes)
+            by_operation.update(worker_operations)
+            moved.update(worker_moved)
+            retry_stats.update(worker_retries)
+        latencies.sort()
+
+        expected = initial_total + moved['deposit'] - moved['withdraw']
+        actual = self._total_balance(users)
+        report = {
+            'config': {
+                key: str(options[key]) if isinstance(options[key], Decimal) else options[key]
+                for key in [
+                    'workers', 'mode', 'requests', 'pattern', 'users', 'initial_balance',
+                    'hot_shards', 'url', 'keep_throttles', 'seed'
+                ]
+            },
+            'mix': mix,
+            'requests': len(latencies) + throttled,
+            # 429 ficam fora de throughput e latências
+            'throttled': throttled,
+            'elapsed_s': round(elapsed, 3),
+            'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else 0,
+            'latency_ms': latency_summary(latencies),
+            'status_codes': {str(code): count for code, count in sorted(status_codes.items())},
+            'by_operation': dict(sorted(by_operation.items())),
+            # Em modo --url os contadores ficam no servidor e não são coletados aqui
+            'lock_conflicts': dict(retry_stats),
+            'conservation': {
+                'expected': str(expected),
+                'actual': str(actual),
+                'ok': expected == actual,
+            },
+        }
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as report_file:
+                report_file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+        style = self.style.SUCCESS if report['conservation']['ok'] else self.style.ERROR
+        self.stderr.write(style(
+            f"{report['throughput_rps']} req/s, p99 {report['latency_ms']['p99']} ms, "
+            f"{throttled} recusadas pelo throttle, "
+            f"conservação de saldo {'ok' if report['conservation']['ok'] else 'VIOLADA'}."
+        ))
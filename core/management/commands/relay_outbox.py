@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.outbox import get_sink, relay_batch
+
+
+class Command(BaseCommand):
+    help = 'Publica os eventos do outbox no destino configurado (OUTBOX_SINK) e os remove'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Quantidade de eventos publicados por transação'
+        )
+        parser.add_argument(
+            '--sink',
+            help='Caminho de importação do destino (padrão: OUTBOX_SINK)'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Espera (segundos) quando o outbox está vazio'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Esvazia o outbox uma vez e encerra'
+        )
+
+    def handle(self, *args, **options):
+        sink = get_sink(options['sink'])
+        started = time.monotonic()
+        total = 0
+
+        try:
+            while True:
+                published = relay_batch(sink, options['batch_size'])
+                total += published
+                if published:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sink.close()
+
+        elapsed = time.monotonic() - started
+        rate = total / elapsed if elapsed else 0
+        self.stderr.write(self.style.SUCCESS(
+            f'{total} eventos publicados em {elapsed:.2f}s ({rate:.0f} eventos/s).'
+        ))
@@ -1,202 +1,339 @@
+import io
+import math
 import random
+import time
+from bisect import bisect
+from datetime import datetime, time as dt_time, timedelta
 from decimal import Decimal
-from django.core.management.base import BaseCommand
+from itertools import accumulate
+
 from django.contrib.auth import get_user_model
-from django.db import transaction, connection
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
 from django.utils import timezone
-from datetime import timedelta
 
+from transactions import partitions
+from transactions.models import LedgerEntry, Transaction
 from wallets.models import Wallet
 
 User = get_user_model()
 
-class Command(BaseCommand):
-    help = 'Popula o banco de dados com dados iniciais para testes'
-
-    def handle(self, *args, **kwargs):
-        self.stdout.write(self.style.SUCCESS('Iniciando a população do banco de dados...'))
-        
-        # Verificar se a tabela wallets_wallet existe
-        table_exists = self._check_table_exists('wallets_wallet')
-        
-        if not table_exists:
-            self.stdout.write(self.style.WARNING(
-                'A tabela wallets_wallet não existe. Criando apenas usuários.'
-            ))
-            self._create_test_users()
-        else:
-            with transaction.atomic():
-                self._create_test_users()
-                self._ensure_wallets()
-                self._add_funds_to_wallets()
-        
-        self.stdout.write(self.style.SUCCESS('Banco de dados populado com sucesso!'))
-    
-    def _check_table_exists(self, table_name):
-        """Verifica se uma tabela existe no banco de dados"""
+SEED_DOMAIN = 'seed.local'
+
+DEMO_USERS = [
+    ('joao', 'joao@example.com', 'João', 'Silva'),
+    ('maria', 'maria@example.com', 'Maria', 'Santos'),
+    ('pedro', 'pedro@example.com', 'Pedro', 'Oliveira'),
+    ('ana', 'ana@example.com', 'Ana', 'Costa'),
+    ('carlos', 'carlos@example.com', 'Carlos', 'Rodrigues'),
+]
+
+FIRST_NAMES = ['Ana', 'Bruno', 'Carla', 'Diego', 'Elisa', 'Fábio', 'Gabriela', 'Hugo', 'Isabela', 'João',
+               'Larissa', 'Marcos', 'Natália', 'Otávio', 'Paula', 'Rafael', 'Sofia', 'Tiago', 'Vitória']
+LAST_NAMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira',
+              'Lima', 'Gomes', 'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Lopes']
+MERCHANT_NAMES = ['Mercado', 'Padaria', 'Farmácia', 'Posto', 'Restaurante', 'Loja', 'Livraria', 'Pet Shop']
+DESCRIPTIONS = ['', '', '', 'Aluguel', 'Almoço', 'Presente', 'Divisão da conta', 'Mensalidade',
+                'Compra', 'Reembolso']
+
+USER_FIELDS = [
+    'id', 'password', 'last_login', 'is_superuser', 'username', 'first_name', 'last_name', 'email',
+    'is_staff', 'is_active', 'date_joined', 'phone_number', 'is_verified', 'created_at', 'updated_at',
+]
+WALLET_FIELDS = ['id', 'user', 'balance', 'is_active', 'shard_count', 'created_at', 'updated_at']
+TRANSACTION_FIELDS = [
+    'id', 'transaction_type', 'status', 'sender', 'recipient', 'amount', 'description',
+    'created_at', 'updated_at', 'failure_reason',
+]
+LEDGER_FIELDS = ['id', 'transaction', 'wallet', 'entry_type', 'amount', 'created_at']
+
+
+def _copy_text(value):
+    """Formata um valor no formato texto do COPY do PostgreSQL"""
+    if value is None:
+        return '\\N'
+    if value is True:
+        return 't'
+    if value is False:
+        return 'f'
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return (
+        str(value).replace('\\', '\\\\').replace('\t', '\\t')
+        .replace('\n', '\\n').replace('\r', '\\r')
+    )
+
+
+class RowWriter:
+    """
+    Grava linhas de um modelo em lotes: COPY no PostgreSQL e INSERT em lote
+    (executemany) nos demais bancos. Os ids são atribuídos pelo gerador para
+    que os lançamentos possam referenciar transações ainda não gravadas.
+    """
+
+    def __init__(self, model, field_names, batch_size):
+        self.fields = [model._meta.get_field(name) for name in field_names]
+        self.table = connection.ops.quote_name(model._meta.db_table)
+        self.columns = ', '.join(connection.ops.quote_name(field.column) for field in self.fields)
+        self.batch_size = batch_size
+        self.rows = []
+        self.written = 0
+
+    def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
         with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT EXISTS (
-                    SELECT FROM information_schema.tables 
-                    WHERE table_name = %s
-                )
-            """, [table_name])
-            return cursor.fetchone()[0]
-    
-    def _create_test_users(self):
-        """Cria usuários de teste"""
-        # Dados para usuários de teste
-        test_users = [
-            {
-                'username': 'joao',
-                'email': 'joao@example.com',
-                'password': 'senha@123',
-                'first_name': 'João',
-                'last_name': 'Silva',
-                'is_verified': True
-            },
-            {
-                'username': 'maria',
-                'email': 'maria@example.com',
-                'password': 'senha@123',
-                'first_name': 'Maria',
-                'last_name': 'Santos',
-                'is_verified': True
-            },
-            {
-                'username': 'pedro',
-                'email': 'pedro@example.com',
-                'password': 'senha@123',
-                'first_name': 'Pedro',
-                'last_name': 'Oliveira',
-                'is_verified': True
-            },
-            {
-                'username': 'ana',
-                'email': 'ana@example.com',
-                'password': 'senha@123',
-                'first_name': 'Ana',
-                'last_name': 'Costa',
-                'is_verified': True
-            },
-            {
-                'username': 'carlos',
-                'email': 'carlos@example.com',
-                'password': 'senha@123',
-                'first_name': 'Carlos',
-                'last_name': 'Rodrigues',
-                'is_verified': True
-            },
-        ]
-        
-        # Criando usuários
-        for user_data in test_users:
-            user, created = User.objects.get_or_create(
-                email=user_data['email'],
-                defaults={
-                    'username': user_data['username'],
-                    'first_name': user_data['first_name'],
-                    'last_name': user_data['last_name'],
-                    'is_verified': user_data['is_verified']
-                }
-            )
-            
-            if created:
-                user.set_password(user_data['password'])
-                user.save()
-                self.stdout.write(self.style.SUCCESS(f'Usuário criado: {user.email}'))
+            if connection.vendor == 'postgresql':
+                buffer = io.StringIO(''.join(
+                    '\t'.join(map(_copy_text, row)) + '\n' for row in self.rows
+                ))
+                cursor.copy_expert(f'COPY {self.table} ({self.columns}) FROM STDIN', buffer)
             else:
-                self.stdout.write(f'Usuário já existe: {user.email}')
-    
-    def _ensure_wallets(self):
-        """Garante que todos os usuários tenham carteiras"""
-        if not self._check_table_exists('wallets_wallet'):
-            self.stdout.write(self.style.WARNING(
-                'A tabela wallets_wallet não existe. Ignorando criação de carteiras.'
-            ))
+                placeholders = ', '.join(['%s'] * len(self.fields))
+                cursor.executemany(
+                    f'INSERT INTO {self.table} ({self.columns}) VALUES ({placeholders})',
+                    [
+                        [field.get_db_prep_save(value, connection) for field, value in zip(self.fields, row)]
+                        for row in self.rows
+                    ]
+                )
+        self.written += len(self.rows)
+        self.rows = []
+
+
+class WeightedPicker:
+    """Sorteio ponderado em O(log n) com pesos acumulados pré-calculados"""
+
+    def __init__(self, items, weights, rng):
+        self.items = items
+        self.cumulative = list(accumulate(weights))
+        self.total = self.cumulative[-1]
+        self.rng = rng
+
+    def pick(self):
+        return self.items[bisect(self.cumulative, self.rng.random() * self.total)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera dados sintéticos em escala (usuários, carteiras, transações, lançamentos e resumos) '
+        'a partir de uma semente determinística. Atividade segue lei de potência, com lojistas '
+        'concentrando recebimentos; os saldos finais batem com o histórico gerado.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Usuários sintéticos a criar')
+        parser.add_argument('--transactions', type=int, default=2000, help='Transações a gerar')
+        parser.add_argument('--merchants', type=int, default=5, help='Lojistas (carteiras quentes)')
+        parser.add_argument(
+            '--merchant-share',
+            type=float,
+            default=0.3,
+            help='Fração das transferências destinadas a lojistas'
+        )
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=1.1,
+            help='Expoente da lei de potência da atividade por usuário'
+        )
+        parser.add_argument('--days', type=int, default=365, help='Janela de histórico em dias')
+        parser.add_argument(
+            '--until',
+            type=lambda value: datetime.strptime(value, '%Y-%m-%d').date(),
+            help='Último dia do histórico (AAAA-MM-DD, padrão: hoje)'
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--password', default='senha@123', help='Senha comum a todos os usuários')
+        parser.add_argument(
+            '--append',
+            action='store_true',
+            help='Gera mais dados mesmo que já existam usuários sintéticos'
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] + len(DEMO_USERS) < 2:
+            raise CommandError('São necessários pelo menos 2 usuários.')
+        if options['merchants'] > options['users']:
+            raise CommandError('--merchants não pode exceder --users.')
+        if not options['append'] and User.objects.filter(email__endswith=f'@{SEED_DOMAIN}').exists():
+            self.stdout.write('Dados sintéticos já existem; use --append para gerar mais.')
             return
 
-        # Importar o modelo Wallet apenas se a tabela existir
-        from wallets.models import Wallet
-        
-        # Consulta direta para evitar o JOIN com wallets_wallet que pode não existir
-        for user in User.objects.all():
-            wallet, created = Wallet.objects.get_or_create(user=user)
-            if created:
-                self.stdout.write(self.style.SUCCESS(f'Carteira criada para {user.email}'))
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        until = options['until'] or timezone.localdate()
+        self.end = timezone.make_aware(datetime.combine(until + timedelta(days=1), dt_time.min))
+        self.start = self.end - timedelta(days=options['days'])
+
+        started = time.monotonic()
+        if partitions.is_partitioned():
+            # Histórico fora da partição DEFAULT
+            partitions.ensure_partitions(until=self.end, since=self.start)
+        with transaction.atomic():
+            users = self._create_users(options)
+            balances, counts = self._generate_history(users, options)
+            self._create_wallets(users, balances)
+            self._reset_sequences()
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(
+            f'{len(users)} usuários, {counts[0]} transações e {counts[1]} lançamentos '
+            f'gerados em {elapsed:.1f}s. Recalculando resumos...'
+        )
+        call_command('rebuild_transaction_summaries', stdout=io.StringIO())
+        self.stdout.write(self.style.SUCCESS('Banco de dados populado com sucesso!'))
+
+    def _next_id(self, model):
+        return (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+
+    def _create_users(self, options):
+        """Insere usuários de demonstração ausentes e os sintéticos, com um único hash de senha"""
+        password = make_password(options['password'])
+        writer = RowWriter(User, USER_FIELDS, self.batch_size)
+        next_id = self._next_id(User)
+        existing = set(User.objects.filter(email__in=[demo[1] for demo in DEMO_USERS])
+                       .values_list('email', flat=True))
+
+        # (id, nome, lojista?) na ordem de atividade decrescente
+        users = []
+        for username, email, first_name, last_name in DEMO_USERS:
+            if email in existing:
+                continue
+            joined = self.start
+            writer.add((next_id, password, None, False, username, first_name, last_name, email,
+                        False, True, joined, None, True, joined, joined))
+            users.append((next_id, False))
+            next_id += 1
+
+        span = (self.end - self.start).total_seconds()
+        for index in range(options['users']):
+            user_id = next_id + index
+            merchant = index < options['merchants']
+            if merchant:
+                first_name, last_name = self.rng.choice(MERCHANT_NAMES), f'{index + 1}'
             else:
-                self.stdout.write(f'Carteira já existe para {user.email}')
-    
-    def _add_funds_to_wallets(self):
-        """Adiciona fundos às carteiras dos usuários"""
-        if not self._check_table_exists('wallets_wallet'):
-            self.stdout.write(self.style.WARNING(
-                'A tabela wallets_wallet não existe. Ignorando adição de fundos.'
-            ))
-            return
-            
-        # Importar o modelo Wallet apenas se a tabela existir
-        from wallets.models import Wallet
-        
-        wallets = Wallet.objects.all()
-        
-        for wallet in wallets:
-            # Adiciona um valor aleatório entre R$ 100,00 e R$ 5.000,00
-            amount = Decimal(random.randint(10000, 500000)) / 100
-            wallet.balance = amount
-            wallet.save()
-            self.stdout.write(self.style.SUCCESS(
-                f'Adicionado R$ {amount:.2f} à carteira de {wallet.user.email}'
+                first_name, last_name = self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+            joined = self.start + timedelta(seconds=self.rng.random() * span * 0.1)
+            writer.add((user_id, password, None, False, f'seed{user_id}', first_name, last_name,
+                        f'seed{user_id}@{SEED_DOMAIN}', False, True, joined, None, True, joined, joined))
+            users.append((user_id, merchant))
+        writer.flush()
+        return users
+
+    def _amount(self, merchant):
+        # Log-normal: mediana ~R$ 30 (pagamentos a lojistas um pouco menores)
+        cents = int(math.exp(self.rng.gauss(7.6 if merchant else 8.0, 1.2)))
+        return max(1, min(cents, 5_000_000))
+
+    def _generate_history(self, users, options):
+        """
+        Gera as transações em ordem cronológica, simulando os saldos em
+        centavos para que nenhuma carteira fique negativa e o saldo final
+        de cada uma seja exatamente a soma do seu histórico.
+        """
+        user_ids = [user_id for user_id, merchant in users]
+        merchants = [user_id for user_id, merchant in users if merchant]
+        consumers = [user_id for user_id, merchant in users if not merchant] or user_ids
+        skew = options['skew']
+        # Lei de potência: o usuário de posto r tem peso 1 / r^skew
+        activity = WeightedPicker(
+            consumers, [1 / (rank ** skew) for rank in range(1, len(consumers) + 1)], self.rng
+        )
+        everyone = WeightedPicker(
+            user_ids, [1 / (rank ** skew) for rank in range(1, len(user_ids) + 1)], self.rng
+        )
+        hot = WeightedPicker(
+            merchants, [1 / (rank ** skew) for rank in range(1, len(merchants) + 1)], self.rng
+        ) if merchants else None
+        merchant_set = set(merchants)
+
+        balances = dict.fromkeys(user_ids, 0)
+        # O id da carteira é atribuído agora; as carteiras são gravadas no final com o saldo simulado
+        wallet_id = self._next_id(Wallet)
+        self.wallet_ids = {user_id: wallet_id + offset for offset, user_id in enumerate(user_ids)}
+
+        transactions = RowWriter(Transaction, TRANSACTION_FIELDS, self.batch_size)
+        entries = RowWriter(LedgerEntry, LEDGER_FIELDS, self.batch_size * 2)
+        transaction_id = self._next_id(Transaction)
+        entry_id = self._next_id(LedgerEntry)
+        total = options['transactions']
+        span = (self.end - self.start).total_seconds()
+
+        def emit(kind, sender, recipient, cents, moment):
+            nonlocal transaction_id, entry_id
+            amount = Decimal(cents) / 100
+            transactions.add((
+                transaction_id, kind, Transaction.COMPLETED, sender, recipient, amount,
+                self.rng.choice(DESCRIPTIONS) if kind == Transaction.TRANSFER else '',
+                moment, moment, ''
             ))
-    
-    def _create_sample_transactions(self):
-        """Cria transações de exemplo entre usuários"""
-        if not self._check_table_exists('transactions_transaction'):
-            self.stdout.write(self.style.WARNING(
-                'A tabela transactions_transaction não existe. Ignorando criação de transações.'
+            debit = self.wallet_ids[sender] if sender else None
+            credit = self.wallet_ids[recipient] if recipient else None
+            entries.add((entry_id, transaction_id, debit, LedgerEntry.DEBIT, amount, moment))
+            entries.add((entry_id + 1, transaction_id, credit, LedgerEntry.CREDIT, amount, moment))
+            transaction_id += 1
+            entry_id += 2
+
+        for index in range(total):
+            # Instantes crescentes espalhados pela janela
+            moment = self.start + timedelta(seconds=(index + self.rng.random()) / total * span)
+            roll = self.rng.random()
+            if roll < 0.15:
+                user_id = everyone.pick()
+                cents = self._amount(False) * 3
+                balances[user_id] += cents
+                emit(Transaction.DEPOSIT, None, user_id, cents, moment)
+            elif roll < 0.25:
+                user_id = hot.pick() if hot and self.rng.random() < 0.5 else activity.pick()
+                cents = min(self._amount(False), balances[user_id])
+                if cents:
+                    balances[user_id] -= cents
+                    emit(Transaction.WITHDRAWAL, user_id, None, cents, moment)
+            else:
+                sender = activity.pick()
+                if hot and self.rng.random() < options['merchant_share']:
+                    recipient = hot.pick()
+                else:
+                    recipient = everyone.pick()
+                if recipient == sender:
+                    continue
+                cents = self._amount(recipient in merchant_set)
+                if balances[sender] < cents:
+                    # Sem saldo: o usuário deposita antes de transferir
+                    topup = cents * 2
+                    balances[sender] += topup
+                    emit(Transaction.DEPOSIT, None, sender, topup, moment)
+                balances[sender] -= cents
+                balances[recipient] += cents
+                emit(Transaction.TRANSFER, sender, recipient, cents, moment)
+
+        transactions.flush()
+        entries.flush()
+        return balances, (transactions.written, entries.written)
+
+    def _create_wallets(self, users, balances):
+        writer = RowWriter(Wallet, WALLET_FIELDS, self.batch_size)
+        now = timezone.now()
+        for user_id, merchant in users:
+            writer.add((
+                self.wallet_ids[user_id], user_id, Decimal(balances[user_id]) / 100, True, 0,
+                self.start, now
             ))
-            return
-        
-        # Importar o modelo Transaction apenas se a tabela existir
-        from transactions.models import Transaction
-        from django.contrib.auth import get_user_model
-        from wallets.models import Wallet
-        import random
-        from decimal import Decimal
-        from datetime import timedelta
-        from django.utils import timezone
-        
-        User = get_user_model()
-        
-        # Obter todos os usuários com carteiras
-        users = User.objects.filter(wallet__isnull=False)
-        if users.count() < 2:
-            self.stdout.write(self.style.WARNING('Não há usuários suficientes para criar transações.'))
-            return
-        
-        # Criar transações aleatórias
-        for _ in range(20):
-            # Escolher remetente e destinatário
-            sender = random.choice(users)
-            recipients = [u for u in users if u != sender]
-            recipient = random.choice(recipients)
-            
-            # Valor aleatório entre R$10 e R$100
-            amount = Decimal(random.randint(1000, 10000)) / 100
-            
-            # Data aleatória nos últimos 30 dias
-            days_ago = random.randint(0, 30)
-            transaction_date = timezone.now() - timedelta(days=days_ago)
-            
-            # Criar a transação
-            transaction = Transaction.objects.create(
-                transaction_type=Transaction.TRANSFER,
-                status=Transaction.COMPLETED,
-                sender=sender,
-                recipient=recipient,
-                amount=amount,
-                description=f'Transação de teste - {random.randint(1000, 9999)}',
-                created_at=transaction_date
-            )
-            
-            self.stdout.write(self.style.SUCCESS(f'Transação de exemplo criada: {transaction}')) 
\ No newline at end of file
+        writer.flush()
+
+    def _reset_sequences(self):
+        statements = connection.ops.sequence_reset_sql(no_style(), [User, Wallet, Transaction, LedgerEntry])
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
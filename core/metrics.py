@@ -0,0 +1,173 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histogram:
+    """
+    Histograma cumulativo no formato do Prometheus.
+
+    Cada observação incrementa apenas o contador do seu intervalo; os
+    acumulados por `le` são calculados na exportação.
+    """
+
+    def __init__(self, name, help_text, buckets, labels):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.labels = labels
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def _format_labels(self, label_values, extra=()):
+        pairs = list(zip(self.labels, label_values)) + list(extra)
+        escaped = (f'{key}="{_escape(value)}"' for key, value in pairs)
+        return '{' + ','.join(escaped) + '}' if pairs else ''
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            snapshot = {
+                labels: (list(counts), total, count)
+                for labels, (counts, total, count) in self._series.items()
+            }
+        for label_values, (counts, total, count) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(
+                    f'{self.name}_bucket{self._format_labels(label_values, [("le", bound)])} {cumulative}'
+                )
+            lines.append(f'{self.name}_bucket{self._format_labels(label_values, [("le", "+Inf")])} {count}')
+            lines.append(f'{self.name}_sum{self._format_labels(label_values)} {total}')
+            lines.append(f'{self.name}_count{self._format_labels(label_values)} {count}')
+        return '\n'.join(lines)
+
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Duração total da requisição',
+    LATENCY_BUCKETS, ('view', 'method', 'status')
+)
+VIEW_DURATION = Histogram(
+    'http_view_duration_seconds', 'Tempo na view, incluindo serializers',
+    LATENCY_BUCKETS, ('view',)
+)
+RENDER_DURATION = Histogram(
+    'http_render_duration_seconds', 'Tempo de renderização da resposta',
+    LATENCY_BUCKETS, ('view',)
+)
+SERIALIZATION_DURATION = Histogram(
+    'http_serialization_duration_seconds', 'Tempo em serializers por requisição (parte do tempo na view)',
+    LATENCY_BUCKETS, ('view',)
+)
+DB_DURATION = Histogram(
+    'http_db_duration_seconds', 'Tempo gasto em consultas ao banco por requisição',
+    LATENCY_BUCKETS, ('view',)
+)
+DB_QUERIES = Histogram(
+    'http_db_queries', 'Consultas ao banco por requisição',
+    QUERY_BUCKETS, ('view',)
+)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes', 'Tamanho do corpo da resposta (exceto streaming)',
+    SIZE_BUCKETS, ('view',)
+)
+
+REGISTRY = [
+    REQUEST_DURATION, VIEW_DURATION, SERIALIZATION_DURATION, RENDER_DURATION, DB_DURATION, DB_QUERIES,
+    RESPONSE_SIZE,
+]
+
+
+class _SerializationTimer:
+    def __init__(self):
+        self.duration = 0.0
+        self.depth = 0
+
+
+_serialization_timer = ContextVar('serialization_timer', default=None)
+
+
+@contextmanager
+def collect_serialization():
+    """Acumula o tempo dos blocos measure_serialization() executados dentro deste"""
+    timer = _SerializationTimer()
+    token = _serialization_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _serialization_timer.reset(token)
+
+
+@contextmanager
+def measure_serialization():
+    """
+    Soma a duração do bloco ao tempo de serialização da requisição corrente.
+    Blocos aninhados (serializers dentro de serializers) contam uma vez só.
+    """
+    timer = _serialization_timer.get()
+    if timer is None or timer.depth:
+        yield
+        return
+
+    timer.depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.duration += time.perf_counter() - started
+        timer.depth -= 1
+
+
+# Funções que devolvem métricas calculadas na exportação (ex.: estado do pool de conexões)
+COLLECTORS = []
+
+
+def register_collector(collector):
+    if collector not in COLLECTORS:
+        COLLECTORS.append(collector)
+
+
+def render_samples(name, help_text, metric_type, samples, labels=()):
+    """Exporta valores instantâneos (gauge/counter); `samples` é [(valores dos rótulos, valor)]"""
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}']
+    for label_values, value in samples:
+        pairs = ','.join(f'{key}="{_escape(item)}"' for key, item in zip(labels, label_values))
+        lines.append(f'{name}{{{pairs}}} {value}' if pairs else f'{name} {value}')
+    return '\n'.join(lines)
+
+
+def render_metrics():
+    """Métricas do processo atual no formato texto do Prometheus"""
+    parts = [histogram.render() for histogram in REGISTRY]
+    parts += [collector() for collector in COLLECTORS]
+    return '\n'.join(part for part in parts if part) + '\n'
+
+
+def reset_metrics():
+    for histogram in REGISTRY:
+        histogram.clear()
@@ -0,0 +1,155 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+from .db import routers
+
+logger = logging.getLogger('digital_wallet')
+
+
+class _QueryTimer:
+    """execute_wrapper que acumula quantidade e duração das consultas"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class PerformanceMetricsMiddleware:
+    """
+    Mede cada requisição: latência total, tempo na view, serialização
+    (serializers com MeasuredSerializerMixin), renderização, quantidade e
+    tempo de consultas e tamanho da resposta.
+
+    Os valores vão para os histogramas de core.metrics (expostos em
+    /metrics) e para o header Server-Timing da própria resposta.
+    Deve ser o primeiro middleware da lista. Suporta views assíncronas sem
+    forçar a execução da requisição em uma thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        timer = _QueryTimer()
+        request._metrics_marks = {}
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            self._install_timer(stack, timer)
+            serialization = stack.enter_context(metrics.collect_serialization())
+            response = self.get_response(request)
+        return self._record(request, response, timer, serialization, started)
+
+    async def __acall__(self, request):
+        timer = _QueryTimer()
+        request._metrics_marks = {}
+        started = time.perf_counter()
+        # As consultas do ORM assíncrono rodam na thread sensível da requisição,
+        # onde ficam as conexões que precisam receber o wrapper
+        stack = ExitStack()
+        await sync_to_async(self._install_timer)(stack, timer)
+        try:
+            with metrics.collect_serialization() as serialization:
+                response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self._record(request, response, timer, serialization, started)
+
+    def _install_timer(self, stack, timer):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timer))
+
+    def _record(self, request, response, timer, serialization, started):
+        marks = request._metrics_marks
+        finished = time.perf_counter()
+
+        view_started = marks.get('view_started', started)
+        view_finished = marks.get('view_finished', finished)
+        render_finished = marks.get('render_finished', view_finished)
+        total = finished - started
+        view = view_finished - view_started
+        render = render_finished - view_finished
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else 'unmatched'
+        metrics.REQUEST_DURATION.observe(total, view_name, request.method, str(response.status_code))
+        metrics.VIEW_DURATION.observe(view, view_name)
+        metrics.SERIALIZATION_DURATION.observe(serialization.duration, view_name)
+        metrics.RENDER_DURATION.observe(render, view_name)
+        metrics.DB_DURATION.observe(timer.duration, view_name)
+        metrics.DB_QUERIES.observe(timer.count, view_name)
+        if not response.streaming:
+            metrics.RESPONSE_SIZE.observe(len(response.content), view_name)
+
+        response['Server-Timing'] = ', '.join([
+            f'total;dur={total * 1000:.1f}',
+            f'view;dur={view * 1000:.1f}',
+            f'serialize;dur={serialization.duration * 1000:.1f}',
+            f'render;dur={render * 1000:.1f}',
+            f'db;dur={timer.duration * 1000:.1f};desc="{timer.count} queries"',
+        ])
+
+        slow_ms = settings.METRICS_SLOW_REQUEST_MS
+        if slow_ms and total * 1000 >= slow_ms:
+            logger.warning(
+                'Requisição lenta %s %s (%s): %.0f ms, %d consultas em %.0f ms',
+                request.method, request.path, view_name, total * 1000, timer.count,
+                timer.duration * 1000
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_marks['view_started'] = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Respostas do DRF são renderizadas depois deste ponto
+        marks = request._metrics_marks
+        marks['view_finished'] = time.perf_counter()
+        response.add_post_render_callback(
+            lambda rendered: marks.__setitem__('render_finished', time.perf_counter())
+        )
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Disponibiliza a requisição ao ReplicaRouter (core.db.routers), que
+    decide pelo método e pela fixação do usuário se a leitura pode ir a uma réplica.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with routers.request_context(request):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with routers.request_context(request):
+            return await self.get_response(request)
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:20
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("topic", models.CharField(max_length=64, verbose_name="tópico")),
+                (
+                    "aggregate_id",
+                    models.CharField(max_length=64, verbose_name="id do agregado"),
+                ),
+                (
+                    "payload",
+                    models.JSONField(
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        verbose_name="conteúdo",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="criado em"),
+                ),
+            ],
+            options={
+                "verbose_name": "evento do outbox",
+                "verbose_name_plural": "eventos do outbox",
+                "ordering": ["id"],
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+from django.db import models
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.translation import gettext_lazy as _
+
+class IdempotencyKey(models.Model):
+    """Resposta armazenada de uma requisição enviada com o header Idempotency-Key"""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='idempotency_keys',
+        verbose_name=_('usuário')
+    )
+    key = models.CharField(_('chave'), max_length=255)
+    # Impressão digital (sha256) de método, rota e corpo da requisição original
+    request_hash = models.CharField(_('hash da requisição'), max_length=64)
+    status_code = models.PositiveSmallIntegerField(_('status da resposta'), null=True)
+    response_body = models.JSONField(_('corpo da resposta'), null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(_('criado em'), auto_now_add=True)
+    expires_at = models.DateTimeField(_('expira em'), db_index=True)
+    
+    class Meta:
+        verbose_name = _('chave de idempotência')
+        verbose_name_plural = _('chaves de idempotência')
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_unique'),
+        ]
+        
+    def __str__(self):
+        return f"{self.key} ({self.user_id})"
+
+class OutboxEvent(models.Model):
+    """
+    Evento de domínio gravado na mesma transação da movimentação.
+
+    O comando relay_outbox publica os eventos em ordem de id e os remove;
+    consumidores devem descartar ids repetidos (entrega pelo menos uma vez).
+    """
+    topic = models.CharField(_('tópico'), max_length=64)
+    aggregate_id = models.CharField(_('id do agregado'), max_length=64)
+    payload = models.JSONField(_('conteúdo'), encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(_('criado em'), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('evento do outbox')
+        verbose_name_plural = _('eventos do outbox')
+        ordering = ['id']
+        
+    def __str__(self):
+        return f"{self.topic} #{self.pk}"
+    
+    def as_message(self):
+        return {
+            'id': self.pk,
+            'topic': self.topic,
+            'aggregate_id': self.aggregate_id,
+            'created_at': self.created_at,
+            'payload': self.payload,
+        }
@@ -0,0 +1,61 @@
+import json
+import sys
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import OutboxEvent
+
+
+class StdoutSink:
+    """Publica cada evento como uma linha JSON na saída padrão"""
+
+    def __init__(self, stream=None, **options):
+        self.stream = stream or sys.stdout
+
+    def publish(self, messages):
+        self.stream.write(''.join(
+            json.dumps(message, cls=DjangoJSONEncoder) + '\n' for message in messages
+        ))
+        self.stream.flush()
+
+    def close(self):
+        pass
+
+
+class FileSink(StdoutSink):
+    """Acrescenta os eventos em um arquivo NDJSON (OUTBOX_FILE_PATH)"""
+
+    def __init__(self, path=None, **options):
+        super().__init__(open(path or settings.OUTBOX_FILE_PATH, 'a', encoding='utf-8'))
+
+    def close(self):
+        self.stream.close()
+
+
+def get_sink(path=None, **options):
+    """Instancia o destino configurado em OUTBOX_SINK (caminho de importação)"""
+    return import_string(path or settings.OUTBOX_SINK)(**options)
+
+
+def relay_batch(sink, batch_size=1000):
+    """
+    Publica o próximo lote do outbox em ordem de id e o remove.
+
+    A remoção só é confirmada depois que o destino aceitou o lote; uma
+    falha no meio do caminho leva à republicação (pelo menos uma vez).
+    Com SKIP LOCKED, vários relays dividem a fila, mas só um relay
+    preserva a ordem global dos eventos. Retorna a quantidade publicada.
+    """
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .order_by('id')[:batch_size]
+        )
+        if not events:
+            return 0
+        sink.publish([event.as_message() for event in events])
+        OutboxEvent.objects.filter(pk__in=[event.pk for event in events]).delete()
+    return len(events)
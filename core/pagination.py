@@ -0,0 +1,260 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.db import connections
+from django.db.models import BooleanField, F, Func, Q, Value
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class RowComparison(Func):
+    """Comparação de linhas SQL: (a, b) < (x, y)"""
+    template = '%(expressions)s'
+    output_field = BooleanField()
+
+    def __init__(self, fields, values, operator):
+        super().__init__(
+            Func(*map(F, fields), template='(%(expressions)s)'),
+            Func(*map(Value, values), template='(%(expressions)s)'),
+        )
+        self.arg_joiner = f' {operator} '
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginação por cursor opaco sobre (campo de ordenação, id).
+
+    Não executa COUNT(*) nem usa OFFSET: cada página é uma busca por faixa
+    a partir da posição codificada no cursor, com custo constante em
+    qualquer profundidade. Respeita a ordenação aplicada ao queryset
+    (ex.: OrderingFilter) usando o id como critério de desempate.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = 'Cursor inválido.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self._finish_page(list(self._page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Versão para views assíncronas: a página é lida pelo ORM assíncrono"""
+        return self._finish_page([row async for row in self._page_queryset(queryset, request, view)])
+
+    def _page_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.field_name, descending = self._get_ordering(queryset)
+
+        self.cursor = cursor = self.decode_cursor(request)
+        self.reverse = bool(cursor and cursor['reverse'])
+        self.scan_descending = scan_descending = descending != self.reverse
+
+        if scan_descending:
+            ordering = [f'-{self.field_name}', '-id']
+        else:
+            ordering = [self.field_name, 'id']
+
+        branches = self._get_branches(queryset, view)
+        if branches:
+            # Cada ramo percorre o próprio índice até page_size + 1 linhas;
+            # só essas são unidas, ordenadas e cortadas
+            pages = [self._seek(branch, ordering, cursor)[:self.page_size + 1] for branch in branches]
+            queryset = pages[0].union(*pages[1:], all=True).order_by(*ordering)
+        else:
+            queryset = self._seek(queryset, ordering, cursor)
+
+        return queryset[:self.page_size + 1]
+
+    def _get_branches(self, queryset, view):
+        """
+        Ramos de um filtro com OR fornecidos pela view (get_keyset_branches),
+        um por índice, para a página ser montada com UNION ALL: com o OR o
+        banco não percorre nenhum dos índices já na ordem da página. Bancos
+        sem LIMIT nas partes de um UNION (SQLite) usam o queryset inteiro.
+        """
+        get_branches = getattr(view, 'get_keyset_branches', None)
+        if get_branches is None or not connections[queryset.db].features.supports_slicing_ordering_in_compound:
+            return None
+        return get_branches(queryset.model)
+
+    def _seek(self, queryset, ordering, cursor):
+        queryset = queryset.order_by(*ordering)
+        if cursor is not None:
+            queryset = queryset.filter(
+                self._after_position(queryset.model, cursor, self.scan_descending)
+            )
+        return queryset
+
+    def _finish_page(self, results):
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if self.reverse:
+            results.reverse()
+            self.has_next = self.cursor is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._build_link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self._build_link(self.page[0], reverse=True)
+
+    def decode_cursor(self, request):
+        """Retorna a posição codificada no cursor ou None para a primeira página"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            return {
+                'value': payload['v'],
+                'id': int(payload['i']),
+                'reverse': bool(payload.get('r')),
+            }
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, value, pk, reverse):
+        if isinstance(value, datetime):
+            # isoformat completo: a precisão de microssegundos é necessária
+            # para não pular linhas com o mesmo created_at
+            value = value.isoformat()
+        elif value is not None:
+            value = str(value)
+
+        payload = {'v': value, 'i': pk}
+        if reverse:
+            payload['r'] = 1
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(payload, separators=(',', ':')).encode('ascii')
+        )
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded.decode('ascii'))
+
+    def _build_link(self, row, reverse):
+        # Linhas podem ser instâncias ou dicionários de values()
+        if isinstance(row, dict):
+            return self.encode_cursor(row[self.field_name], row['id'], reverse)
+        return self.encode_cursor(getattr(row, self.field_name), row.pk, reverse)
+
+    def _get_ordering(self, queryset):
+        ordering = queryset.query.order_by or queryset.model._meta.ordering or ['-id']
+        first = ordering[0]
+        if not isinstance(first, str):
+            raise NotFound(self.invalid_cursor_message)
+
+        descending = first.startswith('-')
+        field_name = first.lstrip('-')
+        if field_name == 'pk':
+            field_name = 'id'
+        return field_name, descending
+
+    def _after_position(self, model, cursor, descending):
+        try:
+            value = model._meta.get_field(self.field_name).to_python(cursor['value'])
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+
+        if self.field_name == 'id':
+            lookup = 'lt' if descending else 'gt'
+            return Q(**{f'id__{lookup}': cursor['id']})
+
+        # (campo, id) < (valor, id): um único intervalo no índice composto
+        return RowComparison(
+            [self.field_name, 'id'], [value, cursor['id']], '<' if descending else '>'
+        )
+
+
+class CursorOrPageNumberPagination(BasePagination):
+    """
+    Usa paginação por cursor quando o parâmetro `cursor` está presente
+    (vazio para a primeira página) e paginação numérica caso contrário,
+    preservando o contrato atual dos clientes.
+    """
+    keyset_class = KeysetPagination
+    page_number_class = PageNumberPagination
+
+    def __init__(self):
+        self.keyset = self.keyset_class()
+        self.page_number = self.page_number_class()
+        self.delegate = self.page_number
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.keyset.cursor_query_param in request.query_params:
+            self.delegate = self.keyset
+        else:
+            self.delegate = self.page_number
+        return self.delegate.paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Versão para views assíncronas. No modo numérico, o COUNT é feito pelo
+        ORM assíncrono e entregue ao Paginator já calculado, e a página é
+        lida da mesma forma; o restante segue a PageNumberPagination.
+        """
+        if self.keyset.cursor_query_param in request.query_params:
+            self.delegate = self.keyset
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+
+        self.delegate = pagination = self.page_number
+        pagination.request = request
+        page_size = pagination.get_page_size(request)
+        paginator = pagination.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = pagination.get_page_number(request, paginator)
+        try:
+            page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(pagination.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            ))
+        page.object_list = [row async for row in page.object_list]
+        pagination.page = page
+        return page.object_list
+
+    def get_paginated_response(self, data):
+        return self.delegate.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number.get_paginated_response_schema(schema)
+
+    def get_schema_fields(self, view):
+        return self.page_number.get_schema_fields(view) + self.keyset.get_schema_fields(view)
+
+    def get_schema_operation_parameters(self, view):
+        return self.page_number.get_schema_operation_parameters(view)
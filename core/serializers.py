@@ -0,0 +1,12 @@
+from .metrics import measure_serialization
+
+
+class MeasuredSerializerMixin:
+    """
+    Conta o to_representation do serializer no tempo de serialização da
+    requisição (histograma e Server-Timing do PerformanceMetricsMiddleware).
+    """
+
+    def to_representation(self, instance):
+        with measure_serialization():
+            return super().to_representation(instance)
@@ -0,0 +1,558 @@
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, OperationalError
+from django.db.utils import load_backend
+from django.test import LiveServerTestCase, SimpleTestCase, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from django.contrib.auth import get_user_model
+from transactions.models import Transaction
+from transactions.serializers import TransactionSerializer
+from wallets.models import Wallet
+from .idempotency import get_stats
+from django.utils import timezone
+from transactions import ledger, services
+from .db import routers
+from .db.backends.postgresql_pool.pool import ConnectionPool, PoolTimeout
+from .metrics import collect_serialization, render_metrics, reset_metrics
+from .throttling import LocalBuckets, RedisBuckets, get_bucket_store, local_buckets
+from .models import IdempotencyKey, OutboxEvent
+
+User = get_user_model()
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        self.user1 = User.objects.create_user(
+            username='user1', email='user1@example.com', password='testpassword'
+        )
+        self.user2 = User.objects.create_user(
+            username='user2', email='user2@example.com', password='testpassword'
+        )
+        self.wallet1 = Wallet.objects.create(user=self.user1, balance=Decimal('100.00'))
+        Wallet.objects.create(user=self.user2, balance=Decimal('0.00'))
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+        self.data = {'recipient_email': 'user2@example.com', 'amount': '30.00'}
+
+    def _transfer(self, data, key='chave-1'):
+        return self.client.post(
+            reverse('transactions:transfer'), data, format='json', HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_repeated_key_replays_response(self):
+        first = self._transfer(self.data)
+        second = self._transfer(self.data)
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second.json(), first.json())
+
+        self.wallet1.refresh_from_db()
+        self.assertEqual(self.wallet1.balance, Decimal('70.00'))
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_replay_matches_original_bytes(self):
+        url = reverse('transactions:withdraw')
+        first = self.client.post(url, {'amount': '30.00'}, format='json', HTTP_IDEMPOTENCY_KEY='chave-saque')
+        second = self.client.post(url, {'amount': '30.00'}, format='json', HTTP_IDEMPOTENCY_KEY='chave-saque')
+
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(first.json()['new_balance'], 70.0)
+
+    def test_key_reused_with_different_payload(self):
+        self._transfer(self.data)
+        response = self._transfer({**self.data, 'amount': '10.00'})
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_failed_request_is_not_stored(self):
+        response = self._transfer({**self.data, 'amount': '500.00'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_replay_from_cache_skips_database(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._transfer(self.data, key='chave-cache')
+        hits = get_stats()['cache_hits']
+
+        with self.assertNumQueries(0):
+            response = self._transfer(self.data, key='chave-cache')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(get_stats()['cache_hits'], hits + 1)
+
+
+class _Deadlock(Exception):
+    pgcode = '40P01'
+
+
+class IdempotencyRetryTests(TransactionTestCase):
+    def setUp(self):
+        self.user1 = User.objects.create_user(
+            username='user1', email='user1@example.com', password='testpassword'
+        )
+        self.user2 = User.objects.create_user(
+            username='user2', email='user2@example.com', password='testpassword'
+        )
+        self.wallet1 = Wallet.objects.create(user=self.user1, balance=Decimal('100.00'))
+        Wallet.objects.create(user=self.user2, balance=Decimal('0.00'))
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+
+    def test_deadlock_repeats_reservation_and_view(self):
+        transfer = services._transfer
+        calls = []
+
+        def deadlock_once(*args):
+            calls.append(args)
+            if len(calls) == 1:
+                exc = OperationalError('deadlock detected')
+                exc.__cause__ = _Deadlock()
+                raise exc
+            return transfer(*args)
+
+        retries = services.get_retry_stats()['retries']
+        with mock.patch('transactions.services._transfer', side_effect=deadlock_once):
+            response = self.client.post(
+                reverse('transactions:transfer'),
+                {'recipient_email': 'user2@example.com', 'amount': '30.00'},
+                format='json', HTTP_IDEMPOTENCY_KEY='chave-deadlock'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(services.get_retry_stats()['retries'], retries + 1)
+        self.wallet1.refresh_from_db()
+        self.assertEqual(self.wallet1.balance, Decimal('70.00'))
+        self.assertEqual(IdempotencyKey.objects.get().status_code, status.HTTP_201_CREATED)
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.user1 = User.objects.create_user(
+            username='user1', email='user1@example.com', password='testpassword'
+        )
+        self.user2 = User.objects.create_user(
+            username='user2', email='user2@example.com', password='testpassword'
+        )
+        Wallet.objects.create(user=self.user1, balance=Decimal('100.00'))
+
+    def test_movements_write_outbox_events(self):
+        transaction_obj = services.transfer(self.user1, self.user2, Decimal('30.00'))
+        services.withdraw(self.user1, Decimal('10.00'))
+
+        events = list(OutboxEvent.objects.values_list('topic', 'payload'))
+        self.assertEqual([topic for topic, payload in events], [
+            'transaction.completed', 'wallet.balance_changed', 'wallet.balance_changed',
+            'transaction.completed', 'wallet.balance_changed',
+        ])
+        self.assertEqual(events[0][1]['id'], transaction_obj.pk)
+        self.assertEqual(events[1][1]['delta'], '-30.00')
+        self.assertEqual(events[2][1]['user_id'], self.user2.pk)
+
+    def test_relay_publishes_to_file_and_clears_outbox(self):
+        services.transfer(self.user1, self.user2, Decimal('30.00'))
+        services.deposit(self.user2, Decimal('5.00'))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'outbox.ndjson')
+            with override_settings(OUTBOX_FILE_PATH=path):
+                call_command(
+                    'relay_outbox', sink='core.outbox.FileSink', batch_size=2, once=True,
+                    stderr=StringIO()
+                )
+            with open(path, encoding='utf-8') as output:
+                messages = [json.loads(line) for line in output]
+
+        self.assertEqual(len(messages), 5)
+        self.assertEqual([message['id'] for message in messages],
+                         sorted(message['id'] for message in messages))
+        self.assertFalse(OutboxEvent.objects.exists())
+
+
+THROTTLED = {
+    **settings.REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {'money_user': '3/min', 'money_wallet': '3/min'},
+}
+
+
+class BenchPaymentsTests(TransactionTestCase):
+    def test_report_checks_balance_conservation(self):
+        stdout = StringIO()
+        call_command(
+            'bench_payments', workers=1, requests=20, users=3, pattern='hot', hot_shards=2,
+            stdout=stdout, stderr=StringIO()
+        )
+
+        report = json.loads(stdout.getvalue())
+        self.assertEqual(report['requests'], 20)
+        self.assertTrue(report['conservation']['ok'])
+        self.assertLessEqual(report['latency_ms']['p50'], report['latency_ms']['p99'])
+        self.assertEqual(Wallet.objects.get(user__email='bench-0@bench.local').shard_count, 2)
+
+    @override_settings(REST_FRAMEWORK=THROTTLED)
+    def test_throttles_are_off_unless_kept(self):
+        local_buckets.clear()
+        self.addCleanup(local_buckets.clear)
+        options = {'workers': 1, 'requests': 10, 'users': 3, 'pattern': 'hot', 'mix': 'transfer:100'}
+
+        stdout = StringIO()
+        call_command('bench_payments', **options, stdout=stdout, stderr=StringIO())
+        report = json.loads(stdout.getvalue())
+        self.assertEqual(report['throttled'], 0)
+        self.assertEqual(report['status_codes'], {'201': 10})
+
+        stdout = StringIO()
+        call_command('bench_payments', **options, keep_throttles=True, stdout=stdout, stderr=StringIO())
+        report = json.loads(stdout.getvalue())
+        self.assertEqual(report['requests'], 10)
+        self.assertEqual(report['throttled'], report['status_codes']['429'])
+        self.assertGreater(report['throttled'], 0)
+        self.assertTrue(report['conservation']['ok'])
+
+
+class SeedDbTests(TestCase):
+    def test_generated_balances_match_history(self):
+        call_command('seed_db', users=30, transactions=500, merchants=3, batch_size=100, stdout=StringIO())
+
+        self.assertEqual(User.objects.filter(email__endswith='@seed.local').count(), 30)
+        self.assertTrue(User.objects.filter(email='joao@example.com').exists())
+        self.assertGreaterEqual(Transaction.objects.count(), 450)
+        for wallet in Wallet.objects.all():
+            self.assertGreaterEqual(wallet.balance, 0)
+            self.assertEqual(wallet.balance, ledger.balance_at(wallet.pk, timezone.now()))
+
+        # Uma segunda execução não duplica os dados sem --append
+        stdout = StringIO()
+        call_command('seed_db', users=30, transactions=500, stdout=stdout)
+        self.assertIn('--append', stdout.getvalue())
+        self.assertEqual(User.objects.filter(email__endswith='@seed.local').count(), 30)
+
+
+class PerformanceMetricsTests(TestCase):
+    def setUp(self):
+        reset_metrics()
+        self.user = User.objects.create_user(
+            username='user1', email='user1@example.com', password='testpassword'
+        )
+        Wallet.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('wallets:wallet-detail'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        parts = [part.split(';')[0] for part in response['Server-Timing'].split(', ')]
+        self.assertEqual(parts, ['total', 'view', 'serialize', 'render', 'db'])
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+
+    def test_metrics_endpoint_exposes_histograms(self):
+        self.client.get(reverse('wallets:wallet-detail'))
+
+        response = self.client.get(reverse('metrics'))
+
+        body = response.content.decode()
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn(
+            'http_request_duration_seconds_count{view="wallets:wallet-detail",method="GET",status="200"} 1',
+            body
+        )
+        self.assertIn('http_db_queries_bucket{view="wallets:wallet-detail",le="1"} 1', body)
+        self.assertIn('http_serialization_duration_seconds_count{view="wallets:wallet-detail"} 1', body)
+
+    def test_nested_serializers_are_measured_once(self):
+        transaction_obj = services.deposit(self.user, Decimal('5.00'))[1]
+
+        with collect_serialization() as timer, \
+                mock.patch('core.metrics.time.perf_counter', side_effect=[10.0, 10.25]):
+            TransactionSerializer(transaction_obj).data
+
+        # Remetente e destinatário (serializers aninhados) não são somados de novo
+        self.assertEqual(timer.duration, 0.25)
+
+    @override_settings(METRICS_TOKEN='segredo')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer segredo')
+        self.assertEqual(response.status_code, 200)
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        reset_metrics()
+        self.user = User.objects.create_user(
+            username='user1', email='user1@example.com', password='testpassword',
+            first_name='Usuário'
+        )
+        Wallet.objects.create(user=self.user)
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+
+    async def test_profile_under_asgi_handler(self):
+        response = await self.async_client.get(
+            reverse('users:profile-async'), headers={'Authorization': f'Bearer {self.token}'}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['email'], 'user1@example.com')
+        self.assertEqual(response.json()['first_name'], 'Usuário')
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+
+    def test_profile_matches_sync_profile(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+        response = client.get(reverse('users:profile-async'))
+        self.assertEqual(response.json(), client.get(reverse('users:profile')).json())
+
+    def test_invalid_token_and_method(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Bearer invalido')
+        response = client.get(reverse('users:profile-async'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.json(), client.get(reverse('users:profile')).json())
+
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        response = client.post(reverse('users:profile-async'))
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+        self.assertEqual(response['Allow'], 'GET')
+
+
+class BenchHttpTests(LiveServerTestCase):
+    def test_compares_sync_and_async_targets(self):
+        output = StringIO()
+        call_command(
+            'bench_http', '--target', f'wsgi={self.live_server_url}',
+            '--async-target', f'asgi={self.live_server_url}', '--concurrency', '1',
+            '--requests', '3', '--warmup', '0', stdout=output, stderr=StringIO()
+        )
+
+        report = json.loads(output.getvalue())
+        self.assertEqual(report['targets']['wsgi']['requests'], 3)
+        self.assertEqual(report['targets']['asgi']['endpoints']['wallet']['path'], '/api/wallets/async/')
+        self.assertEqual(
+            report['targets']['asgi']['status_codes'],
+            {'profile:200': 1, 'transactions:200': 1, 'wallet:200': 1}
+        )
+
+
+class FakeConnection:
+    """Conexão psycopg2 simulada para os testes do pool"""
+
+    def __init__(self):
+        self.closed = 0
+        self.status = TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def test_connections_are_reused(self):
+        pool = ConnectionPool(max_size=2)
+        first = pool.getconn(FakeConnection)
+        pool.putconn(first)
+
+        self.assertIs(pool.getconn(FakeConnection), first)
+        self.assertEqual(pool.stats()['connects'], 1)
+        self.assertEqual(pool.stats()['checkouts'], 2)
+
+    def test_open_transaction_is_rolled_back_on_return(self):
+        pool = ConnectionPool(max_size=1)
+        connection = pool.getconn(FakeConnection)
+        connection.status = 2
+
+        pool.putconn(connection)
+        self.assertEqual(connection.rollbacks, 1)
+        self.assertEqual(pool.stats()['idle'], 1)
+
+    def test_checkout_times_out_when_exhausted(self):
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        pool.getconn(FakeConnection)
+
+        with self.assertRaises(PoolTimeout):
+            pool.getconn(FakeConnection)
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+    def test_broken_and_expired_connections_are_replaced(self):
+        pool = ConnectionPool(max_size=1, max_lifetime=3600)
+        connection = pool.getconn(FakeConnection)
+        pool.putconn(connection)
+        connection.closed = 2
+
+        replacement = pool.getconn(FakeConnection)
+        self.assertIsNot(replacement, connection)
+        pool.putconn(replacement)
+
+        pool.max_lifetime = 0
+        self.assertIsNot(pool.getconn(FakeConnection), replacement)
+        self.assertEqual(pool.stats()['discarded'], 2)
+        self.assertEqual(pool.stats()['in_use'], 1)
+
+    def test_pool_metrics_are_exported(self):
+        load_backend('core.db.backends.postgresql_pool')
+        self.assertIn('# TYPE db_pool_connections gauge', render_metrics())
+
+
+@override_settings(
+    DATABASE_REPLICAS=['replica_0', 'replica_1'],
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    DB_REPLICA_LAG_CHECK_INTERVAL=60
+)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        routers.reset_replica_health()
+        self.router = routers.ReplicaRouter()
+        self.factory = RequestFactory()
+        self.user = User(pk=7, email='user7@example.com')
+
+    def route(self, request):
+        with routers.request_context(request):
+            return self.router.db_for_read(Wallet)
+
+    @mock.patch.object(routers, '_replica_lag', return_value=0.0)
+    def test_safe_reads_rotate_between_replicas(self, lag):
+        request = self.factory.get('/api/wallets/')
+
+        self.assertEqual({self.route(request) for _ in range(4)}, {'replica_0', 'replica_1'})
+        self.assertEqual(self.router.db_for_read(Wallet), 'default')
+        self.assertEqual(self.route(self.factory.post('/api/transactions/transfer/')), 'default')
+        self.assertEqual(self.router.db_for_write(Wallet), 'default')
+
+    @mock.patch.object(routers, '_replica_lag', return_value=0.0)
+    def test_user_is_pinned_after_balance_change(self, lag):
+        with mock.patch.object(routers.transaction, 'on_commit', side_effect=lambda func: func()):
+            routers.pin_to_primary([self.user.pk])
+
+        request = self.factory.get('/api/wallets/')
+        self.assertIn(self.route(request), ['replica_0', 'replica_1'])
+        request.user = self.user
+        self.assertEqual(self.route(request), 'default')
+
+        other = self.factory.get('/api/wallets/')
+        other.user = User(pk=8)
+        self.assertIn(self.route(other), ['replica_0', 'replica_1'])
+
+    def test_lagging_or_unreachable_replicas_fall_back(self):
+        def lag(alias):
+            if alias == 'replica_0':
+                raise DatabaseError('conexão recusada')
+            return 30.0
+
+        with mock.patch.object(routers, '_replica_lag', side_effect=lag) as check, \
+                self.assertLogs('digital_wallet', 'WARNING'):
+            self.assertEqual(self.route(self.factory.get('/api/wallets/')), 'default')
+            self.assertEqual(self.route(self.factory.get('/api/wallets/')), 'default')
+        # Resultado reaproveitado até a próxima verificação
+        self.assertEqual(check.call_count, 2)
+
+
+@override_settings(REST_FRAMEWORK=THROTTLED)
+class TokenBucketThrottleTests(TestCase):
+    def setUp(self):
+        local_buckets.clear()
+        self.addCleanup(local_buckets.clear)
+        self.user1 = User.objects.create_user(username='user1', email='user1@example.com', password='testpassword')
+        self.user2 = User.objects.create_user(username='user2', email='user2@example.com', password='testpassword')
+        self.user3 = User.objects.create_user(username='user3', email='user3@example.com', password='testpassword')
+        for user in [self.user1, self.user2, self.user3]:
+            Wallet.objects.create(user=user, balance=Decimal('1000.00'))
+        self.client = APIClient()
+
+    def _transfer(self, sender, recipient_email):
+        self.client.force_authenticate(user=sender)
+        return self.client.post(
+            reverse('transactions:transfer'), {'recipient_email': recipient_email, 'amount': '1.00'}
+        )
+
+    def test_user_bucket_sheds_before_locking(self):
+        self.client.force_authenticate(user=self.user1)
+        for _ in range(3):
+            response = self.client.post(reverse('transactions:withdraw'), {'amount': '1.00'})
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        with mock.patch('transactions.services.withdraw') as withdraw:
+            response = self.client.post(reverse('transactions:withdraw'), {'amount': '1.00'})
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '20')
+        withdraw.assert_not_called()
+
+    def test_wallet_bucket_limits_recipient(self):
+        self.assertEqual(self._transfer(self.user1, 'user3@example.com').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._transfer(self.user2, 'user3@example.com').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._transfer(self.user2, 'user3@example.com').status_code, status.HTTP_201_CREATED)
+
+        # Cada remetente ainda tem fichas, mas a carteira de user3 não
+        self.assertEqual(self._transfer(self.user1, 'user3@example.com').status_code, 429)
+        self.assertEqual(self._transfer(self.user1, 'user2@example.com').status_code, status.HTTP_201_CREATED)
+        # Os créditos recebidos não consumiram as saídas de user3
+        self.assertEqual(self._transfer(self.user3, 'user1@example.com').status_code, status.HTTP_201_CREATED)
+
+    def test_sharded_recipient_is_not_limited(self):
+        services.configure_shards(self.user3, 4)
+
+        for sender in [self.user1, self.user2, self.user2, self.user1]:
+            self.assertEqual(self._transfer(sender, 'user3@example.com').status_code, status.HTTP_201_CREATED)
+
+    def test_rejected_check_consumes_nothing(self):
+        buckets = LocalBuckets()
+        self.assertEqual(buckets.consume(['a'], 1, 1.0), (True, 0.0))
+
+        allowed, wait = buckets.consume(['a', 'b'], 1, 1.0)
+        self.assertFalse(allowed)
+        self.assertGreater(wait, 0)
+        # 'b' não perdeu a ficha com a recusa causada por 'a'
+        self.assertTrue(buckets.consume(['b'], 1, 0.001)[0])
+
+    def test_store_unavailable_allows_request(self):
+        with mock.patch.object(local_buckets, 'consume', side_effect=ConnectionError), \
+                self.assertLogs('digital_wallet', level='WARNING'):
+            response = self._transfer(self.user1, 'user2@example.com')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_redis_store_uses_one_script_call(self):
+        script = mock.Mock(return_value=[0, b'1.5'])
+        client = mock.Mock()
+        client.register_script.return_value = script
+        backend = mock.Mock()
+        backend._cache.get_client.return_value = client
+        backend.make_and_validate_key.side_effect = lambda key: f':1:{key}'
+
+        store = get_bucket_store(backend)
+        self.assertIsInstance(store, RedisBuckets)
+        self.assertEqual(store.consume(['throttle:money_user:1', 'throttle:money_wallet:1'], 3, 0.05), (False, 1.5))
+        store.consume(['throttle:money_user:1'], 3, 0.05)
+
+        client.register_script.assert_called_once()
+        self.assertEqual(script.call_args_list[0], mock.call(
+            keys=[':1:throttle:money_user:1', ':1:throttle:money_wallet:1'], args=[3, 0.05, 1]
+        ))
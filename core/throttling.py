@@ -0,0 +1,221 @@
+"""
+Throttles de balde de fichas (token bucket) para os endpoints que movimentam
+saldo.
+
+Cada escopo de DEFAULT_THROTTLE_RATES ('N/período') vira um balde com
+capacidade N, reabastecido continuamente a N/período fichas por segundo:
+rajadas curtas passam, o ritmo sustentado fica limitado. A verificação
+acontece em initial(), antes da view, e portanto antes de qualquer
+select_for_update; a recusa é um 429 com Retry-After.
+
+Com o cache em Redis, cada verificação é um único script Lua (atômico e
+compartilhado entre processos, com o relógio do próprio Redis). Com os
+demais backends (locmem, por exemplo) os baldes ficam na memória do
+processo, protegidos por um lock.
+"""
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from .identity_map import get_identity_map
+
+logger = logging.getLogger('digital_wallet')
+
+# Consome `requested` fichas de todos os baldes em KEYS ou de nenhum.
+# ARGV: capacidade, fichas por segundo, fichas pedidas. Retorna {1, 0} ou
+# {0, espera em segundos}; a espera vai como string (Lua trunca números)
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local ttl = math.ceil(capacity / rate * 1000)
+
+local levels = {}
+local wait = 0
+for index, key in ipairs(KEYS) do
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    levels[index] = tokens
+    if tokens < requested then
+        wait = math.max(wait, (requested - tokens) / rate)
+    end
+end
+if wait > 0 then
+    return {0, tostring(wait)}
+end
+
+for index, key in ipairs(KEYS) do
+    redis.call('HSET', key, 'tokens', levels[index] - requested, 'ts', now)
+    redis.call('PEXPIRE', key, ttl)
+end
+return {1, '0'}
+"""
+
+
+class LocalBuckets:
+    """Baldes na memória do processo (backends sem scripts atômicos)"""
+
+    MAX_BUCKETS = 10000
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, keys, capacity, rate, requested=1):
+        now = time.monotonic()
+        with self._lock:
+            levels = {}
+            wait = 0.0
+            for key in keys:
+                tokens, ts = self._buckets.get(key, (capacity, now))
+                tokens = min(capacity, tokens + (now - ts) * rate)
+                levels[key] = tokens
+                if tokens < requested:
+                    wait = max(wait, (requested - tokens) / rate)
+            if wait > 0:
+                return False, wait
+
+            for key, tokens in levels.items():
+                self._buckets[key] = (tokens - requested, now)
+            if len(self._buckets) > self.MAX_BUCKETS:
+                self._evict_full(now, rate, capacity)
+            return True, 0.0
+
+    def _evict_full(self, now, rate, capacity):
+        # Um balde que já teria se reabastecido equivale a um balde ausente
+        self._buckets = {
+            key: (tokens, ts) for key, (tokens, ts) in self._buckets.items()
+            if tokens + (now - ts) * rate < capacity
+        }
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class RedisBuckets:
+    """Baldes no Redis do cache, atualizados por um script Lua por verificação"""
+
+    def __init__(self, cache_backend):
+        self.cache = cache_backend
+        self._scripts = {}
+
+    def _script(self):
+        client = _redis_client(self.cache)
+        script = self._scripts.get(id(client))
+        if script is None:
+            # register_script usa EVALSHA e recarrega o script após NOSCRIPT
+            script = self._scripts[id(client)] = client.register_script(TOKEN_BUCKET_LUA)
+        return script
+
+    def consume(self, keys, capacity, rate, requested=1):
+        keys = [self.cache.make_and_validate_key(key) for key in keys]
+        allowed, wait = self._script()(keys=keys, args=[capacity, rate, requested])
+        return bool(allowed), float(wait)
+
+
+def _redis_client(cache_backend):
+    """Cliente redis-py de um RedisCache do Django ou do django-redis; None nos demais"""
+    if hasattr(cache_backend, '_cache') and hasattr(cache_backend._cache, 'get_client'):
+        return cache_backend._cache.get_client(write=True)
+    client = getattr(cache_backend, 'client', None)
+    if client is not None and hasattr(client, 'get_client'):
+        return client.get_client(write=True)
+    return None
+
+
+local_buckets = LocalBuckets()
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_bucket_store(cache_backend=None):
+    cache_backend = cache_backend or cache
+    with _stores_lock:
+        store = _stores.get(id(cache_backend))
+        if store is None:
+            if _redis_client(cache_backend) is not None:
+                store = RedisBuckets(cache_backend)
+            else:
+                store = local_buckets
+            _stores[id(cache_backend)] = store
+        return store
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Base dos throttles de balde. As subclasses definem `scope` e
+    get_bucket_keys(request, view); uma lista vazia não limita a requisição.
+    """
+
+    def get_rate(self):
+        # Lido a cada requisição (SimpleRateThrottle fixa a taxa na importação)
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_bucket_keys(self, request, view):
+        raise NotImplementedError('.get_bucket_keys() must be overridden')
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        if self.rate is None or not request.user.is_authenticated:
+            return True
+
+        keys = [f'throttle:{self.scope}:{ident}' for ident in self.get_bucket_keys(request, view)]
+        if not keys:
+            return True
+
+        try:
+            allowed, wait = get_bucket_store().consume(
+                keys, self.num_requests, self.num_requests / self.duration
+            )
+        except Exception:
+            # Indisponibilidade do cache não bloqueia movimentações
+            logger.warning('Falha ao consultar o throttle %s; requisição liberada', self.scope, exc_info=True)
+            return True
+
+        if not allowed:
+            self.wait_seconds = wait
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class UserMoneyThrottle(TokenBucketThrottle):
+    """Um balde por usuário, compartilhado por todos os endpoints de movimentação"""
+    scope = 'money_user'
+
+    def get_bucket_keys(self, request, view):
+        return [request.user.pk]
+
+
+class WalletMoneyThrottle(TokenBucketThrottle):
+    """
+    Um balde por carteira bloqueada pela operação: a do usuário e, em
+    transferências, a do destinatário. Créditos recebidos usam um balde
+    próprio da carteira ('in:<id>'), para que transferências de terceiros
+    não esgotem as saídas do destinatário. Carteiras fragmentadas recebem
+    sem bloqueio e não entram no limite; o destinatário fica no mapa de
+    identidade para o serializer.
+    """
+    scope = 'money_wallet'
+
+    def get_bucket_keys(self, request, view):
+        idents = [request.user.pk]
+        recipient_email = request.data.get('recipient_email') if hasattr(request.data, 'get') else None
+        if isinstance(recipient_email, str):
+            identity_map = get_identity_map(request)
+            recipient = identity_map.get_user_by_email(recipient_email)
+            if recipient is not None and recipient.pk != request.user.pk:
+                wallet = identity_map.get_wallet(recipient)
+                if wallet is not None and not wallet.shard_count:
+                    idents.append(f'in:{recipient.pk}')
+        return idents
@@ -0,0 +1,17 @@
+def percentile(ordered, fraction):
+    """Percentil pelo método do posto mais próximo sobre uma lista ordenada"""
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def latency_summary(ordered):
+    """Média, p50/p95/p99 e máximo (ms) de latências já ordenadas"""
+    return {
+        'mean': round(sum(ordered) / len(ordered), 2) if ordered else 0,
+        'p50': round(percentile(ordered, 0.50), 2),
+        'p95': round(percentile(ordered, 0.95), 2),
+        'p99': round(percentile(ordered, 0.99), 2),
+        'max': round(ordered[-1], 2) if ordered else 0,
+    }
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .idempotency import get_stats
+from .metrics import render_metrics
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def idempotency_stats(request):
+    """Endpoint com os contadores de acerto/erro do cache de idempotência"""
+    return Response(get_stats())
+
+def metrics(request):
+    """
+    Endpoint com os histogramas de desempenho no formato do Prometheus.
+
+    Com METRICS_TOKEN definido, exige o header `Authorization: Bearer <token>`.
+    Os valores são do processo que atendeu a requisição.
+    """
+    token = settings.METRICS_TOKEN
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,46 @@
+"""
+Configuração do gunicorn para produção:
+
+    gunicorn -c python:digital_wallet.gunicorn_conf digital_wallet.wsgi:application
+
+Workers com threads (gthread), cada processo com seu pool de conexões
+(core.db.backends.postgresql_pool). Cada thread usa no máximo uma conexão,
+então DB_POOL_MAX_SIZE deve ser pelo menos GUNICORN_THREADS; o total no
+PostgreSQL fica em workers x DB_POOL_MAX_SIZE.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+# Recicla workers periodicamente; o jitter evita que reiniciem todos juntos
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
+accesslog = '-'
+errorlog = '-'
+
+# Conexões abertas no processo mestre seriam herdadas pelos workers
+preload_app = False
+
+# Conexões abertas por worker na inicialização, antes da primeira requisição
+POOL_PREWARM = int(os.environ.get('DB_POOL_PREWARM', threads))
+
+
+def post_worker_init(worker):
+    from django.db import connections
+    from core.db.backends.postgresql_pool.base import DatabaseWrapper
+
+    for alias in connections:
+        if isinstance(connections[alias], DatabaseWrapper):
+            connections[alias].prewarm_pool(POOL_PREWARM)
+
+
+def worker_exit(server, worker):
+    from core.db.backends.postgresql_pool.base import close_pools
+
+    close_pools()
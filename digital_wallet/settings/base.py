@@ -40,6 +40,8 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'core.middlewares.PerformanceMetricsMiddleware',
+    'core.middlewares.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -78,11 +80,59 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD', 'postgres'),
         'HOST': os.environ.get('DB_HOST', 'localhost'),
         'PORT': os.environ.get('DB_PORT', '5432'),
+        # Com DB_ENGINE=core.db.backends.postgresql_pool as conexões fechadas ao fim
+        # de cada requisição voltam a um pool por processo em vez de serem encerradas
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        'POOL': {
+            'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 5)),
+            'MAX_LIFETIME': float(os.environ.get('DB_POOL_MAX_LIFETIME', 3600)),
+            'HEALTH_CHECK_AFTER': float(os.environ.get('DB_POOL_HEALTH_CHECK_AFTER', 30)),
+        },
     }
 }
 
+# Réplicas de leitura: DB_REPLICA_HOSTS=host1,host2:5433 (mesmas credenciais do primário)
+DATABASE_REPLICAS = []
+for index, replica in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(','))):
+    host, _, port = replica.strip().partition(':')
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+
+# Após movimentar saldo, o usuário lê do primário por este tempo (segundos)
+DB_REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', 10))
+# Réplicas com atraso maior saem do rodízio; o atraso é medido a cada intervalo
+DB_REPLICA_MAX_LAG_SECONDS = float(os.environ.get('DB_REPLICA_MAX_LAG_SECONDS', 2))
+DB_REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get('DB_REPLICA_LAG_CHECK_INTERVAL', 5))
+
+# Cache local por padrão; em produção com vários processos use um backend
+# compartilhado, ex.: CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# e CACHE_LOCATION=redis://redis:6379/1
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'digital-wallet'),
+    }
+}
+
+# Validade (segundos) da carteira em cache; a invalidação ocorre a cada movimentação
+WALLET_CACHE_TIMEOUT = int(os.environ.get('WALLET_CACHE_TIMEOUT', 300))
+
 AUTH_USER_MODEL = 'users.User'
 
+# Cache do usuário autenticado (users.authentication.CachedJWTAuthentication):
+# LRU por processo mais o cache compartilhado, invalidados a cada alteração e
+# válidos por AUTH_USER_CACHE_TIMEOUT; com cache locmem o LRU não é usado
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get('AUTH_USER_CACHE_TIMEOUT', 300))
+AUTH_USER_LRU_SIZE = int(os.environ.get('AUTH_USER_LRU_SIZE', 10000))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -110,7 +160,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -121,14 +171,61 @@ REST_FRAMEWORK = {
     'EXCEPTION_HANDLER': 'core.utils.exception_handlers.custom_exception_handler',
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # Baldes de fichas dos endpoints de movimentação (core.throttling): 'N/período'
+    # permite rajadas de N e N por período sustentado; vazio desativa o escopo
+    'DEFAULT_THROTTLE_RATES': {
+        'money_user': os.environ.get('THROTTLE_MONEY_USER_RATE', '60/min') or None,
+        'money_wallet': os.environ.get('THROTTLE_MONEY_WALLET_RATE', '120/min') or None,
+    },
 }
 
+# Limite de itens por requisição em POST /api/transactions/transfer/batch/
+TRANSFER_BATCH_MAX_ITEMS = int(os.environ.get('TRANSFER_BATCH_MAX_ITEMS', 10000))
+
+# Tempo (segundos) durante o qual uma Idempotency-Key devolve a resposta gravada
+IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+
+# Atraso (segundos) do ponto de corte dos snapshots do livro-razão; deve cobrir
+# a diferença de relógio entre os servidores (lançamentos ainda não confirmados
+# são aguardados pelo bloqueio das carteiras na compactação)
+LEDGER_SNAPSHOT_LAG = int(os.environ.get('LEDGER_SNAPSHOT_LAG', 300))
+
+# Linhas lidas por vez do cursor no servidor em GET /api/transactions/export/
+TRANSACTION_EXPORT_CHUNK_SIZE = int(os.environ.get('TRANSACTION_EXPORT_CHUNK_SIZE', 2000))
+
+# Partições mensais de transactions_transaction (PostgreSQL, comando
+# maintain_transaction_partitions): meses futuros pré-criados e meses mantidos
+# anexados além do atual (0: nunca desanexa)
+TRANSACTION_PARTITION_MONTHS_AHEAD = int(os.environ.get('TRANSACTION_PARTITION_MONTHS_AHEAD', 3))
+TRANSACTION_PARTITION_RETENTION_MONTHS = int(os.environ.get('TRANSACTION_PARTITION_RETENTION_MONTHS', 0))
+
+# Idade (dias) a partir da qual archive_transactions move transações para o
+# arquivo frio; leituras com período anterior a esse limite incluem o arquivo.
+# Aumentar o valor depois de arquivar esconderia transações já arquivadas
+# (0: arquivo desativado)
+TRANSACTION_ARCHIVE_AFTER_DAYS = int(os.environ.get('TRANSACTION_ARCHIVE_AFTER_DAYS', 365))
+
+# Transferências e saques apenas enfileirados (202 Accepted) e concluídos pelo
+# comando process_pending_transactions. Também ativável por requisição com o
+# header `Prefer: respond-async`
+TRANSACTIONS_ASYNC = os.environ.get('TRANSACTIONS_ASYNC', 'False') == 'True'
+
+# Token exigido em GET /metrics (vazio: acesso livre) e limite (ms) a partir do
+# qual uma requisição é registrada no log como lenta (0 desativa)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_SLOW_REQUEST_MS = int(os.environ.get('METRICS_SLOW_REQUEST_MS', 1000))
+
+# Destino dos eventos publicados pelo comando relay_outbox
+OUTBOX_SINK = os.environ.get('OUTBOX_SINK', 'core.outbox.StdoutSink')
+OUTBOX_FILE_PATH = os.environ.get('OUTBOX_FILE_PATH', os.path.join(BASE_DIR, 'outbox.ndjson'))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=int(os.environ.get('JWT_ACCESS_TOKEN_LIFETIME_MINUTES', 60))),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=int(os.environ.get('JWT_REFRESH_TOKEN_LIFETIME_DAYS', 7))),
     'ROTATE_REFRESH_TOKENS': False,
     'BLACKLIST_AFTER_ROTATION': False,
-    'UPDATE_LAST_LOGIN': True,
+    # last_login é gravado em lote pelo LoginView (users.login)
+    'UPDATE_LAST_LOGIN': False,
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': os.environ.get('JWT_SECRET_KEY', SECRET_KEY),
     'VERIFYING_KEY': None,
@@ -138,6 +235,16 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
 }
 
+# Login: verificação de senha em pool limitado de threads (users.login)
+LOGIN_HASH_WORKERS = int(os.environ.get('LOGIN_HASH_WORKERS') or os.cpu_count() or 1)
+# Verificações admitidas ao mesmo tempo (executando ou na fila); acima disso, 503
+LOGIN_MAX_PENDING = int(os.environ.get('LOGIN_MAX_PENDING') or 4 * LOGIN_HASH_WORKERS)
+LOGIN_ADMISSION_TIMEOUT = float(os.environ.get('LOGIN_ADMISSION_TIMEOUT', 0.1))
+LOGIN_HASH_TIMEOUT = float(os.environ.get('LOGIN_HASH_TIMEOUT', 5))
+LOGIN_RETRY_AFTER = int(os.environ.get('LOGIN_RETRY_AFTER', 1))
+LAST_LOGIN_FLUSH_INTERVAL = float(os.environ.get('LAST_LOGIN_FLUSH_INTERVAL', 5))
+LAST_LOGIN_BATCH_SIZE = int(os.environ.get('LAST_LOGIN_BATCH_SIZE', 500))
+
 CORS_ALLOWED_ORIGINS = os.environ.get('CORS_ALLOWED_ORIGINS', 'http://localhost:3000,http://127.0.0.1:3000').split(',')
 
 SWAGGER_SETTINGS = {
@@ -1,6 +1,23 @@
+from django.core.exceptions import ImproperlyConfigured
+
 from .base import *
 DEBUG = False
 
+DATABASES['default']['ENGINE'] = os.environ.get('DB_ENGINE', 'core.db.backends.postgresql_pool')
+
+# Com vários workers, um cache local deixaria versões de usuário e carteira,
+# respostas idempotentes e baldes de limite separados por processo
+LOCAL_CACHE_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+if CACHES['default']['BACKEND'] in LOCAL_CACHE_BACKENDS and os.environ.get('GUNICORN_WORKERS') != '1':
+    raise ImproperlyConfigured(
+        'Produção com vários workers exige um cache compartilhado: defina CACHE_BACKEND '
+        '(ex.: django.core.cache.backends.redis.RedisCache) e CACHE_LOCATION, '
+        'ou GUNICORN_WORKERS=1.'
+    )
+
 SECURE_HSTS_SECONDS = 31536000  # 1 ano
 SECURE_HSTS_INCLUDE_SUBDOMAINS = True
 SECURE_HSTS_PRELOAD = True
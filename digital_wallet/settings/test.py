@@ -11,6 +11,12 @@ DATABASES = {
         'NAME': ':memory:',
     }
 }
+DATABASE_REPLICAS = []
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {'money_user': None, 'money_wallet': None},
+}
 
 CACHES = {
     'default': {
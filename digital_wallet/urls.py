@@ -4,6 +4,8 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
+from core.views import idempotency_stats, metrics
+
 schema_view = get_schema_view(
     openapi.Info(
         title="Digital Wallet API",
@@ -26,4 +28,6 @@ urlpatterns = [
     path('api/auth/', include('users.urls')),
     path('api/wallets/', include('wallets.urls')),
     path('api/transactions/', include('transactions.urls')),
+    path('api/idempotency/stats/', idempotency_stats, name='idempotency-stats'),
+    path('metrics', metrics, name='metrics'),
 ]
\ No newline at end of file
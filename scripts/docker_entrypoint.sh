@@ -8,36 +8,39 @@ do
 done
 echo "PostgreSQL está pronto!"
 
-# Criando diretórios de migrações
-mkdir -p users/migrations
-mkdir -p wallets/migrations
-mkdir -p transactions/migrations
-touch users/migrations/__init__.py
-touch wallets/migrations/__init__.py
-touch transactions/migrations/__init__.py
+# Migrações ficam a cargo de um único serviço (RUN_MIGRATIONS=False nos demais)
+if [ "$RUN_MIGRATIONS" != "False" ]; then
+    # Criando diretórios de migrações
+    mkdir -p users/migrations
+    mkdir -p wallets/migrations
+    mkdir -p transactions/migrations
+    touch users/migrations/__init__.py
+    touch wallets/migrations/__init__.py
+    touch transactions/migrations/__init__.py
 
-# Criar migrações para cada app separadamente
-echo "Criando migrações para users..."
-python manage.py makemigrations users
+    # Criar migrações para cada app separadamente
+    echo "Criando migrações para users..."
+    python manage.py makemigrations users
 
-echo "Criando migrações para wallets..."
-python manage.py makemigrations wallets
+    echo "Criando migrações para wallets..."
+    python manage.py makemigrations wallets
 
-echo "Criando migrações para transactions..."
-python manage.py makemigrations transactions
+    echo "Criando migrações para transactions..."
+    python manage.py makemigrations transactions
 
-# Aplicar migrações na ordem correta
-echo "Aplicando migrações de users..."
-python manage.py migrate users
+    # Aplicar migrações na ordem correta
+    echo "Aplicando migrações de users..."
+    python manage.py migrate users
 
-echo "Aplicando migrações de wallets..."
-python manage.py migrate wallets
+    echo "Aplicando migrações de wallets..."
+    python manage.py migrate wallets
 
-echo "Aplicando migrações de transactions..."
-python manage.py migrate transactions
+    echo "Aplicando migrações de transactions..."
+    python manage.py migrate transactions
 
-echo "Aplicando outras migrações..."
-python manage.py migrate
+    echo "Aplicando outras migrações..."
+    python manage.py migrate
+fi
 
 # Criar superusuário
 if [ "$CREATE_SUPERUSER" = "True" ]; then
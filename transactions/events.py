@@ -0,0 +1,54 @@
+from core.models import OutboxEvent
+from .models import LedgerEntry
+
+TRANSACTION_COMPLETED = 'transaction.completed'
+BALANCE_CHANGED = 'wallet.balance_changed'
+
+
+def _transaction_payload(transaction_obj):
+    return {
+        'id': transaction_obj.pk,
+        'transaction_type': transaction_obj.transaction_type,
+        'status': transaction_obj.status,
+        'sender_id': transaction_obj.sender_id,
+        'recipient_id': transaction_obj.recipient_id,
+        'amount': transaction_obj.amount,
+        'description': transaction_obj.description,
+        'created_at': transaction_obj.created_at,
+    }
+
+
+def record(entries):
+    """
+    Grava no outbox os eventos das movimentações concluídas.
+
+    Deve ser chamado dentro da transação que gravou os lançamentos: cada
+    transação gera um evento de conclusão seguido de uma variação de saldo
+    por carteira movimentada, todos em um único INSERT.
+    """
+    events = []
+    current = None
+    for entry in entries:
+        transaction_obj = entry.transaction
+        if transaction_obj is not current:
+            current = transaction_obj
+            events.append(OutboxEvent(
+                topic=TRANSACTION_COMPLETED,
+                aggregate_id=str(transaction_obj.pk),
+                payload=_transaction_payload(transaction_obj)
+            ))
+        if entry.wallet_id is None:
+            continue
+
+        credit = entry.entry_type == LedgerEntry.CREDIT
+        events.append(OutboxEvent(
+            topic=BALANCE_CHANGED,
+            aggregate_id=str(entry.wallet_id),
+            payload={
+                'wallet_id': entry.wallet_id,
+                'user_id': transaction_obj.recipient_id if credit else transaction_obj.sender_id,
+                'delta': entry.amount if credit else -entry.amount,
+                'transaction_id': transaction_obj.pk,
+            }
+        ))
+    OutboxEvent.objects.bulk_create(events, batch_size=1000)
@@ -0,0 +1,174 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q, Sum
+from django.utils import timezone
+
+from wallets.models import Wallet, WalletShard
+
+from .models import BalanceSnapshot, LedgerEntry
+
+ZERO = Decimal('0.00')
+
+
+def entries_for(transaction_obj, debit_wallet_id, credit_wallet_id):
+    """
+    Monta as duas pernas de uma movimentação. Um id de carteira None
+    representa a conta externa (origem de depósitos, destino de saques).
+    """
+    return [
+        LedgerEntry(
+            transaction=transaction_obj,
+            wallet_id=debit_wallet_id,
+            entry_type=LedgerEntry.DEBIT,
+            amount=transaction_obj.amount
+        ),
+        LedgerEntry(
+            transaction=transaction_obj,
+            wallet_id=credit_wallet_id,
+            entry_type=LedgerEntry.CREDIT,
+            amount=transaction_obj.amount
+        ),
+    ]
+
+
+def _aggregate_totals(entries):
+    totals = entries.aggregate(
+        debits=Sum('amount', filter=Q(entry_type=LedgerEntry.DEBIT)),
+        credits=Sum('amount', filter=Q(entry_type=LedgerEntry.CREDIT)),
+    )
+    return totals['debits'] or ZERO, totals['credits'] or ZERO
+
+
+def totals_at(wallet_id, moment):
+    """
+    Retorna (débitos, créditos) acumulados da carteira até `moment`.
+
+    Parte do snapshot mais próximo anterior a `moment` e soma apenas os
+    lançamentos posteriores a ele, sem varrer o histórico completo.
+    """
+    snapshot = (
+        BalanceSnapshot.objects.filter(wallet_id=wallet_id, as_of__lte=moment)
+        .order_by('-as_of')
+        .first()
+    )
+    entries = LedgerEntry.objects.filter(wallet_id=wallet_id, created_at__lte=moment)
+    debits = credits = ZERO
+    if snapshot is not None:
+        entries = entries.filter(created_at__gt=snapshot.as_of)
+        debits, credits = snapshot.total_debits, snapshot.total_credits
+
+    delta_debits, delta_credits = _aggregate_totals(entries)
+    return debits + delta_debits, credits + delta_credits
+
+
+def balance_at(wallet_id, moment):
+    """Saldo da carteira no instante `moment`"""
+    debits, credits = totals_at(wallet_id, moment)
+    return credits - debits
+
+
+def statement(wallet_id, start, end):
+    """Saldos de abertura/fechamento e totais movimentados em (start, end]"""
+    opening_debits, opening_credits = totals_at(wallet_id, start)
+    closing_debits, closing_credits = totals_at(wallet_id, end)
+    return {
+        'start_date': start,
+        'end_date': end,
+        'opening_balance': opening_credits - opening_debits,
+        'closing_balance': closing_credits - closing_debits,
+        'total_debits': closing_debits - opening_debits,
+        'total_credits': closing_credits - opening_credits,
+    }
+
+
+def compact(chunk_size=1000, as_of=None):
+    """
+    Grava snapshots para as carteiras movimentadas desde a última compactação.
+
+    O ponto de corte fica LEDGER_SNAPSHOT_LAG segundos no passado. Cada
+    carteira é somada a partir do próprio snapshot anterior, com ela e seus
+    sub-saldos bloqueados: movimentações ainda não confirmadas terminam
+    antes da soma, então nenhum lançamento até o corte fica de fora. Retorna
+    a quantidade de snapshots criados.
+    """
+    if as_of is None:
+        as_of = timezone.now() - timedelta(seconds=settings.LEDGER_SNAPSHOT_LAG)
+
+    watermark = BalanceSnapshot.objects.aggregate(last=Max('as_of'))['last']
+    if watermark is not None and watermark >= as_of:
+        return 0
+
+    # O corte global só seleciona as carteiras a compactar; uma carteira fora
+    # da lista segue com o snapshot anterior, que continua correto
+    window = LedgerEntry.objects.filter(wallet__isnull=False, created_at__lte=as_of)
+    if watermark is not None:
+        window = window.filter(created_at__gt=watermark)
+
+    wallet_ids = list(window.order_by('wallet_id').values_list('wallet_id', flat=True).distinct())
+    created = 0
+    for start in range(0, len(wallet_ids), chunk_size):
+        # Uma transação por lote: os bloqueios duram só a soma do lote
+        with transaction.atomic():
+            created += _compact_chunk(wallet_ids[start:start + chunk_size], as_of)
+    return created
+
+
+def _lock_wallets(wallet_ids):
+    # Toda movimentação bloqueia a carteira ou o sub-saldo creditado até o
+    # commit; a ordem (carteiras por id, depois sub-saldos) é a dos serviços
+    list(Wallet.objects.select_for_update().filter(pk__in=wallet_ids).order_by('pk').values_list('pk'))
+    list(
+        WalletShard.objects.select_for_update().filter(wallet_id__in=wallet_ids)
+        .order_by('wallet_id', 'index').values_list('pk')
+    )
+
+
+def _compact_chunk(wallet_ids, as_of):
+    _lock_wallets(wallet_ids)
+    latest = dict(
+        BalanceSnapshot.objects.filter(wallet_id__in=wallet_ids)
+        .values('wallet_id')
+        .annotate(last=Max('as_of'))
+        .values_list('wallet_id', 'last')
+    )
+    previous = {
+        snapshot.wallet_id: snapshot
+        for snapshot in BalanceSnapshot.objects.filter(
+            wallet_id__in=wallet_ids, as_of__in=set(latest.values())
+        )
+        if latest.get(snapshot.wallet_id) == snapshot.as_of
+    }
+
+    # Lançamentos posteriores ao snapshot de cada carteira, agrupadas pela
+    # posição do snapshot (em geral, poucas compactações distintas)
+    since = defaultdict(list)
+    for wallet_id in wallet_ids:
+        since[latest.get(wallet_id)].append(wallet_id)
+    condition = Q()
+    for moment, ids in since.items():
+        condition |= Q(wallet_id__in=ids, created_at__gt=moment) if moment else Q(wallet_id__in=ids)
+
+    deltas = LedgerEntry.objects.filter(condition, created_at__lte=as_of).values('wallet_id').annotate(
+        debits=Sum('amount', filter=Q(entry_type=LedgerEntry.DEBIT)),
+        credits=Sum('amount', filter=Q(entry_type=LedgerEntry.CREDIT)),
+    )
+
+    snapshots = []
+    for delta in deltas:
+        base = previous.get(delta['wallet_id'])
+        debits = (base.total_debits if base else ZERO) + (delta['debits'] or ZERO)
+        credits = (base.total_credits if base else ZERO) + (delta['credits'] or ZERO)
+        snapshots.append(BalanceSnapshot(
+            wallet_id=delta['wallet_id'],
+            as_of=as_of,
+            balance=credits - debits,
+            total_debits=debits,
+            total_credits=credits
+        ))
+
+    BalanceSnapshot.objects.bulk_create(snapshots)
+    return len(snapshots)
@@ -0,0 +1,57 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from transactions import archive
+
+
+class Command(BaseCommand):
+    help = (
+        'Move em lotes as transações concluídas ou com falha mais antigas que '
+        'TRANSACTION_ARCHIVE_AFTER_DAYS para o arquivo frio (agendar via cron)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=settings.TRANSACTION_ARCHIVE_AFTER_DAYS,
+            help='Idade mínima das transações arquivadas; não pode ser menor que TRANSACTION_ARCHIVE_AFTER_DAYS'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Transações movidas por transação de banco'
+        )
+
+    def handle(self, *args, **options):
+        if not settings.TRANSACTION_ARCHIVE_AFTER_DAYS:
+            raise CommandError('Arquivo desativado (TRANSACTION_ARCHIVE_AFTER_DAYS=0).')
+        if options['older_than_days'] < settings.TRANSACTION_ARCHIVE_AFTER_DAYS:
+            # As leituras supõem que nada mais novo que o limite foi arquivado
+            raise CommandError(
+                f'--older-than-days não pode ser menor que {settings.TRANSACTION_ARCHIVE_AFTER_DAYS}.'
+            )
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size deve ser positivo.')
+
+        before = timezone.now() - timedelta(days=options['older_than_days'])
+        started = time.monotonic()
+        total = 0
+        last_id = 0
+        while True:
+            moved, last_id = archive.archive_chunk(before, last_id, options['chunk_size'])
+            if not moved:
+                break
+            total += moved
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{total} transações arquivadas (até o id {last_id})')
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} transações anteriores a {before:%Y-%m-%d} arquivadas em {elapsed:.2f}s.'
+        ))
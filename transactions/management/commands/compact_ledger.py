@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from transactions import ledger
+
+
+class Command(BaseCommand):
+    help = 'Grava snapshots de saldo das carteiras movimentadas desde a última compactação'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Quantidade de carteiras processadas por consulta'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        created = ledger.compact(chunk_size=options['chunk_size'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{created} snapshots de saldo gravados em {elapsed:.2f}s.'
+        ))
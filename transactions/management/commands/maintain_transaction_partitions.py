@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from transactions import partitions
+from transactions.models import Transaction
+
+
+class Command(BaseCommand):
+    help = (
+        'Cria as partições mensais dos próximos meses de transactions_transaction e desanexa '
+        'as anteriores à retenção (agendar via cron, ao menos uma vez por mês)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=settings.TRANSACTION_PARTITION_MONTHS_AHEAD,
+            help='Meses futuros com partição já criada'
+        )
+        parser.add_argument(
+            '--retention-months',
+            type=int,
+            default=settings.TRANSACTION_PARTITION_RETENTION_MONTHS,
+            help='Meses anexados além do atual; partições mais antigas são desanexadas (0: mantém todas)'
+        )
+        parser.add_argument(
+            '--check-pruning',
+            action='store_true',
+            help='Mostra as partições lidas por uma consulta filtrada pelo mês atual'
+        )
+
+    def handle(self, *args, **options):
+        if not partitions.is_partitioned():
+            raise CommandError(
+                'transactions_transaction não está particionada (requer PostgreSQL e a migração 0009).'
+            )
+        if options['months_ahead'] < 0 or options['retention_months'] < 0:
+            raise CommandError('--months-ahead e --retention-months não podem ser negativos.')
+
+        current = partitions.month_floor(timezone.now())
+        created = partitions.ensure_partitions(
+            until=partitions.add_months(current, options['months_ahead'])
+        )
+        detached = kept = []
+        if options['retention_months']:
+            detached, kept = partitions.detach_partitions(
+                before=partitions.add_months(current, -options['retention_months'])
+            )
+
+        for name in created:
+            self.stdout.write(f'Criada: {name}')
+        for name in detached:
+            self.stdout.write(f'Desanexada: {name}')
+        for name in kept:
+            self.stdout.write(self.style.WARNING(
+                f'Mantida: {name} ainda tem transações não arquivadas (execute archive_transactions)'
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(created)} partições criadas e {len(detached)} desanexadas; '
+            f'{len(partitions.list_partitions())} anexadas.'
+        ))
+
+        if options['check_pruning']:
+            start = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            queryset = Transaction.objects.filter(
+                created_at__gte=start, created_at__lte=start + timedelta(days=27)
+            ).order_by('-created_at')[:settings.REST_FRAMEWORK['PAGE_SIZE']]
+            scanned = partitions.scanned_partitions(queryset)
+            self.stdout.write(f"Partições lidas no mês atual: {', '.join(scanned) or 'nenhuma'}")
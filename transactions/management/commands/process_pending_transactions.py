@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from transactions import services
+
+
+class Command(BaseCommand):
+    help = (
+        'Conclui transferências e saques pendentes do modo assíncrono. '
+        'Vários processos podem rodar em paralelo (SELECT ... FOR UPDATE SKIP LOCKED).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Quantidade de transações reivindicadas por transação de banco'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Espera (segundos) quando a fila está vazia'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Esvazia a fila uma vez e encerra, em vez de aguardar novas transações'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        totals = [0, 0, 0]
+
+        try:
+            while True:
+                started = time.monotonic()
+                completed, failed, deferred = services.process_pending(batch_size)
+                claimed = completed + failed + deferred
+                if claimed:
+                    totals = [totals[0] + completed, totals[1] + failed, totals[2] + deferred]
+                    elapsed = time.monotonic() - started
+                    self.stdout.write(
+                        f'{completed} concluídas, {failed} com falha, {deferred} adiadas '
+                        f'({claimed / elapsed:.0f}/s)'
+                    )
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Total: {totals[0]} concluídas, {totals[1]} com falha, {totals[2]} adiadas.'
+        ))
@@ -0,0 +1,56 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from transactions.models import TransactionSummary
+from transactions.summaries import aggregate_for_users, lock_summaries
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula os resumos mensais de transações a partir do histórico, em lotes '
+        'de usuários. Cada lote bloqueia a tabela de resumos enquanto é recalculado: '
+        'movimentações concluídas nesse intervalo aguardam o fim do lote.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Quantidade de usuários recalculados por transação'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        started = time.monotonic()
+        last_id = 0
+        users = rows = 0
+
+        while True:
+            user_ids = list(
+                User.objects.filter(pk__gt=last_id).order_by('pk')
+                .values_list('pk', flat=True)[:chunk_size]
+            )
+            if not user_ids:
+                break
+
+            with transaction.atomic():
+                lock_summaries()
+                summaries = aggregate_for_users(user_ids)
+                TransactionSummary.objects.filter(user_id__in=user_ids).delete()
+                TransactionSummary.objects.bulk_create(summaries, batch_size=1000)
+
+            last_id = user_ids[-1]
+            users += len(user_ids)
+            rows += len(summaries)
+            self.stdout.write(f'{users} usuários processados...')
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{rows} resumos recalculados para {users} usuários em {elapsed:.2f}s.'
+        ))
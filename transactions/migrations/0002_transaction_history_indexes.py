@@ -0,0 +1,25 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("transactions", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["sender", "-created_at", "-id"], name="tx_sender_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["recipient", "-created_at", "-id"],
+                name="tx_recipient_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,150 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:12
+
+from decimal import Decimal
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("wallets", "0002_wallet_balance_non_negative"),
+        ("transactions", "0002_transaction_history_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BalanceSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "as_of",
+                    models.DateTimeField(db_index=True, verbose_name="posição em"),
+                ),
+                (
+                    "balance",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=15, verbose_name="saldo"
+                    ),
+                ),
+                (
+                    "total_debits",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=20, verbose_name="total de débitos"
+                    ),
+                ),
+                (
+                    "total_credits",
+                    models.DecimalField(
+                        decimal_places=2,
+                        max_digits=20,
+                        verbose_name="total de créditos",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="data de criação"
+                    ),
+                ),
+                (
+                    "wallet",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="balance_snapshots",
+                        to="wallets.wallet",
+                        verbose_name="carteira",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "snapshot de saldo",
+                "verbose_name_plural": "snapshots de saldo",
+            },
+        ),
+        migrations.CreateModel(
+            name="LedgerEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "entry_type",
+                    models.CharField(
+                        choices=[("debit", "Débito"), ("credit", "Crédito")],
+                        max_length=6,
+                        verbose_name="tipo",
+                    ),
+                ),
+                (
+                    "amount",
+                    models.DecimalField(
+                        decimal_places=2,
+                        max_digits=15,
+                        validators=[
+                            django.core.validators.MinValueValidator(Decimal("0.01"))
+                        ],
+                        verbose_name="valor",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="data de criação"
+                    ),
+                ),
+                (
+                    "transaction",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="ledger_entries",
+                        to="transactions.transaction",
+                        verbose_name="transação",
+                    ),
+                ),
+                (
+                    "wallet",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="ledger_entries",
+                        to="wallets.wallet",
+                        verbose_name="carteira",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "lançamento",
+                "verbose_name_plural": "lançamentos",
+                "indexes": [
+                    models.Index(
+                        fields=["wallet", "created_at"],
+                        name="ledger_wallet_created_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="balancesnapshot",
+            constraint=models.UniqueConstraint(
+                fields=("wallet", "as_of"), name="snapshot_wallet_as_of_unique"
+            ),
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations
+
+
+def create_opening_entries(apps, schema_editor):
+    """Lança o saldo atual de cada carteira como abertura do livro-razão"""
+    Wallet = apps.get_model('wallets', 'Wallet')
+    LedgerEntry = apps.get_model('transactions', 'LedgerEntry')
+
+    batch = []
+    for wallet_id, balance in Wallet.objects.filter(balance__gt=0).values_list('id', 'balance').iterator(chunk_size=2000):
+        batch.append(LedgerEntry(wallet_id=None, entry_type='debit', amount=balance))
+        batch.append(LedgerEntry(wallet_id=wallet_id, entry_type='credit', amount=balance))
+        if len(batch) >= 2000:
+            LedgerEntry.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        LedgerEntry.objects.bulk_create(batch)
+
+
+def delete_opening_entries(apps, schema_editor):
+    LedgerEntry = apps.get_model('transactions', 'LedgerEntry')
+    LedgerEntry.objects.filter(transaction__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("transactions", "0003_ledger"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_opening_entries, delete_opening_entries),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:15
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("transactions", "0004_ledger_opening_balances"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TransactionSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("month", models.DateField(verbose_name="mês")),
+                (
+                    "transaction_type",
+                    models.CharField(
+                        choices=[
+                            ("deposit", "Depósito"),
+                            ("transfer", "Transferência"),
+                            ("withdrawal", "Saque"),
+                        ],
+                        max_length=10,
+                        verbose_name="tipo",
+                    ),
+                ),
+                (
+                    "direction",
+                    models.CharField(
+                        choices=[("sent", "Enviado"), ("received", "Recebido")],
+                        max_length=8,
+                        verbose_name="sentido",
+                    ),
+                ),
+                (
+                    "total_amount",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        max_digits=20,
+                        verbose_name="total",
+                    ),
+                ),
+                (
+                    "count",
+                    models.PositiveIntegerField(default=0, verbose_name="quantidade"),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="transaction_summaries",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="usuário",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "resumo de transações",
+                "verbose_name_plural": "resumos de transações",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="transactionsummary",
+            constraint=models.UniqueConstraint(
+                fields=("user", "month", "transaction_type", "direction"),
+                name="summary_user_month_type_direction_unique",
+            ),
+        ),
+    ]
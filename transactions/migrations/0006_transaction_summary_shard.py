@@ -0,0 +1,28 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("transactions", "0005_transaction_summary"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="transactionsummary",
+            name="summary_user_month_type_direction_unique",
+        ),
+        migrations.AddField(
+            model_name="transactionsummary",
+            name="shard",
+            field=models.PositiveSmallIntegerField(default=0, verbose_name="sub-saldo"),
+        ),
+        migrations.AddConstraint(
+            model_name="transactionsummary",
+            constraint=models.UniqueConstraint(
+                fields=("user", "month", "transaction_type", "direction", "shard"),
+                name="summary_user_month_type_direction_shard_unique",
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("transactions", "0006_transaction_summary_shard"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transaction",
+            name="failure_reason",
+            field=models.CharField(
+                blank=True, max_length=255, verbose_name="motivo da falha"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                condition=models.Q(("status", "pending")),
+                fields=["created_at", "id"],
+                name="tx_pending_queue_idx",
+            ),
+        ),
+    ]
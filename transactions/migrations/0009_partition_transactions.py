@@ -0,0 +1,138 @@
+from django.conf import settings
+from django.db import migrations
+from django.utils import timezone
+
+from transactions.partitions import (
+    DEFAULT_PARTITION, TABLE, add_months, create_partition_sql, month_floor
+)
+
+OLD_TABLE = f'{TABLE}_unpartitioned'
+SEQUENCE = f'{TABLE}_id_part_seq'
+
+
+def _indexes(cursor, table):
+    """Definições dos índices que não pertencem a constraints (a PK é recriada à parte)"""
+    cursor.execute(
+        """
+        SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i
+        WHERE i.indrelid = to_regclass(%s)
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+        """,
+        [table]
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _foreign_keys(cursor, table):
+    cursor.execute(
+        """
+        SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = to_regclass(%s) AND contype = 'f' AND conparentid = 0
+        """,
+        [table]
+    )
+    return cursor.fetchall()
+
+
+def _relkind(cursor):
+    cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)', [TABLE])
+    return cursor.fetchone()[0]
+
+
+def _rebuild(cursor, create_sql, primary_key, before_copy=()):
+    """
+    Recria a tabela com `create_sql` e copia as linhas. Índices e FKs são
+    recriados depois da cópia, com os mesmos nomes do estado do Django.
+    """
+    indexes = _indexes(cursor, TABLE)
+    foreign_keys = _foreign_keys(cursor, TABLE)
+
+    cursor.execute(f'ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}')
+    cursor.execute(create_sql)
+    # O DEFAULT copiado aponta para a sequência da tabela antiga
+    cursor.execute(f'ALTER TABLE {TABLE} ALTER COLUMN id DROP DEFAULT')
+    for sql in before_copy:
+        cursor.execute(sql)
+    cursor.execute(f'INSERT INTO {TABLE} SELECT * FROM {OLD_TABLE}')
+    cursor.execute(f'DROP TABLE {OLD_TABLE}')
+
+    cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY ({primary_key})')
+    for sql in indexes:
+        cursor.execute(sql)
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}')
+    cursor.execute(f'ANALYZE {TABLE}')
+
+
+def partition_transactions(apps, schema_editor):
+    """
+    Converte a tabela em particionada por mês de created_at. As linhas são
+    copiadas dentro da transação da migração, com a tabela bloqueada: em
+    bases grandes, agende uma janela de manutenção.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        if _relkind(cursor) == 'p':
+            return
+        cursor.execute(f'SELECT max(id), min(created_at) FROM {TABLE}')
+        max_id, oldest = cursor.fetchone()
+
+        now = timezone.now()
+        month = month_floor(oldest or now)
+        last = add_months(month_floor(now), settings.TRANSACTION_PARTITION_MONTHS_AHEAD)
+        partitions = [f'CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT']
+        while month <= last:
+            partitions.append(create_partition_sql(month))
+            month = add_months(month, 1)
+
+        _rebuild(
+            cursor,
+            f'CREATE TABLE {TABLE} (LIKE {OLD_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS '
+            f'INCLUDING STORAGE) PARTITION BY RANGE (created_at)',
+            # A chave de partição precisa fazer parte da chave primária
+            'id, created_at',
+            before_copy=[
+                # Sequência comum (OWNED BY) em vez de identidade, suportada
+                # em tabelas particionadas em qualquer versão
+                f'CREATE SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id',
+                f"SELECT setval('{SEQUENCE}', {(max_id or 0) + 1}, false)",
+                f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')",
+                *partitions,
+            ]
+        )
+
+
+def unpartition_transactions(apps, schema_editor):
+    """Volta a uma tabela comum. Partições já desanexadas não são copiadas."""
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        if _relkind(cursor) != 'p':
+            return
+        cursor.execute(f'SELECT max(id) FROM {TABLE}')
+        max_id = cursor.fetchone()[0]
+
+        _rebuild(
+            cursor,
+            f'CREATE TABLE {TABLE} (LIKE {OLD_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE)',
+            'id',
+            before_copy=[
+                f'ALTER TABLE {TABLE} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY '
+                f'(START WITH {(max_id or 0) + 1})',
+            ]
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("transactions", "0008_ledger_transaction_without_constraint"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_transactions, unpartition_transactions),
+    ]
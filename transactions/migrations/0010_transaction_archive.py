@@ -0,0 +1,189 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+COLUMNS = (
+    'id, transaction_type, status, sender_id, recipient_id, amount, description, '
+    'created_at, updated_at, failure_reason'
+)
+
+CREATE_HISTORY_VIEW = f"""
+    CREATE VIEW transactions_history AS
+    SELECT {COLUMNS} FROM transactions_transaction
+    UNION ALL
+    SELECT {COLUMNS} FROM transactions_archivedtransaction
+"""
+
+
+def tune_archive_table(apps, schema_editor):
+    # Linhas nunca atualizadas: páginas cheias, sem espaço reservado para UPDATE
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('ALTER TABLE transactions_archivedtransaction SET (fillfactor = 100)')
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("transactions", "0009_partition_transactions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TransactionHistory",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                (
+                    "transaction_type",
+                    models.CharField(
+                        choices=[
+                            ("deposit", "Depósito"),
+                            ("transfer", "Transferência"),
+                            ("withdrawal", "Saque"),
+                        ],
+                        max_length=10,
+                        verbose_name="tipo",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pendente"),
+                            ("completed", "Concluída"),
+                            ("failed", "Falha"),
+                        ],
+                        max_length=10,
+                        verbose_name="status",
+                    ),
+                ),
+                (
+                    "amount",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=15, verbose_name="valor"
+                    ),
+                ),
+                (
+                    "description",
+                    models.CharField(
+                        blank=True, max_length=255, verbose_name="descrição"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(verbose_name="data de criação")),
+                (
+                    "updated_at",
+                    models.DateTimeField(verbose_name="data de atualização"),
+                ),
+                (
+                    "failure_reason",
+                    models.CharField(
+                        blank=True, max_length=255, verbose_name="motivo da falha"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "histórico de transações",
+                "verbose_name_plural": "históricos de transações",
+                "db_table": "transactions_history",
+                "ordering": ["-created_at"],
+                "abstract": False,
+                "managed": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedTransaction",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                (
+                    "transaction_type",
+                    models.CharField(
+                        choices=[
+                            ("deposit", "Depósito"),
+                            ("transfer", "Transferência"),
+                            ("withdrawal", "Saque"),
+                        ],
+                        max_length=10,
+                        verbose_name="tipo",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pendente"),
+                            ("completed", "Concluída"),
+                            ("failed", "Falha"),
+                        ],
+                        max_length=10,
+                        verbose_name="status",
+                    ),
+                ),
+                (
+                    "amount",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=15, verbose_name="valor"
+                    ),
+                ),
+                (
+                    "description",
+                    models.CharField(
+                        blank=True, max_length=255, verbose_name="descrição"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(verbose_name="data de criação")),
+                (
+                    "updated_at",
+                    models.DateTimeField(verbose_name="data de atualização"),
+                ),
+                (
+                    "failure_reason",
+                    models.CharField(
+                        blank=True, max_length=255, verbose_name="motivo da falha"
+                    ),
+                ),
+                (
+                    "recipient",
+                    models.ForeignKey(
+                        blank=True,
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="destinatário",
+                    ),
+                ),
+                (
+                    "sender",
+                    models.ForeignKey(
+                        blank=True,
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="remetente",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "transação arquivada",
+                "verbose_name_plural": "transações arquivadas",
+                "ordering": ["-created_at"],
+                "abstract": False,
+                "indexes": [
+                    models.Index(
+                        fields=["sender", "-created_at", "-id"],
+                        name="archived_tx_sender_idx",
+                    ),
+                    models.Index(
+                        fields=["recipient", "-created_at", "-id"],
+                        name="archived_tx_recipient_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunSQL(CREATE_HISTORY_VIEW, 'DROP VIEW transactions_history'),
+        migrations.RunPython(tune_archive_table, migrations.RunPython.noop),
+    ]
@@ -5,7 +5,13 @@ from decimal import Decimal
 from django.utils.translation import gettext_lazy as _
 
 class Transaction(models.Model):
-    """Modelo para transações financeiras entre carteiras"""
+    """
+    Modelo para transações financeiras entre carteiras.
+
+    No PostgreSQL a tabela é particionada por mês de created_at, com chave
+    primária (id, created_at); ver transactions.partitions. A visão
+    transactions_history (TransactionHistory) depende das colunas desta tabela.
+    """
     # Tipos de transação
     DEPOSIT = 'deposit'
     TRANSFER = 'transfer'
@@ -83,10 +89,27 @@ class Transaction(models.Model):
         auto_now=True
     )
     
+    failure_reason = models.CharField(
+        _('motivo da falha'),
+        max_length=255,
+        blank=True
+    )
+    
     class Meta:
         verbose_name = _('transação')
         verbose_name_plural = _('transações')
         ordering = ['-created_at']
+        indexes = [
+            # Histórico do usuário paginado por (created_at, id)
+            models.Index(fields=['sender', '-created_at', '-id'], name='tx_sender_created_idx'),
+            models.Index(fields=['recipient', '-created_at', '-id'], name='tx_recipient_created_idx'),
+            # Fila de pendentes do processamento assíncrono, em ordem de chegada
+            models.Index(
+                fields=['created_at', 'id'],
+                condition=models.Q(status='pending'),
+                name='tx_pending_queue_idx'
+            ),
+        ]
     
     def __str__(self):
         if self.transaction_type == self.DEPOSIT:
@@ -94,4 +117,252 @@ class Transaction(models.Model):
         elif self.transaction_type == self.WITHDRAWAL:
             return f"Saque de R${self.amount} por {self.sender}"
         else:
-            return f"Transferência de R${self.amount} de {self.sender} para {self.recipient}" 
\ No newline at end of file
+            return f"Transferência de R${self.amount} de {self.sender} para {self.recipient}" 
+
+class TransactionRecord(models.Model):
+    """
+    Campos de Transaction, somente leitura, para o arquivo frio e a visão
+    de histórico. O id é o da transação original.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    
+    transaction_type = models.CharField(
+        _('tipo'),
+        max_length=10,
+        choices=Transaction.TRANSACTION_TYPES
+    )
+    
+    status = models.CharField(
+        _('status'),
+        max_length=10,
+        choices=Transaction.TRANSACTION_STATUS
+    )
+    
+    amount = models.DecimalField(_('valor'), max_digits=15, decimal_places=2)
+    description = models.CharField(_('descrição'), max_length=255, blank=True)
+    created_at = models.DateTimeField(_('data de criação'))
+    updated_at = models.DateTimeField(_('data de atualização'))
+    failure_reason = models.CharField(_('motivo da falha'), max_length=255, blank=True)
+    
+    class Meta:
+        abstract = True
+        ordering = ['-created_at']
+    
+    __str__ = Transaction.__str__
+
+
+class ArchivedTransaction(TransactionRecord):
+    """
+    Transação concluída ou com falha movida da tabela quente pelo comando
+    archive_transactions. Só há índices para o histórico por usuário.
+    """
+    sender = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.PROTECT,
+        related_name='+',
+        null=True,
+        blank=True,
+        db_index=False,  # Coberto pelos índices compostos
+        verbose_name=_('remetente')
+    )
+    
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.PROTECT,
+        related_name='+',
+        null=True,
+        blank=True,
+        db_index=False,  # Coberto pelos índices compostos
+        verbose_name=_('destinatário')
+    )
+    
+    class Meta(TransactionRecord.Meta):
+        verbose_name = _('transação arquivada')
+        verbose_name_plural = _('transações arquivadas')
+        indexes = [
+            models.Index(fields=['sender', '-created_at', '-id'], name='archived_tx_sender_idx'),
+            models.Index(fields=['recipient', '-created_at', '-id'], name='archived_tx_recipient_idx'),
+        ]
+
+
+class TransactionHistory(TransactionRecord):
+    """
+    Visão (UNION ALL) das transações quentes e arquivadas, usada pelas
+    leituras cujo período alcança o arquivo (ver transactions.archive).
+    """
+    sender = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        related_name='+',
+        null=True,
+        db_constraint=False,
+        verbose_name=_('remetente')
+    )
+    
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        related_name='+',
+        null=True,
+        db_constraint=False,
+        verbose_name=_('destinatário')
+    )
+    
+    class Meta(TransactionRecord.Meta):
+        managed = False
+        db_table = 'transactions_history'
+        verbose_name = _('histórico de transações')
+        verbose_name_plural = _('históricos de transações')
+
+
+class LedgerEntry(models.Model):
+    """
+    Lançamento contábil imutável (partida dobrada).
+
+    Cada movimentação gera um débito e um crédito de mesmo valor. O lado
+    sem carteira (wallet nulo) representa a conta externa de depósitos e
+    saques.
+    """
+    DEBIT = 'debit'
+    CREDIT = 'credit'
+    
+    ENTRY_TYPES = [
+        (DEBIT, _('Débito')),
+        (CREDIT, _('Crédito')),
+    ]
+    
+    transaction = models.ForeignKey(
+        Transaction,
+        on_delete=models.PROTECT,
+        related_name='ledger_entries',
+        null=True,  # Saldos de abertura não têm transação de origem
+        blank=True,
+        # Sem FK no banco: a tabela particionada não tem unicidade só em id
+        db_constraint=False,
+        verbose_name=_('transação')
+    )
+    
+    wallet = models.ForeignKey(
+        'wallets.Wallet',
+        on_delete=models.PROTECT,
+        related_name='ledger_entries',
+        null=True,  # Conta externa
+        blank=True,
+        verbose_name=_('carteira')
+    )
+    
+    entry_type = models.CharField(
+        _('tipo'),
+        max_length=6,
+        choices=ENTRY_TYPES
+    )
+    
+    amount = models.DecimalField(
+        _('valor'),
+        max_digits=15,
+        decimal_places=2,
+        validators=[MinValueValidator(Decimal('0.01'))]
+    )
+    
+    created_at = models.DateTimeField(
+        _('data de criação'),
+        auto_now_add=True
+    )
+    
+    class Meta:
+        verbose_name = _('lançamento')
+        verbose_name_plural = _('lançamentos')
+        indexes = [
+            models.Index(fields=['wallet', 'created_at'], name='ledger_wallet_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_entry_type_display()} de R${self.amount} na carteira {self.wallet_id}"
+
+
+class BalanceSnapshot(models.Model):
+    """
+    Totais acumulados de uma carteira até `as_of`, gerados pela compactação
+    do livro-razão. Consultas históricas partem do snapshot mais próximo e
+    somam apenas os lançamentos posteriores.
+    """
+    wallet = models.ForeignKey(
+        'wallets.Wallet',
+        on_delete=models.CASCADE,
+        related_name='balance_snapshots',
+        verbose_name=_('carteira')
+    )
+    
+    as_of = models.DateTimeField(_('posição em'), db_index=True)
+    
+    balance = models.DecimalField(_('saldo'), max_digits=15, decimal_places=2)
+    total_debits = models.DecimalField(_('total de débitos'), max_digits=20, decimal_places=2)
+    total_credits = models.DecimalField(_('total de créditos'), max_digits=20, decimal_places=2)
+    
+    created_at = models.DateTimeField(_('data de criação'), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('snapshot de saldo')
+        verbose_name_plural = _('snapshots de saldo')
+        constraints = [
+            models.UniqueConstraint(fields=['wallet', 'as_of'], name='snapshot_wallet_as_of_unique'),
+        ]
+    
+    def __str__(self):
+        return f"Saldo de R${self.balance} da carteira {self.wallet_id} em {self.as_of}"
+
+
+class TransactionSummary(models.Model):
+    """
+    Totais mensais por usuário, tipo e sentido das transações concluídas.
+
+    Atualizado na mesma transação de banco que conclui cada movimentação,
+    de modo que o resumo custa O(meses) em vez de O(transações). Créditos em
+    carteiras fragmentadas usam a linha do sub-saldo creditado (`shard`)
+    para não concentrar a concorrência em uma única linha.
+    """
+    SENT = 'sent'
+    RECEIVED = 'received'
+    
+    DIRECTIONS = [
+        (SENT, _('Enviado')),
+        (RECEIVED, _('Recebido')),
+    ]
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='transaction_summaries',
+        verbose_name=_('usuário')
+    )
+    
+    month = models.DateField(_('mês'))
+    
+    transaction_type = models.CharField(
+        _('tipo'),
+        max_length=10,
+        choices=Transaction.TRANSACTION_TYPES
+    )
+    
+    direction = models.CharField(
+        _('sentido'),
+        max_length=8,
+        choices=DIRECTIONS
+    )
+    
+    total_amount = models.DecimalField(_('total'), max_digits=20, decimal_places=2, default=Decimal('0.00'))
+    count = models.PositiveIntegerField(_('quantidade'), default=0)
+    shard = models.PositiveSmallIntegerField(_('sub-saldo'), default=0)
+    
+    class Meta:
+        verbose_name = _('resumo de transações')
+        verbose_name_plural = _('resumos de transações')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'month', 'transaction_type', 'direction', 'shard'],
+                name='summary_user_month_type_direction_shard_unique'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} {self.month:%Y-%m} {self.transaction_type}/{self.direction}: R${self.total_amount}"
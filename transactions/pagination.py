@@ -0,0 +1,54 @@
+from core.pagination import CursorOrPageNumberPagination, KeysetPagination
+
+from . import archive
+from .models import Transaction, TransactionHistory
+
+
+class HistoryKeysetPagination(KeysetPagination):
+    """
+    Keyset para a visão de histórico que lê primeiro só a tabela quente.
+
+    Com ordenação por created_at, uma página inteiramente posterior ao corte
+    do arquivo (ver transactions.archive) não pode conter transações
+    arquivadas; a visão só é consultada quando a página cruza o corte. A
+    view fornece get_rows(model), com os mesmos filtros e ordenação.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if queryset.model is TransactionHistory:
+            rows = list(self._page_queryset(view.get_rows(Transaction), request, view))
+            if self._within_hot_table(rows):
+                return self._finish_page(rows)
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        if queryset.model is TransactionHistory:
+            rows = [row async for row in self._page_queryset(view.get_rows(Transaction), request, view)]
+            if self._within_hot_table(rows):
+                return self._finish_page(rows)
+        return await super().apaginate_queryset(queryset, request, view)
+
+    def _within_hot_table(self, rows):
+        cutoff = archive.archive_cutoff()
+        if cutoff is None:
+            return True
+        if self.field_name != 'created_at':
+            return False
+
+        if not self.scan_descending:
+            # Do cursor em diante: basta o cursor estar após o corte
+            if self.cursor is None:
+                return False
+            position = Transaction._meta.get_field('created_at').to_python(self.cursor['value'])
+            return position >= cutoff
+
+        # Em ordem decrescente: a página precisa estar completa e terminar após o corte
+        if len(rows) <= self.page_size:
+            return False
+        last = rows[self.page_size - 1]
+        created_at = last['created_at'] if isinstance(last, dict) else last.created_at
+        return created_at >= cutoff
+
+
+class HistoryPagination(CursorOrPageNumberPagination):
+    keyset_class = HistoryKeysetPagination
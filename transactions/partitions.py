@@ -0,0 +1,175 @@
+"""
+Partições mensais de transactions_transaction (PostgreSQL).
+
+A migração 0009 converte a tabela em particionada por RANGE (created_at),
+com uma partição por mês (limites em UTC) e uma partição DEFAULT que
+recebe o que cair fora delas. Filtros por created_at (start_date/end_date
+da listagem, cursor da paginação) são podados no planejamento: só as
+partições do intervalo são lidas. Consultas sem limite em created_at (a
+listagem sem período, por exemplo) não são podadas e consultam o índice
+de cada partição.
+
+O comando maintain_transaction_partitions cria as partições dos próximos
+meses e desanexa as antigas já esvaziadas pelo arquivo, que continuam no
+banco como tabelas comuns.
+"""
+import json
+import re
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+TABLE = 'transactions_transaction'
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+_PARTITION_NAME = re.compile(rf'^{TABLE}_p(\d{{4}})_(\d{{2}})$')
+
+
+def month_floor(value):
+    """Primeiro dia do mês (UTC) de uma data ou datetime"""
+    if isinstance(value, datetime):
+        value = value.astimezone(dt_timezone.utc) if timezone.is_aware(value) else value
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y_%m}'
+
+
+def partition_bounds(month):
+    """Limites [início, fim) da partição, em UTC"""
+    return f'{month:%Y-%m-%d} 00:00:00+00', f'{add_months(month, 1):%Y-%m-%d} 00:00:00+00'
+
+
+def create_partition_sql(month, table=TABLE):
+    start, end = partition_bounds(month)
+    return (
+        f'CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {table} '
+        f"FOR VALUES FROM ('{start}') TO ('{end}')"
+    )
+
+
+def is_partitioned(using=None):
+    using = using or connection
+    if using.vendor != 'postgresql':
+        return False
+    with using.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)', [TABLE])
+        row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def list_partitions():
+    """Partições mensais anexadas: {mês: nome}, em ordem cronológica"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(%s)
+            """,
+            [TABLE]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = {}
+    for name in names:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return dict(sorted(partitions.items()))
+
+
+def _create_partition(cursor, month):
+    start, end = partition_bounds(month)
+    cursor.execute(
+        f'SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s)',
+        [start, end]
+    )
+    if not cursor.fetchone()[0]:
+        cursor.execute(create_partition_sql(month))
+        return
+
+    # Linhas do mês já caíram na DEFAULT: a nova partição só pode ser criada
+    # com elas fora dali, então a DEFAULT sai, as linhas migram e ela volta
+    cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {DEFAULT_PARTITION}')
+    cursor.execute(create_partition_sql(month))
+    cursor.execute(
+        f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s RETURNING *
+        )
+        INSERT INTO {partition_name(month)} SELECT * FROM moved
+        """,
+        [start, end]
+    )
+    cursor.execute(f'ALTER TABLE {TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT')
+
+
+def ensure_partitions(until, since=None):
+    """
+    Cria as partições mensais ausentes de `since` (padrão: mês atual) até o
+    mês de `until`, inclusive. Retorna os nomes criados.
+    """
+    month = month_floor(since or timezone.now())
+    last = month_floor(until)
+    existing = list_partitions()
+
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        while month <= last:
+            if month not in existing:
+                _create_partition(cursor, month)
+                created.append(partition_name(month))
+            month = add_months(month, 1)
+    return created
+
+
+def detach_partitions(before):
+    """
+    Desanexa as partições de meses anteriores a `before`. As tabelas ficam
+    no banco, fora das consultas da aplicação.
+
+    Só partições vazias saem: linhas ainda não arquivadas (ver
+    archive_transactions) continuam referenciadas pelos lançamentos e pela
+    fila de pendentes, então a partição é mantida. Retorna (desanexadas,
+    mantidas).
+    """
+    limit = month_floor(before)
+    detached, kept = [], []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for month, name in list_partitions().items():
+            if month >= limit:
+                continue
+            # Bloqueia novas escritas até o DETACH, que também a bloquearia
+            cursor.execute(f'LOCK TABLE {name} IN SHARE MODE')
+            cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {name})')
+            if cursor.fetchone()[0]:
+                kept.append(name)
+                continue
+            cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {name}')
+            detached.append(name)
+    return detached, kept
+
+
+def _relations(plan):
+    name = plan.get('Relation Name')
+    if name:
+        yield name
+    for child in plan.get('Plans', []):
+        yield from _relations(child)
+
+
+def scanned_partitions(queryset):
+    """Partições lidas pelo plano da consulta (EXPLAIN), para verificar a poda"""
+    plan = json.loads(queryset.explain(format='json'))
+    return sorted({
+        name for name in _relations(plan[0]['Plan'])
+        if name == DEFAULT_PARTITION or _PARTITION_NAME.match(name)
+    })
@@ -0,0 +1,51 @@
+import csv
+import json
+
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer
+
+EXPORT_FIELDS = [
+    'id', 'transaction_type', 'status', 'sender__email', 'recipient__email',
+    'amount', 'description', 'created_at', 'updated_at',
+]
+
+EXPORT_COLUMNS = [field.replace('__', '_') for field in EXPORT_FIELDS]
+
+
+class _Echo:
+    """Buffer que apenas devolve o que o csv.writer escreve"""
+    def write(self, value):
+        return value
+
+
+def _format_value(value):
+    if hasattr(value, 'tzinfo'):
+        return timezone.localtime(value).isoformat()
+    if value is None:
+        return None
+    return value if isinstance(value, (int, str)) else str(value)
+
+
+class CSVStreamRenderer(BaseRenderer):
+    """Exportação em CSV; as linhas são geradas por stream(), não por render()"""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def stream(self, rows):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(EXPORT_COLUMNS)
+        for row in rows:
+            yield writer.writerow(['' if value is None else _format_value(value) for value in row])
+
+
+class NDJSONStreamRenderer(BaseRenderer):
+    """Exportação em JSON delimitado por linhas (um objeto por transação)"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def stream(self, rows):
+        for row in rows:
+            item = dict(zip(EXPORT_COLUMNS, map(_format_value, row)))
+            yield json.dumps(item, ensure_ascii=False, separators=(',', ':')) + '\n'
@@ -1,13 +1,17 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from decimal import Decimal
 
 from .models import Transaction
-from wallets.models import Wallet
+from core.identity_map import get_identity_map
+from core.metrics import measure_serialization
+from core.serializers import MeasuredSerializerMixin
 
 User = get_user_model()
 
-class UserBasicSerializer(serializers.ModelSerializer):
+class UserBasicSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
     """Serializer simplificado para informações básicas do usuário"""
     full_name = serializers.SerializerMethodField()
     
@@ -18,7 +22,7 @@ class UserBasicSerializer(serializers.ModelSerializer):
     def get_full_name(self, obj):
         return f"{obj.first_name} {obj.last_name}" if obj.first_name else obj.username
 
-class TransactionSerializer(serializers.ModelSerializer):
+class TransactionSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
     """Serializer para exibição de transações"""
     sender = UserBasicSerializer(read_only=True)
     recipient = UserBasicSerializer(read_only=True)
@@ -30,10 +34,71 @@ class TransactionSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'transaction_type', 'transaction_type_display', 
             'status', 'status_display', 'sender', 'recipient',
-            'amount', 'description', 'created_at', 'updated_at'
+            'amount', 'description', 'failure_reason', 'created_at', 'updated_at'
         ]
         read_only_fields = fields
 
+class TransactionRowSerializer:
+    """
+    Caminho rápido, somente leitura, para listagens: produz a mesma
+    representação do TransactionSerializer a partir de linhas de values()
+    (ver LIST_FIELDS), sem instâncias de modelo ou de serializer por linha.
+    Os nomes de tipo e status são resolvidos uma vez por instância.
+    """
+    LIST_FIELDS = (
+        'id', 'transaction_type', 'status', 'amount', 'description', 'failure_reason',
+        'created_at', 'updated_at',
+        'sender_id', 'sender__email', 'sender__first_name', 'sender__last_name', 'sender__username',
+        'recipient_id', 'recipient__email', 'recipient__first_name', 'recipient__last_name',
+        'recipient__username',
+    )
+    
+    def __init__(self):
+        self.type_names = {value: str(label) for value, label in Transaction.TRANSACTION_TYPES}
+        self.status_names = {value: str(label) for value, label in Transaction.TRANSACTION_STATUS}
+        self.timezone = timezone.get_current_timezone()
+    
+    @classmethod
+    def rows(cls, queryset):
+        return queryset.values(*cls.LIST_FIELDS)
+    
+    def _datetime(self, value):
+        if not value:
+            return None
+        value = value.astimezone(self.timezone).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    
+    def _user(self, row, prefix):
+        user_id = row[f'{prefix}_id']
+        if user_id is None:
+            return None
+        first_name = row[f'{prefix}__first_name']
+        return {
+            'id': user_id,
+            'email': row[f'{prefix}__email'],
+            'full_name': f"{first_name} {row[f'{prefix}__last_name']}" if first_name else row[f'{prefix}__username'],
+        }
+    
+    def to_representation(self, row):
+        return {
+            'id': row['id'],
+            'transaction_type': row['transaction_type'],
+            'transaction_type_display': self.type_names.get(row['transaction_type'], row['transaction_type']),
+            'status': row['status'],
+            'status_display': self.status_names.get(row['status'], row['status']),
+            'sender': self._user(row, 'sender'),
+            'recipient': self._user(row, 'recipient'),
+            'amount': '{:f}'.format(row['amount'].quantize(Decimal('0.01'))),
+            'description': row['description'],
+            'failure_reason': row['failure_reason'],
+            'created_at': self._datetime(row['created_at']),
+            'updated_at': self._datetime(row['updated_at']),
+        }
+    
+    def many(self, rows):
+        with measure_serialization():
+            return [self.to_representation(row) for row in rows]
+
 class TransferSerializer(serializers.Serializer):
     """Serializer para transferências entre usuários"""
     recipient_email = serializers.EmailField(write_only=True)
@@ -49,12 +114,12 @@ class TransferSerializer(serializers.Serializer):
     )
     
     def validate_recipient_email(self, value):
-        try:
-            recipient = User.objects.get(email=value)
-        except User.DoesNotExist:
+        request = self.context['request']
+        recipient = get_identity_map(request).get_user_by_email(value)
+        if recipient is None:
             raise serializers.ValidationError("Usuário destinatário não encontrado.")
         
-        sender = self.context['request'].user
+        sender = request.user
         if recipient.id == sender.id:
             raise serializers.ValidationError("Você não pode transferir para si mesmo.")
         
@@ -64,16 +129,41 @@ class TransferSerializer(serializers.Serializer):
         if value <= 0:
             raise serializers.ValidationError("O valor da transferência deve ser maior que zero.")
         
-        sender = self.context['request'].user
-        try:
-            sender_wallet = Wallet.objects.get(user=sender)
-            if sender_wallet.balance < value:
-                raise serializers.ValidationError("Saldo insuficiente para esta transferência.")
-        except Wallet.DoesNotExist:
+        request = self.context['request']
+        sender_wallet = get_identity_map(request).get_wallet(request.user)
+        if sender_wallet is None:
             raise serializers.ValidationError("Você não possui uma carteira ativa.")
+        if sender_wallet.total_balance < value:
+            raise serializers.ValidationError("Saldo insuficiente para esta transferência.")
             
         return value 
 
+class BatchTransferItemSerializer(serializers.Serializer):
+    """Item de uma transferência em lote; destinatário e saldo são validados pelo serviço"""
+    recipient_email = serializers.EmailField()
+    amount = serializers.DecimalField(
+        max_digits=15, 
+        decimal_places=2, 
+        min_value=Decimal('0.01')
+    )
+    description = serializers.CharField(
+        max_length=255, 
+        required=False, 
+        allow_blank=True
+    )
+
+class BatchTransferSerializer(serializers.Serializer):
+    """Serializer para transferências em lote (ex.: folha de pagamento)"""
+    transfers = BatchTransferItemSerializer(many=True, allow_empty=False)
+    
+    def validate_transfers(self, value):
+        max_items = settings.TRANSFER_BATCH_MAX_ITEMS
+        if len(value) > max_items:
+            raise serializers.ValidationError(
+                f"O lote pode conter no máximo {max_items} transferências."
+            )
+        return value
+
 class WithdrawalSerializer(serializers.Serializer):
     """Serializer para saques"""
     amount = serializers.DecimalField(
@@ -91,12 +181,47 @@ class WithdrawalSerializer(serializers.Serializer):
         if value <= 0:
             raise serializers.ValidationError("O valor do saque deve ser maior que zero.")
         
-        user = self.context['request'].user
-        try:
-            wallet = Wallet.objects.get(user=user)
-            if wallet.balance < value:
-                raise serializers.ValidationError("Saldo insuficiente para este saque.")
-        except Wallet.DoesNotExist:
+        request = self.context['request']
+        wallet = get_identity_map(request).get_wallet(request.user)
+        if wallet is None:
             raise serializers.ValidationError("Você não possui uma carteira ativa.")
+        if wallet.total_balance < value:
+            raise serializers.ValidationError("Saldo insuficiente para este saque.")
             
-        return value 
\ No newline at end of file
+        return value 
+
+class StatementQuerySerializer(serializers.Serializer):
+    """Parâmetros do extrato: período (start_date, end_date]"""
+    start_date = serializers.DateTimeField()
+    end_date = serializers.DateTimeField(required=False)
+    
+    def validate(self, attrs):
+        attrs.setdefault('end_date', timezone.now())
+        if attrs['start_date'] > attrs['end_date']:
+            raise serializers.ValidationError("A data inicial deve ser anterior à data final.")
+        return attrs
+
+class StatementSerializer(MeasuredSerializerMixin, serializers.Serializer):
+    """Serializer para o extrato calculado a partir do livro-razão"""
+    start_date = serializers.DateTimeField()
+    end_date = serializers.DateTimeField()
+    opening_balance = serializers.DecimalField(max_digits=15, decimal_places=2)
+    closing_balance = serializers.DecimalField(max_digits=15, decimal_places=2)
+    total_debits = serializers.DecimalField(max_digits=20, decimal_places=2)
+    total_credits = serializers.DecimalField(max_digits=20, decimal_places=2)
+
+
+class SummaryQuerySerializer(serializers.Serializer):
+    """Filtro opcional de meses para o resumo"""
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+class TransactionSummarySerializer(MeasuredSerializerMixin, serializers.Serializer):
+    """Totais de um mês e tipo, enviados e recebidos"""
+    month = serializers.DateField(format='%Y-%m')
+    transaction_type = serializers.CharField()
+    transaction_type_display = serializers.CharField()
+    sent_total = serializers.DecimalField(max_digits=20, decimal_places=2)
+    sent_count = serializers.IntegerField()
+    received_total = serializers.DecimalField(max_digits=20, decimal_places=2)
+    received_count = serializers.IntegerField()
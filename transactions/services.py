@@ -0,0 +1,520 @@
+import logging
+import random
+import threading
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection, transaction
+from django.db.models import Case, F, Sum, When
+from django.utils import timezone
+
+from core.exceptions import (
+    BadRequestException, BaseAPIException, ConflictException, InsufficientFundsException,
+    NotFoundException
+)
+from wallets.cache import invalidate_wallet_cache
+from wallets.models import Wallet, WalletShard
+from . import events, ledger, summaries
+from .models import LedgerEntry, Transaction
+
+User = get_user_model()
+
+logger = logging.getLogger('digital_wallet')
+
+# SQLSTATE de deadlock e de falha de serialização no PostgreSQL
+RETRYABLE_SQLSTATES = {'40P01', '40001'}
+MAX_RETRIES = 3
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_retry_stats():
+    """Contadores do processo atual: deadlocks, falhas de serialização e conflitos (409)"""
+    with _stats_lock:
+        return {
+            'deadlocks': _stats['deadlocks'],
+            'serialization_failures': _stats['serialization_failures'],
+            'retries': _stats['retries'],
+            'conflicts': _stats['conflicts'],
+        }
+
+
+def _is_retryable(exc):
+    return getattr(exc.__cause__, 'pgcode', None) in RETRYABLE_SQLSTATES
+
+
+def run_with_retry(operation, *args, **kwargs):
+    """
+    Executa uma operação transacional, repetindo em caso de deadlock ou
+    falha de serialização. Dentro de um bloco atômico externo a transação
+    inteira já foi abortada: o erro é propagado sem alteração para que quem
+    abriu o bloco o repita por inteiro (ver core.idempotency).
+    """
+    for attempt in range(1, MAX_RETRIES + 1):
+        try:
+            return operation(*args, **kwargs)
+        except OperationalError as exc:
+            if not _is_retryable(exc) or connection.in_atomic_block:
+                raise
+            _count('deadlocks' if exc.__cause__.pgcode == '40P01' else 'serialization_failures')
+            logger.warning('Conflito de bloqueio em %s (tentativa %d)', operation.__name__, attempt)
+            if attempt == MAX_RETRIES:
+                _count('conflicts')
+                raise ConflictException(
+                    "Operação em conflito com outra movimentação. Tente novamente."
+                ) from exc
+            _count('retries')
+
+
+def lock_wallets(user_ids, skip_sharded=()):
+    """
+    Bloqueia as carteiras dos usuários em uma única instrução.
+
+    As linhas são sempre travadas na ordem do id da carteira, de modo que
+    transferências em sentidos opostos (A→B e B→A) não formem deadlock.
+    Carteiras fragmentadas dos usuários em `skip_sharded` (destinatários
+    que só recebem crédito) não são bloqueadas nem retornadas.
+
+    Toda transação bloqueia carteiras antes de qualquer sub-saldo.
+    """
+    wallets = Wallet.objects.select_for_update().filter(user_id__in=user_ids)
+    if skip_sharded:
+        wallets = wallets.exclude(user_id__in=skip_sharded, shard_count__gt=0)
+    return {wallet.user_id: wallet for wallet in wallets.order_by('id')}
+
+
+def _update_balance(user, operator, amount, guarded=False):
+    table = connection.ops.quote_name(Wallet._meta.db_table)
+    sql = f'UPDATE {table} SET balance = balance {operator} %s, updated_at = %s WHERE user_id = %s'
+    params = [amount, connection.ops.adapt_datetimefield_value(timezone.now()), user.pk]
+    if guarded:
+        sql += ' AND balance >= %s'
+        params.append(amount)
+    sql += ' RETURNING *'
+
+    wallets = list(Wallet.objects.raw(sql, params))
+    if not wallets:
+        return None
+
+    wallet = wallets[0]
+    wallet.user = user
+    return wallet
+
+
+def debit_wallet(user, amount):
+    """
+    Debita a carteira com um único UPDATE condicional ao saldo.
+
+    Retorna a carteira já atualizada ou None quando a carteira não existe
+    ou o saldo não cobre o valor. Nenhum bloqueio é mantido além do
+    próprio UPDATE.
+    """
+    return _update_balance(user, '-', amount, guarded=True)
+
+
+def credit_wallet(user, amount):
+    """Credita a carteira com um único UPDATE; retorna None se ela não existir"""
+    return _update_balance(user, '+', amount)
+
+
+def credit_shard(wallet, amount):
+    """
+    Credita um sub-saldo sorteado da carteira fragmentada, sem bloquear a
+    linha da carteira. Se o sub-saldo deixou de existir (redução de
+    `shard_count` em andamento), o crédito vai para o saldo principal.
+    Retorna o índice creditado ou None.
+    """
+    index = random.randrange(wallet.shard_count)
+    updated = WalletShard.objects.filter(wallet_id=wallet.pk, index=index).update(
+        balance=F('balance') + amount, updated_at=timezone.now()
+    )
+    if updated:
+        return index
+    Wallet.objects.filter(pk=wallet.pk).update(
+        balance=F('balance') + amount, updated_at=timezone.now()
+    )
+    return None
+
+
+def sweep_shards(wallet, indexes=None):
+    """
+    Consolida os sub-saldos no saldo principal da carteira.
+
+    Deve ser chamado com a carteira já bloqueada; os sub-saldos são
+    travados em ordem de índice. Atualiza `wallet.balance` em memória e
+    retorna o valor movido.
+    """
+    shards = WalletShard.objects.select_for_update().filter(wallet_id=wallet.pk, balance__gt=0)
+    if indexes is not None:
+        shards = shards.filter(index__in=indexes)
+    shards = list(shards.order_by('index'))
+    swept = sum((shard.balance for shard in shards), Decimal('0.00'))
+    if not swept:
+        return swept
+
+    now = timezone.now()
+    WalletShard.objects.filter(pk__in=[shard.pk for shard in shards]).update(
+        balance=Decimal('0.00'), updated_at=now
+    )
+    Wallet.objects.filter(pk=wallet.pk).update(balance=F('balance') + swept, updated_at=now)
+    wallet.balance += swept
+    return swept
+
+
+def _ensure_funds(wallet, amount):
+    """Verifica o saldo do pagador, consolidando os sub-saldos se necessário"""
+    if wallet.balance < amount and wallet.shard_count:
+        sweep_shards(wallet)
+    return wallet.balance >= amount
+
+
+def configure_shards(user, shard_count):
+    """
+    Ativa, redimensiona ou desativa (shard_count=0) o modo fragmentado.
+
+    Os sub-saldos são consolidados no saldo principal e os excedentes
+    removidos; os demais saldos e a API permanecem inalterados.
+    """
+    with transaction.atomic():
+        wallets = lock_wallets([user.pk])
+        wallet = wallets.get(user.pk)
+        if wallet is None:
+            raise NotFoundException("Carteira não encontrada.")
+
+        # Trava todos os sub-saldos, inclusive os zerados (que sweep_shards
+        # ignora): um crédito concorrente em um sub-saldo a remover esperaria
+        # o DELETE e seria apagado junto com o valor creditado
+        list(WalletShard.objects.select_for_update().filter(wallet=wallet).order_by('index').values_list('pk'))
+        sweep_shards(wallet)
+        removed = WalletShard.objects.filter(wallet=wallet, index__gte=shard_count)
+        leftover = removed.aggregate(total=Sum('balance'))['total']
+        removed.delete()
+        if leftover:
+            Wallet.objects.filter(pk=wallet.pk).update(balance=F('balance') + leftover, updated_at=timezone.now())
+            wallet.balance += leftover
+        WalletShard.objects.bulk_create(
+            [WalletShard(wallet=wallet, index=index) for index in range(shard_count)],
+            ignore_conflicts=True
+        )
+        wallet.shard_count = shard_count
+        wallet.save(update_fields=['shard_count', 'updated_at'])
+    return wallet
+
+
+def _save_completed(pending, **fields):
+    """Grava a transação concluída ou conclui a pendente reivindicada pelo worker"""
+    if pending is None:
+        return Transaction.objects.create(status=Transaction.COMPLETED, **fields)
+    pending.status = Transaction.COMPLETED
+    pending.save(update_fields=['status', 'updated_at'])
+    return pending
+
+
+def _transfer(sender, recipient, amount, description, pending=None):
+    with transaction.atomic():
+        wallets = lock_wallets([sender.pk, recipient.pk], skip_sharded=[recipient.pk])
+
+        sender_wallet = wallets.get(sender.pk)
+        if sender_wallet is None:
+            raise NotFoundException("Você não possui uma carteira ativa.")
+
+        if not _ensure_funds(sender_wallet, amount):
+            raise InsufficientFundsException("Saldo insuficiente para esta transferência.")
+
+        recipient_wallet = wallets.get(recipient.pk)
+        if recipient_wallet is None:
+            # A carteira recém-criada já fica bloqueada pela própria inserção;
+            # uma carteira fragmentada existente é lida sem bloqueio
+            recipient_wallet, created = Wallet.objects.get_or_create(user=recipient)
+
+        shards = {}
+        if recipient_wallet.shard_count:
+            Wallet.objects.filter(pk=sender_wallet.pk).update(
+                balance=F('balance') - amount, updated_at=timezone.now()
+            )
+            shards[recipient.pk] = credit_shard(recipient_wallet, amount)
+        else:
+            # Débito e crédito aplicados pelo banco em uma única instrução
+            Wallet.objects.filter(pk__in=[sender_wallet.pk, recipient_wallet.pk]).update(
+                balance=Case(
+                    When(pk=sender_wallet.pk, then=F('balance') - amount),
+                    default=F('balance') + amount,
+                ),
+                updated_at=timezone.now(),
+            )
+        invalidate_wallet_cache([sender.pk, recipient.pk])
+
+        transaction_obj = _save_completed(
+            pending,
+            transaction_type=Transaction.TRANSFER,
+            sender=sender,
+            recipient=recipient,
+            amount=amount,
+            description=description
+        )
+        entries = LedgerEntry.objects.bulk_create(
+            ledger.entries_for(transaction_obj, sender_wallet.pk, recipient_wallet.pk)
+        )
+        summaries.record([transaction_obj], shards)
+        events.record(entries)
+        return transaction_obj
+
+
+def transfer(sender, recipient, amount, description=''):
+    """Transfere `amount` da carteira de `sender` para a de `recipient`"""
+    return run_with_retry(_transfer, sender, recipient, amount, description)
+
+
+def _batch_transfer(sender, items):
+    # Todos os destinatários resolvidos em uma única consulta
+    emails = {item['recipient_email'] for item in items}
+    recipients = {user.email: user for user in User.objects.filter(email__in=emails)}
+
+    results = []
+    accepted = []
+    for index, item in enumerate(items):
+        result = {
+            'index': index,
+            'recipient_email': item['recipient_email'],
+            'amount': item['amount'],
+        }
+        recipient = recipients.get(item['recipient_email'])
+        if recipient is None:
+            result.update(status=Transaction.FAILED, error="Usuário destinatário não encontrado.")
+        elif recipient.pk == sender.pk:
+            result.update(status=Transaction.FAILED, error="Você não pode transferir para si mesmo.")
+        else:
+            accepted.append((result, recipient, item))
+        results.append(result)
+
+    if not accepted:
+        return results
+
+    credits = defaultdict(Decimal)
+    for result, recipient, item in accepted:
+        credits[recipient.pk] += item['amount']
+    total = sum(credits.values())
+
+    with transaction.atomic():
+        wallets = lock_wallets([sender.pk, *credits], skip_sharded=list(credits))
+
+        sender_wallet = wallets.get(sender.pk)
+        if sender_wallet is None:
+            raise NotFoundException("Você não possui uma carteira ativa.")
+
+        if not _ensure_funds(sender_wallet, total):
+            raise InsufficientFundsException("Saldo insuficiente para este lote de transferências.")
+
+        missing = [user_id for user_id in credits if user_id not in wallets]
+        if missing:
+            # Carteiras recém-inseridas ficam bloqueadas pela própria inserção;
+            # as que já existem aqui são fragmentadas e seguem sem bloqueio
+            Wallet.objects.bulk_create(
+                [Wallet(user_id=user_id) for user_id in missing], ignore_conflicts=True
+            )
+            wallets.update(
+                (wallet.user_id, wallet)
+                for wallet in Wallet.objects.filter(user_id__in=missing)
+            )
+
+        now = timezone.now()
+        sharded = {}
+        sender_wallet.balance = F('balance') - total
+        sender_wallet.updated_at = now
+        for user_id, amount in credits.items():
+            if wallets[user_id].shard_count:
+                sharded[user_id] = amount
+                continue
+            wallets[user_id].balance = F('balance') + amount
+            wallets[user_id].updated_at = now
+        Wallet.objects.bulk_update(
+            [wallet for user_id, wallet in wallets.items() if user_id not in sharded],
+            ['balance', 'updated_at'],
+            batch_size=1000
+        )
+        # Um sub-saldo por carteira, em ordem de id, depois de todas as carteiras
+        shards = {
+            user_id: credit_shard(wallets[user_id], sharded[user_id])
+            for user_id in sorted(sharded, key=lambda user_id: wallets[user_id].pk)
+        }
+        invalidate_wallet_cache(wallets.keys())
+
+        created = Transaction.objects.bulk_create([
+            Transaction(
+                transaction_type=Transaction.TRANSFER,
+                status=Transaction.COMPLETED,
+                sender=sender,
+                recipient=recipient,
+                amount=item['amount'],
+                description=item.get('description', '')
+            )
+            for result, recipient, item in accepted
+        ], batch_size=1000)
+        entries = LedgerEntry.objects.bulk_create([
+            entry
+            for transaction_obj in created
+            for entry in ledger.entries_for(
+                transaction_obj, sender_wallet.pk, wallets[transaction_obj.recipient_id].pk
+            )
+        ], batch_size=2000)
+        summaries.record(created, shards)
+        events.record(entries)
+
+    for (result, recipient, item), transaction_obj in zip(accepted, created):
+        result.update(status=Transaction.COMPLETED, transaction_id=transaction_obj.pk)
+    return results
+
+
+def batch_transfer(sender, items):
+    """
+    Executa várias transferências do mesmo remetente em uma única transação.
+
+    Destinatários inexistentes são reportados item a item e ignorados; o
+    saldo do remetente é verificado contra o total do lote, que é aplicado
+    integralmente ou rejeitado. Retorna um resultado por item, na ordem
+    recebida.
+    """
+    return run_with_retry(_batch_transfer, sender, items)
+
+
+def _deposit(user, amount, description):
+    with transaction.atomic():
+        wallet = credit_wallet(user, amount)
+        if wallet is None:
+            Wallet.objects.get_or_create(user=user)
+            wallet = credit_wallet(user, amount)
+        invalidate_wallet_cache([user.pk])
+
+        transaction_obj = Transaction.objects.create(
+            transaction_type=Transaction.DEPOSIT,
+            status=Transaction.COMPLETED,
+            sender=None,  # Depósito não tem remetente
+            recipient=user,
+            amount=amount,
+            description=description
+        )
+        entries = LedgerEntry.objects.bulk_create(ledger.entries_for(transaction_obj, None, wallet.pk))
+        summaries.record([transaction_obj])
+        events.record(entries)
+    return wallet, transaction_obj
+
+
+def deposit(user, amount, description=''):
+    """Deposita `amount` na carteira do usuário, retornando (carteira, transação)"""
+    return run_with_retry(_deposit, user, amount, description)
+
+
+def _withdraw(user, amount, description, pending=None):
+    with transaction.atomic():
+        wallet = debit_wallet(user, amount)
+        if wallet is None:
+            wallet = Wallet.objects.select_for_update().filter(user=user).first()
+            if wallet is None:
+                raise NotFoundException("Carteira não encontrada.")
+            if not _ensure_funds(wallet, amount):
+                raise InsufficientFundsException("Saldo insuficiente para realizar o saque.")
+            wallet = debit_wallet(user, amount)
+        invalidate_wallet_cache([user.pk])
+
+        transaction_obj = _save_completed(
+            pending,
+            transaction_type=Transaction.WITHDRAWAL,
+            sender=user,
+            recipient=None,  # Saque não tem destinatário
+            amount=amount,
+            description=description
+        )
+        entries = LedgerEntry.objects.bulk_create(ledger.entries_for(transaction_obj, wallet.pk, None))
+        summaries.record([transaction_obj])
+        events.record(entries)
+    return wallet, transaction_obj
+
+
+def withdraw(user, amount, description=''):
+    """Saca `amount` da carteira do usuário, retornando (carteira, transação)"""
+    return run_with_retry(_withdraw, user, amount, description)
+
+
+def enqueue_transfer(sender, recipient, amount, description=''):
+    """Registra a transferência como pendente para o processamento assíncrono"""
+    return Transaction.objects.create(
+        transaction_type=Transaction.TRANSFER,
+        status=Transaction.PENDING,
+        sender=sender,
+        recipient=recipient,
+        amount=amount,
+        description=description
+    )
+
+
+def enqueue_withdrawal(user, amount, description=''):
+    """Registra o saque como pendente para o processamento assíncrono"""
+    return Transaction.objects.create(
+        transaction_type=Transaction.WITHDRAWAL,
+        status=Transaction.PENDING,
+        sender=user,
+        recipient=None,
+        amount=amount,
+        description=description
+    )
+
+
+def _complete_pending(transaction_obj):
+    if transaction_obj.transaction_type == Transaction.TRANSFER:
+        _transfer(
+            transaction_obj.sender, transaction_obj.recipient, transaction_obj.amount,
+            transaction_obj.description, pending=transaction_obj
+        )
+    elif transaction_obj.transaction_type == Transaction.WITHDRAWAL:
+        _withdraw(
+            transaction_obj.sender, transaction_obj.amount,
+            transaction_obj.description, pending=transaction_obj
+        )
+    else:
+        raise BadRequestException("Tipo de transação não suportado no processamento assíncrono.")
+
+
+def process_pending(batch_size=100):
+    """
+    Reivindica até `batch_size` transações pendentes e as conclui.
+
+    As linhas são travadas com SELECT ... FOR UPDATE SKIP LOCKED, então
+    vários workers esvaziam a fila em paralelo sem disputar as mesmas
+    transações. Cada item roda em um savepoint: erros de negócio marcam a
+    transação como FAILED e conflitos de bloqueio a deixam pendente para a
+    próxima rodada. Os bloqueios de carteira duram até o fim do lote, por
+    isso lotes menores reduzem a contenção. Retorna (concluídas, falhas,
+    adiadas).
+    """
+    completed = failed = deferred = 0
+    with transaction.atomic():
+        claimed = list(
+            Transaction.objects.select_for_update(skip_locked=True, of=('self',))
+            .filter(status=Transaction.PENDING)
+            .select_related('sender', 'recipient')
+            .order_by('created_at', 'id')[:batch_size]
+        )
+        for transaction_obj in claimed:
+            try:
+                with transaction.atomic():
+                    _complete_pending(transaction_obj)
+                completed += 1
+            except BaseAPIException as e:
+                transaction_obj.status = Transaction.FAILED
+                transaction_obj.failure_reason = e.message
+                transaction_obj.save(update_fields=['status', 'failure_reason', 'updated_at'])
+                failed += 1
+            except OperationalError as exc:
+                if not _is_retryable(exc):
+                    raise
+                _count('deadlocks' if exc.__cause__.pgcode == '40P01' else 'serialization_failures')
+                logger.warning('Conflito de bloqueio na transação pendente %s', transaction_obj.pk)
+                deferred += 1
+    return completed, failed, deferred
@@ -0,0 +1,117 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Transaction, TransactionHistory, TransactionSummary
+
+UPSERT_BATCH_SIZE = 500
+
+
+def month_of(moment):
+    """Primeiro dia do mês de `moment` no fuso horário do projeto (como TruncMonth)"""
+    return timezone.localtime(moment).date().replace(day=1)
+
+
+def _increments(transactions, shards):
+    increments = defaultdict(lambda: [Decimal('0.00'), 0])
+    for transaction_obj in transactions:
+        month = month_of(transaction_obj.created_at)
+        recipient_shard = shards.get(transaction_obj.recipient_id) or 0
+        legs = [
+            (transaction_obj.sender_id, TransactionSummary.SENT, 0),
+            (transaction_obj.recipient_id, TransactionSummary.RECEIVED, recipient_shard),
+        ]
+        for user_id, direction, shard in legs:
+            if user_id is None:
+                continue
+            key = (user_id, month, transaction_obj.transaction_type, direction, shard)
+            increments[key][0] += transaction_obj.amount
+            increments[key][1] += 1
+    return increments
+
+
+def record(transactions, shards=None):
+    """
+    Soma transações concluídas aos resumos mensais com INSERT ... ON CONFLICT.
+
+    Deve ser chamado dentro da transação que conclui as movimentações. As
+    linhas são gravadas em ordem de chave para que lotes concorrentes
+    bloqueiem os resumos sempre na mesma ordem. `shards` mapeia o id do
+    destinatário ao sub-saldo creditado, quando a carteira é fragmentada.
+    """
+    increments = _increments(transactions, shards or {})
+    if not increments:
+        return
+
+    ops = connection.ops
+    table = ops.quote_name(TransactionSummary._meta.db_table)
+    key_columns = ', '.join(map(ops.quote_name, ['user_id', 'month', 'transaction_type', 'direction', 'shard']))
+    total, count = ops.quote_name('total_amount'), ops.quote_name('count')
+    rows = sorted(increments.items())
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        batch = rows[start:start + UPSERT_BATCH_SIZE]
+        params = []
+        for (user_id, month, transaction_type, direction, shard), (amount, quantity) in batch:
+            params += [
+                user_id, ops.adapt_datefield_value(month), transaction_type, direction, shard,
+                ops.adapt_decimalfield_value(amount, 20, 2), quantity,
+            ]
+        values = ', '.join(['(%s, %s, %s, %s, %s, %s, %s)'] * len(batch))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} ({key_columns}, {total}, {count}) VALUES {values} '
+                f'ON CONFLICT ({key_columns}) DO UPDATE SET '
+                f'{total} = {table}.{total} + excluded.{total}, '
+                f'{count} = {table}.{count} + excluded.{count}',
+                params
+            )
+
+
+def lock_summaries():
+    """
+    Bloqueia a tabela de resumos contra gravações até o fim da transação.
+
+    SHARE ROW EXCLUSIVE conflita com o ROW EXCLUSIVE de record(): movimentações
+    que já gravaram seus resumos são aguardadas (e entram na agregação feita
+    em seguida), as demais esperam o recálculo terminar para somar os seus.
+    """
+    if connection.vendor != 'postgresql':
+        return
+    table = connection.ops.quote_name(TransactionSummary._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE')
+
+
+def aggregate_for_users(user_ids):
+    """Recalcula os resumos dos usuários a partir do histórico, incluindo as transações arquivadas"""
+    completed = TransactionHistory.objects.filter(status=Transaction.COMPLETED).order_by()
+    month = TruncMonth('created_at', output_field=DateField())
+
+    summaries = []
+    legs = [
+        ('sender_id', TransactionSummary.SENT),
+        ('recipient_id', TransactionSummary.RECEIVED),
+    ]
+    for field, direction in legs:
+        rows = (
+            completed.filter(**{f'{field}__in': user_ids})
+            .annotate(month=month)
+            .values(field, 'month', 'transaction_type')
+            .annotate(total=Sum('amount'), total_count=Count('id'))
+        )
+        summaries += [
+            TransactionSummary(
+                user_id=row[field],
+                month=row['month'],
+                transaction_type=row['transaction_type'],
+                direction=direction,
+                total_amount=row['total'],
+                count=row['total_count']
+            )
+            for row in rows
+        ]
+    return summaries
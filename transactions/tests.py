@@ -1,11 +1,31 @@
+import json
+from io import StringIO
 from decimal import Decimal
-from django.test import TestCase
+from unittest import mock
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from unittest import skipUnless
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import SimpleTestCase, TestCase, override_settings
 from django.urls import reverse
-from rest_framework.test import APIClient
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
-from wallets.models import Wallet
-from .models import Transaction
+from core.exceptions import InsufficientFundsException, NotFoundException
+from core.pagination import KeysetPagination
+from core.renderers import ORJSONRenderer
+from wallets.models import Wallet, WalletShard
+from django.db.models import F, Q
+from django.utils import timezone
+from . import archive, ledger, partitions, services
+from .models import ArchivedTransaction, BalanceSnapshot, LedgerEntry, Transaction, TransactionSummary
+from .serializers import TransactionSerializer
+from .views import TransactionListView
 
 User = get_user_model()
 
@@ -117,4 +137,885 @@ class TransactionAPITests(TestCase):
         
         # Verificar resposta
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data['results']), 2)  # Ambas as transações 
\ No newline at end of file
+        self.assertEqual(len(response.data['results']), 2)  # Ambas as transações 
+    def test_list_transactions_cursor_pagination(self):
+        for i in range(25):
+            Transaction.objects.create(
+                transaction_type=Transaction.TRANSFER,
+                status=Transaction.COMPLETED,
+                sender=self.user1,
+                recipient=self.user2,
+                amount=Decimal(i + 1),
+                description=f'Transação {i}'
+            )
+
+        self.client.force_authenticate(user=self.user1)
+
+        # Primeira página em modo cursor: sem contagem total
+        response = self.client.get(reverse('transactions:transaction-list'), {'cursor': ''})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        self.assertIsNone(response.data['previous'])
+        first_page = [item['id'] for item in response.data['results']]
+        self.assertEqual(len(first_page), 20)
+
+        # Segunda página pelo link opaco
+        response = self.client.get(response.data['next'])
+        second_page = [item['id'] for item in response.data['results']]
+        self.assertEqual(len(second_page), 5)
+        self.assertIsNone(response.data['next'])
+        self.assertFalse(set(first_page) & set(second_page))
+
+        # Voltar para a página anterior
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([item['id'] for item in response.data['results']], first_page)
+
+    def test_list_transactions_cursor_respects_ordering(self):
+        for amount in ['30.00', '10.00', '20.00']:
+            Transaction.objects.create(
+                transaction_type=Transaction.TRANSFER,
+                status=Transaction.COMPLETED,
+                sender=self.user1,
+                recipient=self.user2,
+                amount=Decimal(amount)
+            )
+
+        self.client.force_authenticate(user=self.user1)
+        url = reverse('transactions:transaction-list')
+
+        amounts = []
+        with mock.patch.object(KeysetPagination, 'page_size', 2):
+            response = self.client.get(url, {'cursor': '', 'ordering': 'amount'})
+            amounts += [item['amount'] for item in response.data['results']]
+            response = self.client.get(response.data['next'])
+            amounts += [item['amount'] for item in response.data['results']]
+        self.assertEqual(amounts, ['10.00', '20.00', '30.00'])
+
+        response = self.client.get(url, {'cursor': 'invalido'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_page_unions_sender_and_recipient_branches(self):
+        request = Request(APIRequestFactory().get(reverse('transactions:transaction-list'), {'cursor': ''}))
+        request.user = self.user1
+        view = TransactionListView(request=request, format_kwarg=None, args=(), kwargs={})
+
+        with mock.patch.object(connection.features, 'supports_slicing_ordering_in_compound', True):
+            queryset = KeysetPagination()._page_queryset(view.get_rows(Transaction), request, view)
+            sql = str(queryset.query)
+
+        # Cada ramo com o próprio ORDER BY ... LIMIT, sem OR entre remetente e destinatário
+        self.assertEqual(sql.count('UNION ALL'), 1)
+        self.assertEqual(sql.count('LIMIT 21'), 3)
+        self.assertNotIn(' OR ', sql)
+
+    @skipUnless(connection.vendor == 'postgresql', 'LIMIT nas partes do UNION requer PostgreSQL')
+    def test_cursor_pages_match_page_number_order(self):
+        for index in range(5):
+            services.transfer(self.user1, self.user2, Decimal('1.00'))
+            services.transfer(self.user2, self.user1, Decimal('2.00'))
+        self.client.force_authenticate(user=self.user1)
+        url = reverse('transactions:transaction-list')
+        expected = [item['id'] for item in self.client.get(url).data['results']]
+
+        ids = []
+        with mock.patch.object(KeysetPagination, 'page_size', 3):
+            response = self.client.get(url, {'cursor': ''})
+            while True:
+                ids += [item['id'] for item in response.data['results']]
+                if not response.data['next']:
+                    break
+                response = self.client.get(response.data['next'])
+        self.assertEqual(ids, expected)
+
+
+    def test_withdraw_funds_success(self):
+        self.client.force_authenticate(user=self.user1)
+
+        response = self.client.post(reverse('transactions:withdraw'), {'amount': '250.00'})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['new_balance'], Decimal('750.00'))
+        self.wallet1.refresh_from_db()
+        self.assertEqual(self.wallet1.balance, Decimal('750.00'))
+
+
+    def test_batch_transfer(self):
+        user3 = User.objects.create_user(
+            username='user3', email='user3@example.com', password='testpassword'
+        )
+        self.client.force_authenticate(user=self.user1)
+
+        data = {'transfers': [
+            {'recipient_email': 'user2@example.com', 'amount': '100.00'},
+            {'recipient_email': 'user3@example.com', 'amount': '50.00', 'description': 'Folha'},
+            {'recipient_email': 'user2@example.com', 'amount': '25.00'},
+            {'recipient_email': 'naoexiste@example.com', 'amount': '10.00'},
+            {'recipient_email': 'user1@example.com', 'amount': '10.00'},
+        ]}
+        response = self.client.post(reverse('transactions:transfer-batch'), data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['completed'], 3)
+        self.assertEqual(response.data['failed'], 2)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['completed', 'completed', 'completed', 'failed', 'failed']
+        )
+
+        self.wallet1.refresh_from_db()
+        self.wallet2.refresh_from_db()
+        self.assertEqual(self.wallet1.balance, Decimal('825.00'))
+        self.assertEqual(self.wallet2.balance, Decimal('625.00'))
+        self.assertEqual(Wallet.objects.get(user=user3).balance, Decimal('50.00'))
+        self.assertEqual(Transaction.objects.filter(sender=self.user1).count(), 3)
+
+    def test_batch_transfer_insufficient_funds(self):
+        self.client.force_authenticate(user=self.user1)
+
+        data = {'transfers': [
+            {'recipient_email': 'user2@example.com', 'amount': '600.00'},
+            {'recipient_email': 'user2@example.com', 'amount': '600.00'},
+        ]}
+        response = self.client.post(reverse('transactions:transfer-batch'), data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.wallet1.refresh_from_db()
+        self.assertEqual(self.wallet1.balance, Decimal('1000.00'))
+        self.assertFalse(Transaction.objects.exists())
+
+
+class TransferServiceTests(TestCase):
+    def setUp(self):
+        self.user1 = User.objects.create_user(
+            username='user1', email='user1@example.com', password='testpassword'
+        )
+        self.user2 = User.objects.create_user(
+            username='user2', email='user2@example.com', password='testpassword'
+        )
+        self.wallet1 = Wallet.objects.create(user=self.user1, balance=Decimal('100.00'))
+
+    def test_transfer_creates_recipient_wallet(self):
+        transaction_obj = services.transfer(self.user1, self.user2, Decimal('40.00'))
+
+        self.wallet1.refresh_from_db()
+        self.assertEqual(self.wallet1.balance, Decimal('60.00'))
+        self.assertEqual(Wallet.objects.get(user=self.user2).balance, Decimal('40.00'))
+        self.assertEqual(transaction_obj.status, Transaction.COMPLETED)
+
+    def test_transfer_rechecks_balance_under_lock(self):
+        with self.assertRaises(InsufficientFundsException):
+            services.transfer(self.user1, self.user2, Decimal('100.01'))
+
+        self.wallet1.refresh_from_db()
+        self.assertEqual(self.wallet1.balance, Decimal('100.00'))
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_withdraw_uses_guarded_debit(self):
+        wallet, transaction_obj = services.withdraw(self.user1, Decimal('100.00'))
+
+        self.assertEqual(wallet.balance, Decimal('0.00'))
+        self.assertEqual(transaction_obj.transaction_type, Transaction.WITHDRAWAL)
+
+        with self.assertRaises(InsufficientFundsException):
+            services.withdraw(self.user1, Decimal('0.01'))
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_withdraw_without_wallet(self):
+        with self.assertRaises(NotFoundException):
+            services.withdraw(self.user2, Decimal('1.00'))
+
+
+class TransactionQueryBudgetTests(TestCase):
+    """
+    Orçamento de consultas por endpoint de transactions.urls.
+
+    A autenticação é forçada no cliente, então os números não incluem a
+    carga do usuário pelo JWT. Savepoints contam como consultas em TestCase.
+    """
+    def setUp(self):
+        self.user1 = User.objects.create_user(
+            username='user1', email='user1@example.com', password='testpassword'
+        )
+        self.user2 = User.objects.create_user(
+            username='user2', email='user2@example.com', password='testpassword'
+        )
+        Wallet.objects.create(user=self.user1, balance=Decimal('1000.00'))
+        Wallet.objects.create(user=self.user2, balance=Decimal('500.00'))
+        for _ in range(3):
+            services.transfer(self.user1, self.user2, Decimal('1.00'))
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+
+    def test_list_budget(self):
+        url = reverse('transactions:transaction-list')
+        # COUNT + página
+        with self.assertNumQueries(2):
+            self.client.get(url)
+        # Modo cursor: página da tabela quente; como é mais curta que uma página
+        # inteira, ela é refeita na visão com o arquivo
+        with self.assertNumQueries(2):
+            self.client.get(url, {'cursor': ''})
+        with self.settings(TRANSACTION_ARCHIVE_AFTER_DAYS=0), self.assertNumQueries(1):
+            self.client.get(url, {'cursor': ''})
+
+    def test_transfer_budget(self):
+        data = {'recipient_email': 'user2@example.com', 'amount': '10.00'}
+        # destinatário + carteira do remetente + lock + update + transação + lançamentos + resumos
+        # + outbox + savepoint
+        with self.assertNumQueries(10):
+            response = self.client.post(reverse('transactions:transfer'), data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_batch_transfer_budget(self):
+        data = {'transfers': [
+            {'recipient_email': 'user2@example.com', 'amount': '1.00'}
+            for _ in range(50)
+        ]}
+        # Constante no tamanho do lote: destinatários + lock + update + transações + lançamentos
+        # + resumos + outbox + savepoint
+        with self.assertNumQueries(9):
+            response = self.client.post(reverse('transactions:transfer-batch'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_withdraw_budget(self):
+        # carteira (validação) + update condicional + transação + lançamentos + resumos + outbox + savepoint
+        with self.assertNumQueries(8):
+            response = self.client.post(reverse('transactions:withdraw'), {'amount': '10.00'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+
+class LedgerTests(TestCase):
+    def setUp(self):
+        self.user1 = User.objects.create_user(
+            username='user1', email='user1@example.com', password='testpassword'
+        )
+        self.user2 = User.objects.create_user(
+            username='user2', email='user2@example.com', password='testpassword'
+        )
+        self.wallet1 = Wallet.objects.create(user=self.user1)
+        self.wallet2 = Wallet.objects.create(user=self.user2)
+
+    def test_every_movement_is_balanced(self):
+        services.deposit(self.user1, Decimal('100.00'))
+        services.transfer(self.user1, self.user2, Decimal('30.00'))
+        services.withdraw(self.user2, Decimal('10.00'))
+
+        for transaction_obj in Transaction.objects.all():
+            entries = transaction_obj.ledger_entries.all()
+            self.assertEqual(len(entries), 2)
+            self.assertEqual({entry.entry_type for entry in entries}, {LedgerEntry.DEBIT, LedgerEntry.CREDIT})
+
+        now = timezone.now()
+        self.assertEqual(ledger.balance_at(self.wallet1.pk, now), Decimal('70.00'))
+        self.assertEqual(ledger.balance_at(self.wallet2.pk, now), Decimal('20.00'))
+
+    def test_snapshot_plus_delta_matches_full_history(self):
+        services.deposit(self.user1, Decimal('100.00'))
+        services.transfer(self.user1, self.user2, Decimal('40.00'))
+
+        self.assertEqual(ledger.compact(as_of=timezone.now()), 2)
+        snapshot = BalanceSnapshot.objects.get(wallet=self.wallet1)
+        self.assertEqual(snapshot.balance, Decimal('60.00'))
+
+        services.transfer(self.user1, self.user2, Decimal('15.00'))
+        ledger.compact(as_of=timezone.now())
+        services.deposit(self.user1, Decimal('5.00'))
+
+        result = ledger.statement(self.wallet1.pk, snapshot.as_of, timezone.now())
+        self.assertEqual(result['opening_balance'], Decimal('60.00'))
+        self.assertEqual(result['closing_balance'], Decimal('50.00'))
+        self.assertEqual(result['total_debits'], Decimal('15.00'))
+        self.assertEqual(result['total_credits'], Decimal('5.00'))
+
+    def test_late_committed_entry_is_compacted(self):
+        services.deposit(self.user1, Decimal('100.00'))
+        services.deposit(self.user2, Decimal('50.00'))
+        first = timezone.now()
+        ledger.compact(as_of=first)
+
+        services.deposit(self.user1, Decimal('1.00'))
+        second = timezone.now()
+        ledger.compact(as_of=second)
+        self.assertFalse(BalanceSnapshot.objects.filter(wallet=self.wallet2, as_of=second).exists())
+
+        # Lançamento anterior ao segundo corte confirmado depois dele
+        late = services.deposit(self.user2, Decimal('7.00'))[1]
+        LedgerEntry.objects.filter(transaction=late).update(created_at=second - timedelta(microseconds=1))
+        services.deposit(self.user2, Decimal('3.00'))
+        ledger.compact(as_of=timezone.now())
+
+        snapshot = BalanceSnapshot.objects.filter(wallet=self.wallet2).latest('as_of')
+        self.assertEqual(snapshot.balance, Decimal('60.00'))
+        self.assertEqual(ledger.balance_at(self.wallet2.pk, timezone.now()), Decimal('60.00'))
+
+    def test_statement_endpoint(self):
+        services.deposit(self.user1, Decimal('100.00'))
+        client = APIClient()
+        client.force_authenticate(user=self.user1)
+
+        response = client.get(reverse('transactions:statement'), {'start_date': '2000-01-01T00:00:00Z'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['opening_balance'], '0.00')
+        self.assertEqual(response.data['closing_balance'], '100.00')
+        self.assertEqual(response.data['total_credits'], '100.00')
+
+
+class TransactionExportTests(TestCase):
+    def setUp(self):
+        self.user1 = User.objects.create_user(
+            username='user1', email='user1@example.com', password='testpassword'
+        )
+        self.user2 = User.objects.create_user(
+            username='user2', email='user2@example.com', password='testpassword'
+        )
+        Wallet.objects.create(user=self.user1, balance=Decimal('100.00'))
+        services.transfer(self.user1, self.user2, Decimal('12.50'), 'Aluguel, março')
+        services.deposit(self.user1, Decimal('5.00'))
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+
+    def test_export_csv(self):
+        response = self.client.get(reverse('transactions:export'), {'format': 'csv'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'id,transaction_type,status,sender_email,recipient_email,'
+                                   'amount,description,created_at,updated_at')
+        self.assertEqual(len(lines), 3)
+        self.assertIn('"Aluguel, março"', lines[2])
+
+    def test_export_ndjson_with_filters(self):
+        response = self.client.get(
+            reverse('transactions:export'),
+            {'format': 'ndjson', 'transaction_type': Transaction.DEPOSIT}
+        )
+
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['amount'], '5.00')
+        self.assertIsNone(rows[0]['sender_email'])
+
+    def test_export_invalid_filter_returns_json_error(self):
+        response = self.client.get(reverse('transactions:export'), {'format': 'csv', 'start_date': 'x'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+
+class TransactionSummaryTests(TestCase):
+    def setUp(self):
+        self.user1 = User.objects.create_user(
+            username='user1', email='user1@example.com', password='testpassword'
+        )
+        self.user2 = User.objects.create_user(
+            username='user2', email='user2@example.com', password='testpassword'
+        )
+        Wallet.objects.create(user=self.user1, balance=Decimal('100.00'))
+        services.transfer(self.user1, self.user2, Decimal('12.50'))
+        services.transfer(self.user1, self.user2, Decimal('7.50'))
+        services.batch_transfer(self.user1, [
+            {'recipient_email': 'user2@example.com', 'amount': Decimal('1.00')},
+            {'recipient_email': 'nobody@example.com', 'amount': Decimal('1.00')},
+        ])
+        services.deposit(self.user1, Decimal('5.00'))
+        services.withdraw(self.user2, Decimal('3.00'))
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+
+    def _snapshot(self):
+        return sorted(
+            TransactionSummary.objects.values_list(
+                'user_id', 'month', 'transaction_type', 'direction', 'total_amount', 'count'
+            )
+        )
+
+    def test_incremental_summaries_match_rebuild(self):
+        incremental = self._snapshot()
+        self.assertEqual(len(incremental), 4)
+
+        TransactionSummary.objects.all().delete()
+        call_command('rebuild_transaction_summaries', chunk_size=1, stdout=StringIO())
+
+        self.assertEqual(self._snapshot(), incremental)
+
+    def test_rebuild_aggregates_after_locking_summaries(self):
+        command = 'transactions.management.commands.rebuild_transaction_summaries'
+        calls = mock.Mock()
+        calls.aggregate.return_value = []
+        with mock.patch(f'{command}.lock_summaries', calls.lock), \
+                mock.patch(f'{command}.aggregate_for_users', calls.aggregate):
+            call_command('rebuild_transaction_summaries', chunk_size=10, stdout=StringIO())
+
+        self.assertEqual([name for name, args, kwargs in calls.mock_calls], ['lock', 'aggregate'])
+
+    def test_summary_endpoint(self):
+        response = self.client.get(reverse('transactions:summary'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        month = timezone.localtime().strftime('%Y-%m')
+        self.assertEqual(response.data['results'], [
+            {
+                'month': month,
+                'transaction_type': Transaction.DEPOSIT,
+                'transaction_type_display': 'Depósito',
+                'sent_total': '0.00',
+                'sent_count': 0,
+                'received_total': '5.00',
+                'received_count': 1,
+            },
+            {
+                'month': month,
+                'transaction_type': Transaction.TRANSFER,
+                'transaction_type_display': 'Transferência',
+                'sent_total': '21.00',
+                'sent_count': 3,
+                'received_total': '0.00',
+                'received_count': 0,
+            },
+        ])
+
+    def test_summary_endpoint_date_filter(self):
+        response = self.client.get(reverse('transactions:summary'), {'end_date': '2000-01-31'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [])
+
+
+class ShardedWalletTests(TestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username='customer', email='customer@example.com', password='testpassword'
+        )
+        self.merchant = User.objects.create_user(
+            username='merchant', email='merchant@example.com', password='testpassword'
+        )
+        Wallet.objects.create(user=self.customer, balance=Decimal('100.00'))
+        Wallet.objects.create(user=self.merchant, balance=Decimal('10.00'))
+        services.configure_shards(self.merchant, 4)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.merchant)
+
+    def test_credits_go_to_shards(self):
+        for _ in range(8):
+            services.transfer(self.customer, self.merchant, Decimal('5.00'))
+        services.batch_transfer(self.customer, [
+            {'recipient_email': 'merchant@example.com', 'amount': Decimal('2.00')},
+        ])
+
+        wallet = Wallet.objects.get(user=self.merchant)
+        self.assertEqual(wallet.balance, Decimal('10.00'))
+        self.assertEqual(WalletShard.objects.filter(wallet=wallet).count(), 4)
+        self.assertEqual(wallet.total_balance, Decimal('52.00'))
+        self.assertEqual(Wallet.objects.get(user=self.customer).balance, Decimal('58.00'))
+
+        response = self.client.get(reverse('wallets:wallet-detail'))
+        self.assertEqual(response.data['balance'], '52.00')
+
+        response = self.client.get(reverse('transactions:summary'))
+        self.assertEqual(response.data['results'][0]['received_total'], '42.00')
+        self.assertEqual(response.data['results'][0]['received_count'], 9)
+
+    def test_debits_sweep_shards(self):
+        services.transfer(self.customer, self.merchant, Decimal('30.00'))
+
+        response = self.client.post(reverse('transactions:withdraw'), {'amount': '25.00'})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['new_balance'], Decimal('15.00'))
+        wallet = Wallet.objects.get(user=self.merchant)
+        self.assertEqual(wallet.balance, Decimal('15.00'))
+        self.assertFalse(WalletShard.objects.filter(wallet=wallet, balance__gt=0).exists())
+
+        services.transfer(self.customer, self.merchant, Decimal('10.00'))
+        services.transfer(self.merchant, self.customer, Decimal('20.00'))
+        self.assertEqual(Wallet.objects.get(user=self.merchant).total_balance, Decimal('5.00'))
+
+        with self.assertRaises(InsufficientFundsException):
+            services.withdraw(self.merchant, Decimal('5.01'))
+
+    def test_disable_consolidates_shards(self):
+        services.transfer(self.customer, self.merchant, Decimal('30.00'))
+
+        call_command('shard_wallet', 'merchant@example.com', shards=0, stdout=StringIO())
+
+        wallet = Wallet.objects.get(user=self.merchant)
+        self.assertEqual(wallet.shard_count, 0)
+        self.assertEqual(wallet.balance, Decimal('40.00'))
+        self.assertFalse(WalletShard.objects.filter(wallet=wallet).exists())
+
+    def test_credit_to_removed_zero_shard_is_kept(self):
+        sweep = services.sweep_shards
+
+        def sweep_then_credit(wallet, indexes=None):
+            swept = sweep(wallet, indexes)
+            # Crédito concorrente em um sub-saldo zerado que será removido
+            WalletShard.objects.filter(wallet=wallet, index=3).update(balance=F('balance') + Decimal('7.00'))
+            return swept
+
+        with mock.patch('transactions.services.sweep_shards', side_effect=sweep_then_credit):
+            services.configure_shards(self.merchant, 2)
+
+        wallet = Wallet.objects.get(user=self.merchant)
+        self.assertEqual(wallet.balance, Decimal('17.00'))
+        self.assertEqual(wallet.total_balance, Decimal('17.00'))
+        self.assertEqual(WalletShard.objects.filter(wallet=wallet).count(), 2)
+
+
+class AsyncTransactionTests(TestCase):
+    def setUp(self):
+        self.user1 = User.objects.create_user(
+            username='user1', email='user1@example.com', password='testpassword'
+        )
+        self.user2 = User.objects.create_user(
+            username='user2', email='user2@example.com', password='testpassword'
+        )
+        Wallet.objects.create(user=self.user1, balance=Decimal('100.00'))
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+
+    def test_transfer_with_prefer_header_is_queued(self):
+        response = self.client.post(
+            reverse('transactions:transfer'),
+            {'recipient_email': 'user2@example.com', 'amount': '40.00'},
+            HTTP_PREFER='respond-async'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['transaction']['status'], Transaction.PENDING)
+        self.assertEqual(response['Location'], response.data['status_url'])
+        self.assertEqual(Wallet.objects.get(user=self.user1).balance, Decimal('100.00'))
+
+        self.assertEqual(services.process_pending(), (1, 0, 0))
+
+        response = self.client.get(response.data['status_url'])
+        self.assertEqual(response.data['status'], Transaction.COMPLETED)
+        self.assertEqual(Wallet.objects.get(user=self.user1).balance, Decimal('60.00'))
+        self.assertEqual(Wallet.objects.get(user=self.user2).balance, Decimal('40.00'))
+        self.assertEqual(LedgerEntry.objects.filter(transaction_id=response.data['id']).count(), 2)
+
+    @override_settings(TRANSACTIONS_ASYNC=True)
+    def test_worker_fails_unfunded_withdrawal(self):
+        first = self.client.post(reverse('transactions:withdraw'), {'amount': '80.00'})
+        second = self.client.post(reverse('transactions:withdraw'), {'amount': '80.00'})
+        self.assertEqual(second.status_code, status.HTTP_202_ACCEPTED)
+
+        call_command('process_pending_transactions', once=True, stdout=StringIO())
+
+        self.assertEqual(
+            Transaction.objects.get(pk=first.data['transaction']['id']).status, Transaction.COMPLETED
+        )
+        failed = Transaction.objects.get(pk=second.data['transaction']['id'])
+        self.assertEqual(failed.status, Transaction.FAILED)
+        self.assertEqual(failed.failure_reason, 'Saldo insuficiente para realizar o saque.')
+        self.assertEqual(Wallet.objects.get(user=self.user1).balance, Decimal('20.00'))
+
+    def test_status_url_is_private(self):
+        transaction_obj = services.enqueue_withdrawal(self.user1, Decimal('1.00'))
+        self.client.force_authenticate(user=self.user2)
+
+        response = self.client.get(reverse('transactions:transaction-detail', args=[transaction_obj.pk]))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class AsyncTransactionListTests(TestCase):
+    def setUp(self):
+        self.user1 = User.objects.create_user(
+            username='user1', email='user1@example.com', password='testpassword'
+        )
+        self.user2 = User.objects.create_user(
+            username='user2', email='user2@example.com', password='testpassword'
+        )
+        for index in range(25):
+            Transaction.objects.create(
+                sender=self.user1, recipient=self.user2, amount=Decimal(index + 1),
+                transaction_type=Transaction.TRANSFER, status=Transaction.COMPLETED
+            )
+
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user1).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def assertSameResponse(self, query):
+        response = self.client.get(reverse('transactions:transaction-list-async') + query)
+        expected = self.client.get(reverse('transactions:transaction-list') + query)
+        self.assertEqual(response.status_code, expected.status_code)
+        body = response.json()
+        # Os links de paginação apontam para a própria rota
+        for key in ('next', 'previous'):
+            if body.get(key):
+                body[key] = body[key].replace('/async/', '/')
+        self.assertEqual(body, expected.json())
+        return body
+
+    def test_page_mode_matches_sync_list(self):
+        body = self.assertSameResponse('?page=2&ordering=amount')
+        self.assertEqual(body['count'], 25)
+
+    def test_cursor_mode_matches_sync_list(self):
+        first = self.client.get(reverse('transactions:transaction-list') + '?cursor=')
+        cursor = first.data['next'].split('cursor=')[1]
+        body = self.assertSameResponse(f'?cursor={cursor}')
+        self.assertEqual(len(body['results']), 5)
+
+    def test_invalid_filter_returns_400(self):
+        self.assertSameResponse('?start_date=ontem')
+
+    def test_requires_token(self):
+        self.client.credentials()
+        response = self.client.get(reverse('transactions:transaction-list-async'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn('WWW-Authenticate', response)
+
+
+class TransactionListSerializationTests(TestCase):
+    def setUp(self):
+        self.user1 = User.objects.create_user(
+            username='user1', email='user1@example.com', password='testpassword',
+            first_name='José', last_name='Ção'
+        )
+        self.user2 = User.objects.create_user(
+            username='user2', email='user2@example.com', password='testpassword'
+        )
+        Transaction.objects.create(
+            sender=self.user1, recipient=self.user2, amount=Decimal('10.50'),
+            transaction_type=Transaction.TRANSFER, status=Transaction.COMPLETED,
+            description='Aluguel\u2028março "quitado"'
+        )
+        Transaction.objects.create(
+            recipient=self.user1, amount=Decimal('200.00'),
+            transaction_type=Transaction.DEPOSIT, status=Transaction.COMPLETED
+        )
+        Transaction.objects.create(
+            sender=self.user1, amount=Decimal('7.00'),
+            transaction_type=Transaction.WITHDRAWAL, status=Transaction.FAILED,
+            failure_reason='Saldo insuficiente.'
+        )
+        Transaction.objects.create(
+            sender=self.user2, recipient=self.user1, amount=Decimal('0.01'),
+            transaction_type=Transaction.TRANSFER, status=Transaction.PENDING
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+
+    def expected_results(self, ordering):
+        queryset = Transaction.objects.filter(
+            Q(sender=self.user1) | Q(recipient=self.user1)
+        ).order_by(ordering, f"{'-' if ordering.startswith('-') else ''}id")
+        return TransactionSerializer(queryset, many=True).data
+
+    def test_fast_path_output_is_byte_identical(self):
+        response = self.client.get(reverse('transactions:transaction-list'), {'ordering': 'amount'})
+
+        expected = JSONRenderer().render({
+            'count': 4, 'next': None, 'previous': None,
+            'results': self.expected_results('amount'),
+        })
+        self.assertEqual(response.content, expected)
+        self.assertIn(b'\\u2028', response.content)
+
+    def test_browser_accept_gets_json(self):
+        response = self.client.get(
+            reverse('transactions:transaction-list'), HTTP_ACCEPT='text/html,application/xhtml+xml,*/*;q=0.8'
+        )
+
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json()['count'], 4)
+
+    def test_fast_path_in_cursor_mode(self):
+        response = self.client.get(
+            reverse('transactions:transaction-list'), {'cursor': '', 'ordering': '-amount'}
+        )
+
+        body = json.loads(response.content)
+        self.assertEqual(body['results'], json.loads(JSONRenderer().render(self.expected_results('-amount'))))
+
+    def test_orjson_renderer_matches_json_renderer(self):
+        data = {
+            'texto': 'ção \u2029 "aspas"', 'lazy': Transaction._meta.verbose_name,
+            'decimal': Decimal('1.50'), 'data': timezone.now(), 'dia': timezone.now().date(),
+            1: [None, True, 1.5, {'vazio': []}],
+        }
+
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            ORJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2')
+        )
+
+
+class PartitionHelperTests(SimpleTestCase):
+    def test_month_helpers(self):
+        # 31/01 23:30 em São Paulo já é fevereiro em UTC
+        moment = datetime(2024, 2, 1, 2, 30, tzinfo=dt_timezone.utc)
+        self.assertEqual(partitions.month_floor(moment), date(2024, 2, 1))
+        self.assertEqual(partitions.add_months(date(2024, 11, 1), 3), date(2025, 2, 1))
+        self.assertEqual(partitions.add_months(date(2024, 1, 1), -1), date(2023, 12, 1))
+
+    def test_partition_sql_uses_utc_month_bounds(self):
+        self.assertEqual(
+            partitions.create_partition_sql(date(2024, 12, 1)),
+            'CREATE TABLE IF NOT EXISTS transactions_transaction_p2024_12 PARTITION OF transactions_transaction '
+            "FOR VALUES FROM ('2024-12-01 00:00:00+00') TO ('2025-01-01 00:00:00+00')"
+        )
+
+    def test_maintenance_requires_partitioned_table(self):
+        with self.assertRaises(CommandError):
+            call_command('maintain_transaction_partitions', stdout=StringIO())
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Particionamento requer PostgreSQL')
+class PartitionPruningTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='user1', email='user1@example.com', password='testpassword')
+
+    def test_date_filter_reads_only_matching_partitions(self):
+        march = datetime(2024, 3, 1, tzinfo=dt_timezone.utc)
+        partitions.ensure_partitions(until=march, since=march)
+        queryset = Transaction.objects.filter(
+            Q(sender=self.user) | Q(recipient=self.user),
+            created_at__gte=march, created_at__lte=datetime(2024, 3, 31, 23, 59, tzinfo=dt_timezone.utc)
+        ).order_by('-created_at')
+
+        self.assertEqual(partitions.scanned_partitions(queryset), ['transactions_transaction_p2024_03'])
+
+    def test_maintenance_creates_future_partitions(self):
+        call_command('maintain_transaction_partitions', '--months-ahead', '2', stdout=StringIO())
+
+        future = partitions.add_months(partitions.month_floor(timezone.now()), 2)
+        self.assertIn(future, partitions.list_partitions())
+
+    def test_detach_keeps_partitions_with_unarchived_rows(self):
+        old, empty = date(2020, 1, 1), date(2020, 2, 1)
+        partitions.ensure_partitions(until=empty, since=old)
+        Wallet.objects.create(user=self.user)
+        transaction_obj = services.deposit(self.user, Decimal('10.00'))[1]
+        Transaction.objects.filter(pk=transaction_obj.pk).update(
+            created_at=datetime(2020, 1, 15, tzinfo=dt_timezone.utc)
+        )
+
+        detached, kept = partitions.detach_partitions(before=date(2020, 3, 1))
+
+        self.assertEqual(detached, [partitions.partition_name(empty)])
+        self.assertEqual(kept, [partitions.partition_name(old)])
+        self.assertTrue(LedgerEntry.objects.filter(transaction_id=transaction_obj.pk).exists())
+        self.assertTrue(Transaction.objects.filter(pk=transaction_obj.pk).exists())
+
+
+@override_settings(TRANSACTION_ARCHIVE_AFTER_DAYS=365)
+class TransactionArchiveTests(TestCase):
+    def setUp(self):
+        self.user1 = User.objects.create_user(username='user1', email='user1@example.com', password='testpassword')
+        self.user2 = User.objects.create_user(username='user2', email='user2@example.com', password='testpassword')
+        Wallet.objects.create(user=self.user1, balance=Decimal('1000.00'))
+        Wallet.objects.create(user=self.user2, balance=Decimal('500.00'))
+
+        self.old = [services.transfer(self.user1, self.user2, Decimal(f'{index}.00')) for index in range(1, 4)]
+        self.stuck = services.enqueue_transfer(self.user1, self.user2, Decimal('9.00'))
+        two_years_ago = timezone.now() - timedelta(days=730)
+        for offset, transaction_obj in enumerate([*self.old, self.stuck]):
+            Transaction.objects.filter(pk=transaction_obj.pk).update(
+                created_at=two_years_ago + timedelta(hours=offset)
+            )
+        self.recent = services.transfer(self.user2, self.user1, Decimal('5.00'))
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+
+    def _archive(self, *args):
+        out = StringIO()
+        call_command('archive_transactions', '--chunk-size', '2', *args, stdout=out)
+        return out.getvalue()
+
+    def test_archive_moves_old_settled_transactions(self):
+        before = self.client.get(reverse('transactions:transaction-list')).content
+
+        self.assertIn('3 transações', self._archive())
+
+        self.assertEqual(
+            set(ArchivedTransaction.objects.values_list('id', flat=True)), {t.pk for t in self.old}
+        )
+        # Pendente continua na fila da tabela quente
+        self.assertEqual(set(Transaction.objects.values_list('id', flat=True)), {self.stuck.pk, self.recent.pk})
+        self.assertEqual(LedgerEntry.objects.filter(transaction_id=self.old[0].pk).count(), 2)
+        # Leitura sem período inclui o arquivo com a mesma resposta
+        self.assertEqual(self.client.get(reverse('transactions:transaction-list')).content, before)
+
+    def test_recent_period_reads_only_hot_table(self):
+        self._archive()
+        start = (timezone.now() - timedelta(days=30)).date().isoformat()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('transactions:transaction-list'), {'start_date': start})
+
+        self.assertEqual([item['id'] for item in response.data['results']], [self.recent.pk])
+        self.assertFalse(any('transactions_history' in query['sql'] for query in queries))
+
+    def test_old_period_and_export_include_archive(self):
+        self._archive()
+        start = (timezone.now() - timedelta(days=800)).isoformat()
+
+        response = self.client.get(reverse('transactions:transaction-list'), {'start_date': start, 'cursor': ''})
+        self.assertEqual(len(response.data['results']), 5)
+
+        response = self.client.get(reverse('transactions:export'), {'format': 'ndjson'})
+        ids = {json.loads(line)['id'] for line in b''.join(response.streaming_content).splitlines()}
+        self.assertEqual(ids, {t.pk for t in [*self.old, self.stuck, self.recent]})
+
+    def test_rebuild_keeps_archived_months(self):
+        self._archive()
+
+        call_command('rebuild_transaction_summaries', stdout=StringIO())
+
+        sent = TransactionSummary.objects.filter(
+            user=self.user1, direction=TransactionSummary.SENT, transaction_type=Transaction.TRANSFER
+        )
+        self.assertEqual(sent.get().total_amount, Decimal('6.00'))
+        self.assertEqual(sent.get().count, 3)
+        received = TransactionSummary.objects.get(user=self.user1, direction=TransactionSummary.RECEIVED)
+        self.assertEqual(received.total_amount, Decimal('5.00'))
+
+    def test_cursor_reads_archive_only_after_crossing_cutoff(self):
+        self._archive()
+        recent = [services.deposit(self.user1, Decimal('1.00'))[1] for _ in range(20)]
+        url = reverse('transactions:transaction-list')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'cursor': ''})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('transactions_history', queries[0]['sql'])
+        seen = [item['id'] for item in response.data['results']]
+
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            seen += [item['id'] for item in response.data['results']]
+
+        expected = [self.recent, *recent, *self.old, self.stuck]
+        self.assertEqual(sorted(seen), sorted(t.pk for t in expected))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_detail_falls_back_to_archive(self):
+        self._archive()
+
+        response = self.client.get(reverse('transactions:transaction-detail', args=[self.old[0].pk]))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['amount'], '1.00')
+
+    def test_cutoff_cannot_be_newer_than_setting(self):
+        with self.assertRaises(CommandError):
+            self._archive('--older-than-days', '30')
+
+    @override_settings(TRANSACTION_ARCHIVE_AFTER_DAYS=0)
+    def test_disabled_archive_reads_hot_table(self):
+        self.assertIs(archive.history_model(), Transaction)
@@ -1,10 +1,19 @@
 from django.urls import path
-from .views import TransactionListView, transfer_funds, withdraw_funds
+from .views import (
+    TransactionListView, TransactionDetailView, transaction_list_async, TransactionExportView, transfer_funds, batch_transfer_funds, withdraw_funds, wallet_statement,
+    transaction_summary
+)
 
 app_name = 'transactions'
 
 urlpatterns = [
     path('', TransactionListView.as_view(), name='transaction-list'),
+    path('async/', transaction_list_async, name='transaction-list-async'),
+    path('<int:pk>/', TransactionDetailView.as_view(), name='transaction-detail'),
+    path('export/', TransactionExportView.as_view(), name='export'),
     path('transfer/', transfer_funds, name='transfer'),
+    path('transfer/batch/', batch_transfer_funds, name='transfer-batch'),
     path('withdraw/', withdraw_funds, name='withdraw'),
+    path('statement/', wallet_statement, name='statement'),
+    path('summary/', transaction_summary, name='summary'),
 ] 
\ No newline at end of file
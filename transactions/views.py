@@ -1,18 +1,33 @@
-from rest_framework import generics, status, filters
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework import generics, status
+from rest_framework.filters import OrderingFilter
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
+from rest_framework.renderers import JSONRenderer
+from rest_framework.views import APIView
+from rest_framework.exceptions import ValidationError
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from rest_framework.permissions import IsAuthenticated
-from django.db import transaction
-from django.db.models import Q
+from django.db.models import Q, Sum
 from django_filters import rest_framework as filters
-from django.contrib.auth import get_user_model
 from decimal import Decimal
 
-from .models import Transaction
-from .serializers import TransactionSerializer, TransferSerializer, WithdrawalSerializer
-from wallets.models import Wallet
-
-User = get_user_model()
+from core.async_views import async_api_view
+from core.exceptions import BaseAPIException
+from core.idempotency import idempotent
+from core.identity_map import get_identity_map
+from core.renderers import ORJSONRenderer
+from core.throttling import UserMoneyThrottle, WalletMoneyThrottle
+from . import archive, ledger, services
+from .models import ArchivedTransaction, Transaction, TransactionHistory, TransactionSummary
+from .pagination import HistoryPagination
+from .renderers import CSVStreamRenderer, NDJSONStreamRenderer, EXPORT_FIELDS
+from .serializers import (
+    TransactionSerializer, TransactionRowSerializer, TransferSerializer, BatchTransferSerializer, WithdrawalSerializer,
+    StatementQuerySerializer, StatementSerializer, SummaryQuerySerializer, TransactionSummarySerializer
+)
 
 class DateRangeFilter(filters.FilterSet):
     """Filtro para consulta de transações por período de data"""
@@ -23,24 +38,155 @@ class DateRangeFilter(filters.FilterSet):
         model = Transaction
         fields = ['transaction_type', 'status', 'start_date', 'end_date']
 
+class HistoryDateRangeFilter(DateRangeFilter):
+    """DateRangeFilter sobre a visão de transações quentes e arquivadas"""
+    
+    class Meta(DateRangeFilter.Meta):
+        model = TransactionHistory
+
+FILTERSETS = {Transaction: DateRangeFilter, TransactionHistory: HistoryDateRangeFilter}
+
+class TransactionFilterBackend(filters.DjangoFilterBackend):
+    """Escolhe o filtro conforme o modelo consultado (ver archive.history_model)"""
+    
+    def get_filterset_class(self, view, queryset=None):
+        return FILTERSETS[queryset.model]
+
 class TransactionListView(generics.ListAPIView):
     """Endpoint para listar transações do usuário autenticado"""
     serializer_class = TransactionSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.DjangoFilterBackend, filters.OrderingFilter]
-    filterset_class = DateRangeFilter
+    pagination_class = HistoryPagination
+    filter_backends = [TransactionFilterBackend, OrderingFilter]
     ordering_fields = ['created_at', 'amount']
     ordering = ['-created_at']
+    renderer_classes = [ORJSONRenderer]
+    
+    def get_queryset(self, model=None, condition=None):
+        """Retorna apenas transações do usuário autenticado, incluindo as arquivadas se o período as alcança"""
+        user = self.request.user
+        model = model or archive.history_model(self.request.query_params.get('start_date'))
+        if condition is None:
+            condition = Q(sender=user) | Q(recipient=user)
+        return model.objects.filter(condition).select_related('sender', 'recipient')
+    
+    def get_rows(self, model=None, condition=None):
+        # Caminho rápido: linhas de values() com a mesma saída do TransactionSerializer
+        return TransactionRowSerializer.rows(self.filter_queryset(self.get_queryset(model, condition)))
+    
+    def get_keyset_branches(self, model):
+        """Enviadas e recebidas separadamente, cada uma pelo seu índice (ver KeysetPagination)"""
+        user = self.request.user
+        # Uma linha com o usuário nos dois lados entra só no primeiro ramo
+        return [
+            self.get_rows(model, Q(sender=user)),
+            self.get_rows(model, Q(recipient=user) & ~Q(sender=user)),
+        ]
+    
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_rows()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(TransactionRowSerializer().many(page))
+        return Response(TransactionRowSerializer().many(queryset))
+
+@async_api_view
+async def transaction_list_async(request):
+    """
+    Endpoint assíncrono equivalente a TransactionListView, para servidores ASGI.
+
+    Reaproveita filtros, ordenação, paginação e serializer da view síncrona;
+    apenas as consultas passam pelo ORM assíncrono.
+    """
+    view = TransactionListView(request=request, format_kwarg=None, args=(), kwargs={})
+    queryset = view.get_rows()
+    page = await view.paginator.apaginate_queryset(queryset, request, view)
+    response = view.get_paginated_response(TransactionRowSerializer().many(page))
+    return response.data, response.status_code
+
+class TransactionDetailView(generics.RetrieveAPIView):
+    """Endpoint para consultar uma transação, incluindo o status das assíncronas"""
+    serializer_class = TransactionSerializer
+    permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        """Retorna apenas transações do usuário autenticado"""
         user = self.request.user
         return Transaction.objects.filter(
             Q(sender=user) | Q(recipient=user)
         ).select_related('sender', 'recipient')
+    
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            # Arquivadas continuam acessíveis pelo id (referenciado pelos lançamentos)
+            user = self.request.user
+            return get_object_or_404(
+                ArchivedTransaction.objects.filter(
+                    Q(sender=user) | Q(recipient=user)
+                ).select_related('sender', 'recipient'),
+                pk=self.kwargs['pk']
+            )
+
+def _wants_async(request):
+    """Modo assíncrono global (TRANSACTIONS_ASYNC) ou pedido com `Prefer: respond-async`"""
+    prefer = request.headers.get('Prefer', '')
+    return settings.TRANSACTIONS_ASYNC or 'respond-async' in prefer.lower()
+
+def _accepted(request, transaction_obj, message):
+    """Resposta 202 com a URL de acompanhamento da transação pendente"""
+    status_url = request.build_absolute_uri(
+        reverse('transactions:transaction-detail', args=[transaction_obj.pk])
+    )
+    return Response({
+        "message": message,
+        "transaction": TransactionSerializer(transaction_obj).data,
+        "status_url": status_url
+    }, status=status.HTTP_202_ACCEPTED, headers={'Location': status_url})
+
+class TransactionExportView(APIView):
+    """
+    Endpoint para exportar o histórico completo em CSV ou NDJSON.
+
+    As linhas vêm de values_list() por um cursor no servidor e são
+    transmitidas conforme lidas, com memória constante qualquer que seja
+    o tamanho da exportação.
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [CSVStreamRenderer, NDJSONStreamRenderer]
+    
+    def handle_exception(self, exc):
+        # Erros sempre em JSON, independentemente do formato pedido
+        self.request.accepted_renderer = JSONRenderer()
+        self.request.accepted_media_type = JSONRenderer.media_type
+        return super().handle_exception(exc)
+    
+    def get(self, request):
+        user = request.user
+        model = archive.history_model(request.query_params.get('start_date'))
+        queryset = model.objects.filter(Q(sender=user) | Q(recipient=user))
+        filterset = FILTERSETS[model](request.query_params, queryset=queryset, request=request)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        
+        rows = (
+            filterset.qs
+            .order_by('-created_at', '-id')
+            .values_list(*EXPORT_FIELDS)
+            .iterator(chunk_size=settings.TRANSACTION_EXPORT_CHUNK_SIZE)
+        )
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(rows),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}'
+        )
+        response['Content-Disposition'] = f'attachment; filename="transacoes.{renderer.format}"'
+        return response
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([UserMoneyThrottle, WalletMoneyThrottle])
+@idempotent
 def transfer_funds(request):
     """Endpoint para transferência de fundos entre usuários"""
     serializer = TransferSerializer(data=request.data, context={'request': request})
@@ -51,59 +197,61 @@ def transfer_funds(request):
         amount = serializer.validated_data['amount']
         description = serializer.validated_data.get('description', '')
         
+        # Destinatário já carregado pelo serializer no mapa de identidade
+        recipient = get_identity_map(request).get_user_by_email(recipient_email)
+        
+        if _wants_async(request):
+            transaction_obj = services.enqueue_transfer(sender, recipient, amount, description)
+            return _accepted(
+                request, transaction_obj,
+                f"Transferência de R$ {amount} recebida e em processamento."
+            )
+        
         try:
-            recipient = User.objects.get(email=recipient_email)
-            
-            with transaction.atomic():
-                # Verificar novamente se o saldo é suficiente (evitar race conditions)
-                sender_wallet = Wallet.objects.select_for_update().get(user=sender)
-                
-                if sender_wallet.balance < amount:
-                    return Response({
-                        "error": "Saldo insuficiente para esta transferência."
-                    }, status=status.HTTP_400_BAD_REQUEST)
-                
-                # Obter ou criar a carteira do destinatário
-                recipient_wallet, created = Wallet.objects.select_for_update().get_or_create(
-                    user=recipient,
-                    defaults={'balance': 0}
-                )
-                
-                # Atualizar saldos
-                sender_wallet.balance -= amount
-                recipient_wallet.balance += amount
-                
-                sender_wallet.save()
-                recipient_wallet.save()
-                
-                # Criar o registro da transação
-                transaction_obj = Transaction.objects.create(
-                    transaction_type=Transaction.TRANSFER,
-                    status=Transaction.COMPLETED,
-                    sender=sender,
-                    recipient=recipient,
-                    amount=amount,
-                    description=description
-                )
-                
-                return Response({
-                    "message": f"Transferência de R$ {amount} realizada com sucesso.",
-                    "transaction": TransactionSerializer(transaction_obj).data
-                }, status=status.HTTP_201_CREATED)
-                
-        except User.DoesNotExist:
+            transaction_obj = services.transfer(sender, recipient, amount, description)
+        except BaseAPIException as e:
             return Response({
-                "error": "Usuário destinatário não encontrado."
-            }, status=status.HTTP_404_NOT_FOUND)
-        except Exception as e:
+                "error": e.message
+            }, status=e.status_code)
+
+        return Response({
+            "message": f"Transferência de R$ {amount} realizada com sucesso.",
+            "transaction": TransactionSerializer(transaction_obj).data
+        }, status=status.HTTP_201_CREATED)
+    
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([UserMoneyThrottle, WalletMoneyThrottle])
+@idempotent
+def batch_transfer_funds(request):
+    """Endpoint para transferências em lote a partir da carteira do usuário"""
+    serializer = BatchTransferSerializer(data=request.data)
+    
+    if serializer.is_valid():
+        try:
+            results = services.batch_transfer(request.user, serializer.validated_data['transfers'])
+        except BaseAPIException as e:
             return Response({
-                "error": f"Erro ao processar a transferência: {str(e)}"
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                "error": e.message
+            }, status=e.status_code)
+
+        completed = [result for result in results if result['status'] == Transaction.COMPLETED]
+        total = sum((result['amount'] for result in completed), Decimal('0.00'))
+        return Response({
+            "message": f"{len(completed)} de {len(results)} transferências realizadas (R$ {total}).",
+            "completed": len(completed),
+            "failed": len(results) - len(completed),
+            "results": results
+        }, status=status.HTTP_201_CREATED if completed else status.HTTP_400_BAD_REQUEST)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([UserMoneyThrottle, WalletMoneyThrottle])
+@idempotent
 def withdraw_funds(request):
     """Endpoint para realizar saque da carteira"""
     serializer = WithdrawalSerializer(data=request.data, context={'request': request})
@@ -113,44 +261,89 @@ def withdraw_funds(request):
         amount = Decimal(serializer.validated_data['amount'])
         description = serializer.validated_data.get('description', '')
         
+        if _wants_async(request):
+            transaction_obj = services.enqueue_withdrawal(user, amount, description)
+            return _accepted(
+                request, transaction_obj,
+                f"Saque de R$ {amount} recebido e em processamento."
+            )
+        
         try:
-            with transaction.atomic():
-                # Obter a carteira do usuário com bloqueio
-                wallet = Wallet.objects.select_for_update().get(user=user)
-                
-                # Verificar se há saldo suficiente
-                if wallet.balance < amount:
-                    return Response({
-                        "error": "Saldo insuficiente para realizar o saque."
-                    }, status=status.HTTP_400_BAD_REQUEST)
-                
-                # Atualizar o saldo
-                wallet.balance -= amount
-                wallet.save()
-                
-                # Criar o registro da transação
-                transaction_obj = Transaction.objects.create(
-                    transaction_type=Transaction.WITHDRAWAL,
-                    status=Transaction.COMPLETED,
-                    sender=user,
-                    recipient=None,  # Saque não tem destinatário
-                    amount=amount,
-                    description=description
-                )
-                
-                return Response({
-                    "message": f"Saque de R$ {amount} realizado com sucesso.",
-                    "transaction": TransactionSerializer(transaction_obj).data,
-                    "new_balance": wallet.balance
-                }, status=status.HTTP_201_CREATED)
-                
-        except Wallet.DoesNotExist:
+            wallet, transaction_obj = services.withdraw(user, amount, description)
+        except BaseAPIException as e:
+            return Response({
+                "error": e.message
+            }, status=e.status_code)
+
+        return Response({
+            "message": f"Saque de R$ {amount} realizado com sucesso.",
+            "transaction": TransactionSerializer(transaction_obj).data,
+            "new_balance": wallet.total_balance
+        }, status=status.HTTP_201_CREATED)
+    
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def wallet_statement(request):
+    """Endpoint para o extrato do período: saldos de abertura/fechamento e totais"""
+    serializer = StatementQuerySerializer(data=request.query_params)
+    
+    if serializer.is_valid():
+        wallet = get_identity_map(request).get_wallet(request.user)
+        if wallet is None:
             return Response({
                 "error": "Carteira não encontrada."
             }, status=status.HTTP_404_NOT_FOUND)
-        except Exception as e:
-            return Response({
-                "error": f"Erro ao processar o saque: {str(e)}"
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        data = ledger.statement(
+            wallet.pk,
+            serializer.validated_data['start_date'],
+            serializer.validated_data['end_date']
+        )
+        return Response(StatementSerializer(data).data)
     
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST) 
\ No newline at end of file
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def transaction_summary(request):
+    """Endpoint com os totais mensais por tipo, enviados e recebidos"""
+    serializer = SummaryQuerySerializer(data=request.query_params)
+    
+    if serializer.is_valid():
+        summaries = TransactionSummary.objects.filter(user=request.user)
+        start_date = serializer.validated_data.get('start_date')
+        end_date = serializer.validated_data.get('end_date')
+        if start_date:
+            summaries = summaries.filter(month__gte=start_date.replace(day=1))
+        if end_date:
+            summaries = summaries.filter(month__lte=end_date)
+        
+        type_names = dict(Transaction.TRANSACTION_TYPES)
+        rows = {}
+        # Linhas de sub-saldos de carteiras fragmentadas são somadas aqui
+        totals = (
+            summaries.values('month', 'transaction_type', 'direction')
+            .annotate(total=Sum('total_amount'), quantity=Sum('count'))
+            .order_by('-month', 'transaction_type')
+        )
+        for summary in totals:
+            key = (summary['month'], summary['transaction_type'])
+            row = rows.setdefault(key, {
+                'month': summary['month'],
+                'transaction_type': summary['transaction_type'],
+                'transaction_type_display': type_names[summary['transaction_type']],
+                'sent_total': Decimal('0.00'),
+                'sent_count': 0,
+                'received_total': Decimal('0.00'),
+                'received_count': 0,
+            })
+            row[f"{summary['direction']}_total"] = summary['total']
+            row[f"{summary['direction']}_count"] = summary['quantity']
+        
+        return Response({
+            "results": TransactionSummarySerializer(rows.values(), many=True).data
+        })
+    
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
-    verbose_name = 'Usuários' 
\ No newline at end of file
+    verbose_name = 'Usuários'
+    
+    def ready(self):
+        import users.signals
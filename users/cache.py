@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import OrderedDict
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+
+def _version_key(user_id):
+    return f'user:{user_id}:version'
+
+
+def _get_version(user_id):
+    """Carimbo de versão do usuário, trocado a cada alteração (ver invalidate_user_cache)"""
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid4().hex
+        if not cache.add(key, version, None):
+            version = cache.get(key) or version
+    return version
+
+
+async def _aget_version(user_id):
+    key = _version_key(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        version = uuid4().hex
+        if not await cache.aadd(key, version, None):
+            version = await cache.aget(key) or version
+    return version
+
+
+# Backends restritos ao processo: o LRU não acrescenta nada a eles e não
+# veria as trocas de versão feitas por outros processos
+LOCAL_CACHE_BACKENDS = (LocMemCache, DummyCache)
+
+
+class _LRUCache:
+    """
+    Dicionário limitado a AUTH_USER_LRU_SIZE itens, descartando o menos usado.
+
+    Cada item vale por AUTH_USER_CACHE_TIMEOUT segundos a partir da busca,
+    como no cache compartilhado.
+    """
+
+    def __init__(self):
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = (value, time.monotonic() + settings.AUTH_USER_CACHE_TIMEOUT)
+            self._items.move_to_end(key)
+            while len(self._items) > settings.AUTH_USER_LRU_SIZE:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+_principals = _LRUCache()
+
+
+def _use_lru():
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], LOCAL_CACHE_BACKENDS)
+
+
+def _principal_fields():
+    # O hash da senha fica fora dos caches; se acessado, é carregado sob demanda
+    return [
+        field.attname for field in get_user_model()._meta.concrete_fields
+        if field.attname != 'password'
+    ]
+
+
+def _build(values):
+    # Instância nova a cada requisição: nada é compartilhado entre threads
+    return get_user_model().from_db(DEFAULT_DB_ALIAS, _principal_fields(), values)
+
+
+def get_principal(user_id):
+    """
+    Retorna o usuário autenticado sem consultar o banco quando possível.
+
+    A busca passa por um LRU do processo e pelo cache compartilhado, ambos
+    com chaves que incluem a versão do usuário; só uma ausência nos dois
+    consulta o banco. Com um cache local (locmem) o LRU é dispensado.
+    Levanta User.DoesNotExist como a busca direta.
+    """
+    key = f'user:{user_id}:{_get_version(user_id)}'
+    use_lru = _use_lru()
+    values = _principals.get(key) if use_lru else None
+    if values is None:
+        values = cache.get(key)
+        if values is None:
+            fields = _principal_fields()
+            user = get_user_model().objects.only(*fields).get(pk=user_id)
+            values = tuple(getattr(user, field) for field in fields)
+            cache.set(key, values, settings.AUTH_USER_CACHE_TIMEOUT)
+        if use_lru:
+            _principals.set(key, values)
+    return _build(values)
+
+
+async def aget_principal(user_id):
+    """Versão assíncrona de get_principal"""
+    key = f'user:{user_id}:{await _aget_version(user_id)}'
+    use_lru = _use_lru()
+    values = _principals.get(key) if use_lru else None
+    if values is None:
+        values = await cache.aget(key)
+        if values is None:
+            fields = _principal_fields()
+            user = await get_user_model().objects.only(*fields).aget(pk=user_id)
+            values = tuple(getattr(user, field) for field in fields)
+            await cache.aset(key, values, settings.AUTH_USER_CACHE_TIMEOUT)
+        if use_lru:
+            _principals.set(key, values)
+    return _build(values)
+
+
+def invalidate_user_cache(user_ids):
+    """
+    Troca a versão dos usuários após o commit da transação corrente:
+    perfis alterados ou desativados nunca são servidos de um cache antigo.
+    """
+    versions = {_version_key(user_id): uuid4().hex for user_id in user_ids}
+    if versions:
+        transaction.on_commit(lambda: cache.set_many(versions, None))
@@ -0,0 +1,179 @@
+"""
+Caminho de login: verificação de senha em um pool limitado de threads e
+gravação agrupada de last_login.
+
+O PBKDF2 do hashlib libera o GIL, então as verificações do pool rodam em
+paralelo nos núcleos disponíveis. A thread da requisição continua ocupada,
+aguardando o resultado: o pool limita quantos hashes disputam a CPU, não
+libera threads do servidor. A admissão é limitada a LOGIN_MAX_PENDING
+verificações (em execução ou na fila); acima disso o login é recusado na
+hora, com 503 e Retry-After, em vez de acumular espera até estourar o
+timeout do servidor.
+"""
+import atexit
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.db import connection
+from django.utils import timezone
+
+from core.exceptions import BaseAPIException
+
+logger = logging.getLogger('digital_wallet')
+
+
+class LoginOverloadedException(BaseAPIException):
+    status_code = 503
+    default_message = "Muitos logins simultâneos. Tente novamente em instantes."
+
+
+class _HashingPool:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+
+    def _get(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.LOGIN_HASH_WORKERS, thread_name_prefix='login-hash'
+                )
+                self._slots = threading.BoundedSemaphore(settings.LOGIN_MAX_PENDING)
+            return self._executor, self._slots
+
+    def run(self, func, *args):
+        executor, slots = self._get()
+        if not slots.acquire(timeout=settings.LOGIN_ADMISSION_TIMEOUT):
+            raise LoginOverloadedException()
+        future = executor.submit(func, *args)
+        future.add_done_callback(lambda done: slots.release())
+        try:
+            return future.result(timeout=settings.LOGIN_HASH_TIMEOUT)
+        except FutureTimeoutError:
+            raise LoginOverloadedException()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+hashing_pool = _HashingPool()
+
+
+def _verify(password, encoded):
+    # Somente CPU: nenhuma consulta roda nas threads do pool
+    if encoded is None:
+        # Usuário inexistente: mesmo custo de um hash, como o ModelBackend
+        make_password(password)
+        return False
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False
+    return hasher.verify(password, encoded)
+
+
+def authenticate_credentials(username, password):
+    """
+    Equivalente ao ModelBackend.authenticate com o hash fora da thread da
+    requisição. Devolve o usuário ativo ou None; levanta
+    LoginOverloadedException quando o pool não admite a verificação.
+    """
+    User = get_user_model()
+    try:
+        user = User._default_manager.get_by_natural_key(username)
+    except User.DoesNotExist:
+        user = None
+
+    if not hashing_pool.run(_verify, password, user.password if user else None):
+        return None
+    if identify_hasher(user.password).must_update(user.password):
+        # Atualização do algoritmo/iterações na thread da requisição
+        user.set_password(password)
+        user.save(update_fields=['password'])
+    return user if user.is_active else None
+
+
+class LastLoginBuffer:
+    """
+    Acumula o último login de cada usuário e grava em lote: um UPDATE a cada
+    LAST_LOGIN_FLUSH_INTERVAL segundos ou LAST_LOGIN_BATCH_SIZE usuários.
+    A gravação roda sempre na thread do timer, nunca na da requisição; um
+    processo encerrado abruptamente perde no máximo um intervalo.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._timer = None
+        self._flush_due = False
+
+    def record(self, user_id, when=None):
+        with self._lock:
+            self._pending[user_id] = when or timezone.now()
+            if len(self._pending) >= settings.LAST_LOGIN_BATCH_SIZE and not self._flush_due:
+                # Lote cheio: antecipa o timer em vez de gravar no login
+                if self._timer is not None:
+                    self._timer.cancel()
+                self._start_timer(0)
+                self._flush_due = True
+            elif self._timer is None:
+                self._start_timer(settings.LAST_LOGIN_FLUSH_INTERVAL)
+
+    def _start_timer(self, interval):
+        self._timer = threading.Timer(interval, self._flush_in_background)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def pending(self):
+        with self._lock:
+            return dict(self._pending)
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._flush_due = False
+        if not batch:
+            return 0
+        User = get_user_model()
+        users = [User(pk=user_id, last_login=when) for user_id, when in batch.items()]
+        try:
+            # bulk_update: uma instrução, sem sinais (o cache de principais não é invalidado)
+            User._default_manager.bulk_update(users, ['last_login'], batch_size=settings.LAST_LOGIN_BATCH_SIZE)
+        except Exception:
+            with self._lock:
+                for user_id, when in batch.items():
+                    self._pending.setdefault(user_id, when)
+            raise
+        return len(users)
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Falha ao gravar last_login em lote')
+        finally:
+            # A thread do timer tem conexão própria, que não é reaproveitada
+            connection.close()
+
+
+last_login_buffer = LastLoginBuffer()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        last_login_buffer.flush()
+    except Exception:
+        logger.exception('Falha ao gravar last_login no encerramento')
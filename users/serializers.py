@@ -2,6 +2,12 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
+from rest_framework import exceptions
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+
+from core.serializers import MeasuredSerializerMixin
+
+from .login import authenticate_credentials, last_login_buffer
 
 User = get_user_model()
 
@@ -59,7 +65,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             
         return user
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
     full_name = serializers.CharField(read_only=True)
     
     class Meta:
@@ -68,4 +74,21 @@ class UserSerializer(serializers.ModelSerializer):
             'id', 'email', 'username', 'first_name', 'last_name', 
             'full_name', 'phone_number', 'is_verified', 'date_joined'
         ]
-        read_only_fields = ['id', 'date_joined', 'is_verified'] 
\ No newline at end of file
+        read_only_fields = ['id', 'date_joined', 'is_verified']
+
+class LoginSerializer(TokenObtainPairSerializer):
+    """
+    TokenObtainPairSerializer com a senha verificada no pool de hashing e
+    last_login gravado em lote (users.login); mesmos campos e respostas.
+    """
+    
+    def validate(self, attrs):
+        self.user = authenticate_credentials(attrs[self.username_field], attrs['password'])
+        if self.user is None:
+            raise exceptions.AuthenticationFailed(
+                self.error_messages['no_active_account'], 'no_active_account'
+            )
+        
+        refresh = self.get_token(self.user)
+        last_login_buffer.record(self.user.pk)
+        return {'refresh': str(refresh), 'access': str(refresh.access_token)}
@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_user_cache
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_principal(sender, instance, created=False, **kwargs):
+    """Perfil, senha ou desativação alterados: a versão em cache deixa de valer"""
+    if not created:
+        invalidate_user_cache([instance.pk])
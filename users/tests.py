@@ -0,0 +1,186 @@
+import os
+import tempfile
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.contrib.auth import get_user_model
+from wallets.models import Wallet
+from .cache import _LRUCache, _principals
+from .login import LoginOverloadedException, _HashingPool, last_login_buffer
+
+User = get_user_model()
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': os.path.join(tempfile.gettempdir(), 'digital-wallet-tests'),
+}})
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        _principals.clear()
+        self.user = User.objects.create_user(
+            username='user1', email='user1@example.com', password='testpassword',
+            first_name='Usuário', last_name='Um'
+        )
+        Wallet.objects.create(user=self.user)
+
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_cached_principal_skips_user_query(self):
+        self.client.get(reverse('wallets:wallet-detail'))
+
+        # Carteira e usuário vêm do cache: nenhuma consulta
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('wallets:wallet-detail'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('users:profile-async'))
+        self.assertEqual(response.json()['first_name'], 'Usuário')
+
+    def test_shared_cache_serves_other_processes(self):
+        self.client.get(reverse('users:profile'))
+        _principals.clear()
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('users:profile'))
+        self.assertEqual(response.data['email'], 'user1@example.com')
+
+    def test_profile_update_is_visible_immediately(self):
+        self.client.get(reverse('users:profile'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('users:profile'), {'first_name': 'Novo'})
+
+        self.assertEqual(self.client.get(reverse('users:profile')).data['first_name'], 'Novo')
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(reverse('users:profile'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        response = self.client.get(reverse('users:profile'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get(reverse('users:profile-async'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_is_not_cached(self):
+        self.client.get(reverse('users:profile'))
+
+        self.assertNotIn(self.user.password, str(list(_principals._items.values())))
+
+    @override_settings(AUTH_USER_CACHE_TIMEOUT=60)
+    def test_process_cache_entries_expire(self):
+        lru = _LRUCache()
+        with mock.patch('users.cache.time.monotonic', return_value=1000.0):
+            lru.set('user:1:v', ('valores',))
+            self.assertEqual(lru.get('user:1:v'), ('valores',))
+        with mock.patch('users.cache.time.monotonic', return_value=1060.0):
+            self.assertIsNone(lru.get('user:1:v'))
+        self.assertEqual(len(lru._items), 0)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_local_cache_backend_skips_process_cache(self):
+        self.client.get(reverse('users:profile'))
+
+        self.assertEqual(len(_principals._items), 0)
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('users:profile'))
+        self.assertEqual(response.data['email'], 'user1@example.com')
+
+class LoginTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='user1', email='user1@example.com', password='testpassword'
+        )
+        self.client = APIClient()
+        self.url = reverse('users:login')
+        self.addCleanup(last_login_buffer.flush)
+
+    def test_login_returns_token_pair(self):
+        response = self.client.post(self.url, {'email': 'user1@example.com', 'password': 'testpassword'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('access', response.data)
+        self.assertIn('refresh', response.data)
+
+    def test_invalid_credentials_are_rejected(self):
+        response = self.client.post(self.url, {'email': 'user1@example.com', 'password': 'errada'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.client.post(self.url, {'email': 'ninguem@example.com', 'password': 'testpassword'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_inactive_user_is_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.post(self.url, {'email': 'user1@example.com', 'password': 'testpassword'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_last_login_is_written_in_batch(self):
+        other = User.objects.create_user(username='user2', email='user2@example.com', password='testpassword')
+        for email in ['user1@example.com', 'user2@example.com']:
+            self.client.post(self.url, {'email': email, 'password': 'testpassword'})
+
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.last_login)
+        self.assertEqual(set(last_login_buffer.pending()), {self.user.pk, other.pk})
+
+        with self.assertNumQueries(1):
+            self.assertEqual(last_login_buffer.flush(), 2)
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+        self.assertEqual(last_login_buffer.pending(), {})
+
+    @override_settings(LAST_LOGIN_BATCH_SIZE=2)
+    def test_full_batch_is_flushed_off_the_request_thread(self):
+        other = User.objects.create_user(username='user2', email='user2@example.com', password='testpassword')
+        with mock.patch('users.login.threading.Timer') as timer, \
+                mock.patch.object(User._default_manager, 'bulk_update', side_effect=DatabaseError()) as bulk_update:
+            for email in ['user1@example.com', 'user2@example.com']:
+                response = self.client.post(self.url, {'email': email, 'password': 'testpassword'})
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+            bulk_update.assert_not_called()
+            interval, flush_in_background = timer.call_args.args
+            self.assertEqual(interval, 0)
+
+            # Falha na gravação: registrada no log, lote devolvido ao buffer
+            with self.assertLogs('digital_wallet', 'ERROR'):
+                flusher = threading.Thread(target=flush_in_background)
+                flusher.start()
+                flusher.join()
+            bulk_update.assert_called_once()
+        self.assertEqual(set(last_login_buffer.pending()), {self.user.pk, other.pk})
+
+    def test_saturated_pool_returns_503(self):
+        with mock.patch('users.login.hashing_pool.run', side_effect=LoginOverloadedException()):
+            response = self.client.post(self.url, {'email': 'user1@example.com', 'password': 'testpassword'})
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(last_login_buffer.pending(), {})
+
+    @override_settings(LOGIN_MAX_PENDING=1, LOGIN_ADMISSION_TIMEOUT=0)
+    def test_pool_refuses_above_max_pending(self):
+        pool = _HashingPool()
+        self.addCleanup(pool.shutdown)
+        _, slots = pool._get()
+        slots.acquire()
+
+        with self.assertRaises(LoginOverloadedException):
+            pool.run(lambda: True)
+
+        slots.release()
+        self.assertTrue(pool.run(lambda: True))
@@ -1,13 +1,14 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views import RegisterView, UserProfileView
+from rest_framework_simplejwt.views import TokenRefreshView
+from .views import LoginView, RegisterView, UserProfileView, user_profile_async
 
 app_name = 'users'
 
 urlpatterns = [
-    path('login/', TokenObtainPairView.as_view(), name='login'),
+    path('login/', LoginView.as_view(), name='login'),
     path('refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     
     path('register/', RegisterView.as_view(), name='register'),
     path('profile/', UserProfileView.as_view(), name='profile'),
+    path('profile/async/', user_profile_async, name='profile-async'),
 ] 
\ No newline at end of file
@@ -1,7 +1,11 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from .serializers import UserRegistrationSerializer, UserSerializer
+from rest_framework_simplejwt.views import TokenObtainPairView
+from core.async_views import async_api_view
+from .login import LoginOverloadedException
+from .serializers import LoginSerializer, UserRegistrationSerializer, UserSerializer
 
 User = get_user_model()
 
@@ -23,9 +27,26 @@ class RegisterView(generics.CreateAPIView):
             status=status.HTTP_201_CREATED
         )
 
+class LoginView(TokenObtainPairView):
+    """Endpoint de login com admissão limitada: 503 + Retry-After quando saturado"""
+    serializer_class = LoginSerializer
+    
+    def post(self, request, *args, **kwargs):
+        try:
+            return super().post(request, *args, **kwargs)
+        except LoginOverloadedException as e:
+            return Response({
+                "error": e.message
+            }, status=e.status_code, headers={'Retry-After': str(settings.LOGIN_RETRY_AFTER)})
+
 class UserProfileView(generics.RetrieveUpdateAPIView):
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        return self.request.user 
\ No newline at end of file
+        return self.request.user
+
+@async_api_view
+async def user_profile_async(request):
+    """Endpoint assíncrono (somente leitura) equivalente a UserProfileView"""
+    return UserSerializer(request.user).data, status.HTTP_200_OK
@@ -6,11 +6,12 @@ class WalletAdmin(admin.ModelAdmin):
     list_display = ('user', 'balance', 'is_active', 'created_at')
     list_filter = ('is_active', 'created_at')
     search_fields = ('user__email', 'user__username', 'user__first_name', 'user__last_name')
-    readonly_fields = ('created_at', 'updated_at')
+    # O modo fragmentado é alterado pelo comando shard_wallet, que consolida os sub-saldos
+    readonly_fields = ('shard_count', 'created_at', 'updated_at')
     
     fieldsets = (
         (None, {
-            'fields': ('user', 'balance', 'is_active')
+            'fields': ('user', 'balance', 'is_active', 'shard_count')
         }),
         ('Informações temporais', {
             'fields': ('created_at', 'updated_at'),
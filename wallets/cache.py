@@ -0,0 +1,80 @@
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.db.routers import pin_to_primary
+
+
+def _version_key(user_id):
+    return f'wallet:{user_id}:version'
+
+
+def _get_version(user_id):
+    """
+    Retorna o carimbo de versão atual da carteira do usuário.
+
+    Os dados ficam em chaves que incluem a versão, então uma leitura que
+    grava um valor antigo após uma invalidação nunca é servida de novo.
+    """
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid4().hex
+        if not cache.add(key, version, None):
+            version = cache.get(key) or version
+    return version
+
+
+def get_wallet_data(user, loader):
+    """
+    Retorna a representação em cache da carteira do usuário.
+
+    Em caso de ausência, `loader` é chamado para produzir os dados a
+    partir do banco, que são gravados por WALLET_CACHE_TIMEOUT segundos.
+    """
+    data_key = f'wallet:{user.pk}:{_get_version(user.pk)}'
+    data = cache.get(data_key)
+    if data is None:
+        data = loader()
+        cache.set(data_key, data, settings.WALLET_CACHE_TIMEOUT)
+    return data
+
+
+async def _aget_version(user_id):
+    key = _version_key(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        version = uuid4().hex
+        if not await cache.aadd(key, version, None):
+            version = await cache.aget(key) or version
+    return version
+
+
+async def aget_wallet_data(user, loader):
+    """Versão assíncrona de get_wallet_data; `loader` é uma corrotina"""
+    data_key = f'wallet:{user.pk}:{await _aget_version(user.pk)}'
+    data = await cache.aget(data_key)
+    if data is None:
+        data = await loader()
+        await cache.aset(data_key, data, settings.WALLET_CACHE_TIMEOUT)
+    return data
+
+
+def invalidate_wallet_cache(user_ids):
+    """
+    Invalida o cache das carteiras após o commit da transação corrente.
+
+    Executar no on_commit garante que nenhum leitor veja um saldo ainda não
+    confirmado; todas as carteiras são invalidadas em uma única ida ao cache.
+    Os usuários também são fixados no primário, para que a próxima leitura
+    não volte a preencher o cache a partir de uma réplica atrasada.
+    """
+    user_ids = list(user_ids)
+    # Os callbacks rodam na ordem de registro: a fixação é gravada antes da
+    # nova versão, e nenhum leitor vê a versão nova sem a fixação
+    pin_to_primary(user_ids)
+    versions = {_version_key(user_id): uuid4().hex for user_id in user_ids}
+    if versions:
+        transaction.on_commit(lambda: cache.set_many(versions, None))
@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.exceptions import NotFoundException
+from transactions import services
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Ativa o modo fragmentado em uma carteira de alto volume de recebimentos. '
+        'Créditos passam a ser distribuídos entre N sub-saldos; use --shards 0 para desativar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email do titular da carteira')
+        parser.add_argument(
+            '--shards',
+            type=int,
+            default=8,
+            help='Quantidade de sub-saldos (0 consolida tudo no saldo principal)'
+        )
+
+    def handle(self, *args, **options):
+        shard_count = options['shards']
+        if not 0 <= shard_count <= 256:
+            raise CommandError('--shards deve estar entre 0 e 256.')
+
+        user = User.objects.filter(email=options['email']).first()
+        if user is None:
+            raise CommandError('Usuário não encontrado.')
+
+        try:
+            wallet = services.configure_shards(user, shard_count)
+        except NotFoundException as e:
+            raise CommandError(e.message)
+
+        if shard_count:
+            message = f'Carteira de {user.email} fragmentada em {shard_count} sub-saldos.'
+        else:
+            message = f'Modo fragmentado desativado para a carteira de {user.email}.'
+        self.stdout.write(self.style.SUCCESS(f'{message} Saldo: R$ {wallet.total_balance}'))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("wallets", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="wallet",
+            constraint=models.CheckConstraint(
+                check=models.Q(("balance__gte", 0)), name="wallet_balance_non_negative"
+            ),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:17
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("wallets", "0002_wallet_balance_non_negative"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="wallet",
+            name="shard_count",
+            field=models.PositiveSmallIntegerField(
+                default=0,
+                help_text="Quantidade de sub-saldos que recebem créditos; 0 desativa o modo fragmentado",
+                verbose_name="sub-saldos",
+            ),
+        ),
+        migrations.CreateModel(
+            name="WalletShard",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("index", models.PositiveSmallIntegerField(verbose_name="índice")),
+                (
+                    "balance",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        max_digits=15,
+                        verbose_name="saldo",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="atualizado em"),
+                ),
+                (
+                    "wallet",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="shards",
+                        to="wallets.wallet",
+                        verbose_name="carteira",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "sub-saldo",
+                "verbose_name_plural": "sub-saldos",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="walletshard",
+            constraint=models.UniqueConstraint(
+                fields=("wallet", "index"), name="wallet_shard_unique_index"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="walletshard",
+            constraint=models.CheckConstraint(
+                check=models.Q(("balance__gte", 0)),
+                name="wallet_shard_balance_non_negative",
+            ),
+        ),
+    ]
@@ -20,12 +20,78 @@ class Wallet(models.Model):
         validators=[MinValueValidator(Decimal('0.00'))]
     )
     is_active = models.BooleanField(_('ativa'), default=True)
+    shard_count = models.PositiveSmallIntegerField(
+        _('sub-saldos'),
+        default=0,
+        help_text=_('Quantidade de sub-saldos que recebem créditos; 0 desativa o modo fragmentado')
+    )
     created_at = models.DateTimeField(_('criado em'), auto_now_add=True)
     updated_at = models.DateTimeField(_('atualizado em'), auto_now=True)
     
     class Meta:
         verbose_name = _('carteira')
         verbose_name_plural = _('carteiras')
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(balance__gte=0),
+                name='wallet_balance_non_negative'
+            ),
+        ]
+        
+    def __str__(self):
+        return f"Carteira de {self.user.get_full_name() or self.user.username}"
+    
+    # Soma dos sub-saldos já carregada por aload_shard_balance (views assíncronas)
+    _shard_balance = None
+    
+    @property
+    def total_balance(self):
+        """Saldo disponível: saldo principal mais os sub-saldos, quando fragmentada"""
+        if not self.shard_count:
+            return self.balance
+        shards = self._shard_balance
+        if shards is None:
+            shards = self.shards.aggregate(total=models.Sum('balance'))['total']
+        return self.balance + (shards or Decimal('0.00'))
+    
+    async def aload_shard_balance(self):
+        """Carrega a soma dos sub-saldos pelo ORM assíncrono, antes de ler total_balance"""
+        if self.shard_count:
+            totals = await self.shards.aaggregate(total=models.Sum('balance'))
+            self._shard_balance = totals['total'] or Decimal('0.00')
+
+class WalletShard(models.Model):
+    """
+    Sub-saldo de uma carteira fragmentada.
+
+    Créditos de transferências caem em um sub-saldo sorteado, sem bloquear a
+    linha da carteira; débitos consolidam os sub-saldos no saldo principal.
+    """
+    wallet = models.ForeignKey(
+        Wallet,
+        on_delete=models.CASCADE,
+        related_name='shards',
+        verbose_name=_('carteira')
+    )
+    index = models.PositiveSmallIntegerField(_('índice'))
+    balance = models.DecimalField(
+        _('saldo'),
+        max_digits=15,
+        decimal_places=2,
+        default=Decimal('0.00')
+    )
+    updated_at = models.DateTimeField(_('atualizado em'), auto_now=True)
+    
+    class Meta:
+        verbose_name = _('sub-saldo')
+        verbose_name_plural = _('sub-saldos')
+        constraints = [
+            models.UniqueConstraint(fields=['wallet', 'index'], name='wallet_shard_unique_index'),
+            models.CheckConstraint(
+                check=models.Q(balance__gte=0),
+                name='wallet_shard_balance_non_negative'
+            ),
+        ]
         
     def __str__(self):
-        return f"Carteira de {self.user.get_full_name() or self.user.username}" 
\ No newline at end of file
+        return f"Sub-saldo {self.index} da carteira {self.wallet_id}"
@@ -1,10 +1,15 @@
 from rest_framework import serializers
+from core.serializers import MeasuredSerializerMixin
 from .models import Wallet
 from decimal import Decimal
 
-class WalletSerializer(serializers.ModelSerializer):
+class WalletSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
     """Serializer para exibição da carteira"""
     user_name = serializers.SerializerMethodField()
+    # Em carteiras fragmentadas o saldo exibido inclui os sub-saldos
+    balance = serializers.DecimalField(
+        max_digits=15, decimal_places=2, source='total_balance', read_only=True
+    )
     
     class Meta:
         model = Wallet
@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.conf import settings
 from django.db import connection
+from .cache import invalidate_wallet_cache
 from .models import Wallet
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
@@ -21,4 +22,16 @@ def create_wallet_for_new_user(sender, instance, created, **kwargs):
                 Wallet.objects.create(user=instance)
         except Exception as e:
             # Durante migrações iniciais, ignorar erros silenciosamente
-            pass 
\ No newline at end of file
+            pass
+
+@receiver(post_save, sender=Wallet)
+@receiver(post_delete, sender=Wallet)
+def invalidate_cached_wallet(sender, instance, **kwargs):
+    """Invalida a carteira em cache quando alterada fora dos serviços (ex.: admin)"""
+    invalidate_wallet_cache([instance.user_id])
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_wallet_owner(sender, instance, created, **kwargs):
+    """O nome do titular faz parte da carteira em cache"""
+    if not created:
+        invalidate_wallet_cache([instance.pk])
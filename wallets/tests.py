@@ -0,0 +1,142 @@
+from decimal import Decimal
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.contrib.auth import get_user_model
+from transactions import services
+from transactions.models import Transaction
+from .cache import invalidate_wallet_cache
+from .models import Wallet, WalletShard
+
+User = get_user_model()
+
+class WalletAPITests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='user1',
+            email='user1@example.com',
+            password='testpassword',
+            first_name='Usuário',
+            last_name='Um'
+        )
+        self.wallet = Wallet.objects.create(user=self.user, balance=Decimal('100.00'))
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_deposit_records_transaction(self):
+        response = self.client.post(reverse('wallets:deposit'), {'amount': '50.00'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['wallet']['balance'], '150.00')
+        self.assertEqual(response.data['wallet']['user_name'], 'Usuário Um')
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal('150.00'))
+
+        transaction = Transaction.objects.get()
+        self.assertEqual(transaction.transaction_type, Transaction.DEPOSIT)
+        self.assertEqual(transaction.recipient, self.user)
+        self.assertEqual(transaction.status, Transaction.COMPLETED)
+
+    def test_deposit_creates_missing_wallet(self):
+        self.wallet.delete()
+
+        response = self.client.post(reverse('wallets:deposit'), {'amount': '10.00'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Wallet.objects.get(user=self.user).balance, Decimal('10.00'))
+
+
+class WalletQueryBudgetTests(TestCase):
+    """Orçamento de consultas por endpoint de wallets.urls (autenticação forçada)"""
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='user1', email='user1@example.com', password='testpassword'
+        )
+        Wallet.objects.create(user=self.user, balance=Decimal('100.00'))
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_wallet_detail_budget(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('wallets:wallet-detail'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_deposit_budget(self):
+        # update + transação + lançamentos + resumos + outbox + savepoint
+        with self.assertNumQueries(7):
+            response = self.client.post(reverse('wallets:deposit'), {'amount': '10.00'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class WalletCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='user1', email='user1@example.com', password='testpassword'
+        )
+        Wallet.objects.create(user=self.user, balance=Decimal('100.00'))
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_cached_read_costs_no_queries(self):
+        self.client.get(reverse('wallets:wallet-detail'))
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('wallets:wallet-detail'))
+        self.assertEqual(response.data['balance'], '100.00')
+
+    def test_balance_change_invalidates_on_commit(self):
+        self.client.get(reverse('wallets:wallet-detail'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('wallets:deposit'), {'amount': '25.00'})
+
+        response = self.client.get(reverse('wallets:wallet-detail'))
+        self.assertEqual(response.data['balance'], '125.00')
+
+    @override_settings(DATABASE_REPLICAS=['replica_0'])
+    def test_pin_is_written_before_version_bump(self):
+        shared = mock.Mock()
+        with mock.patch('core.db.routers.cache', shared), mock.patch('wallets.cache.cache', shared), \
+                self.captureOnCommitCallbacks(execute=True):
+            invalidate_wallet_cache([self.user.pk])
+
+        written = [list(call.args[0]) for call in shared.set_many.call_args_list]
+        self.assertEqual(written, [[f'db-pin:{self.user.pk}'], [f'wallet:{self.user.pk}:version']])
+
+
+class AsyncWalletDetailTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='user1', email='user1@example.com', password='testpassword'
+        )
+        Wallet.objects.create(user=self.user, balance=Decimal('100.00'))
+
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_async_detail_matches_sync_detail(self):
+        response = self.client.get(reverse('wallets:wallet-detail-async'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        cache.clear()
+        expected = self.client.get(reverse('wallets:wallet-detail'))
+        self.assertEqual(response.json(), expected.json())
+
+    def test_async_detail_includes_shards(self):
+        services.configure_shards(self.user, 2)
+        WalletShard.objects.filter(wallet__user=self.user).update(balance=Decimal('5.00'))
+
+        response = self.client.get(reverse('wallets:wallet-detail-async'))
+        self.assertEqual(response.json()['balance'], '110.00')
@@ -1,9 +1,10 @@
 from django.urls import path
-from .views import WalletDetailView, deposit_funds
+from .views import WalletDetailView, deposit_funds, wallet_detail_async
 
 app_name = 'wallets'
 
 urlpatterns = [
     path('', WalletDetailView.as_view(), name='wallet-detail'),
+    path('async/', wallet_detail_async, name='wallet-detail-async'),
     path('deposit/', deposit_funds, name='deposit'),
 ]
\ No newline at end of file
@@ -2,7 +2,11 @@ from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import api_view, permission_classes
-from django.db import transaction
+from core.async_views import async_api_view
+from core.idempotency import idempotent
+from core.identity_map import get_identity_map
+from transactions import services
+from .cache import aget_wallet_data, get_wallet_data
 from .models import Wallet
 from .serializers import WalletSerializer, DepositSerializer
 
@@ -13,24 +17,45 @@ class WalletDetailView(generics.RetrieveAPIView):
     
     def get_object(self):
         # Obtém ou cria a carteira para o usuário logado
-        wallet, created = Wallet.objects.get_or_create(user=self.request.user)
+        user = self.request.user
+        wallet = get_identity_map(self.request).get_wallet(user)
+        if wallet is None:
+            wallet, created = Wallet.objects.get_or_create(user=user)
+        wallet.user = user
         return wallet
+    
+    def retrieve(self, request, *args, **kwargs):
+        # Leitura de saldo servida do cache, invalidado a cada movimentação
+        data = get_wallet_data(
+            request.user,
+            lambda: dict(self.get_serializer(self.get_object()).data)
+        )
+        return Response(data)
+
+@async_api_view
+async def wallet_detail_async(request):
+    """Endpoint assíncrono equivalente a WalletDetailView, para servidores ASGI"""
+    user = request.user
+    
+    async def load():
+        wallet, created = await Wallet.objects.aget_or_create(user=user)
+        wallet.user = user
+        await wallet.aload_shard_balance()
+        return dict(WalletSerializer(wallet).data)
+    
+    return await aget_wallet_data(user, load), status.HTTP_200_OK
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def deposit_funds(request):
     """Endpoint para adicionar fundos à carteira do usuário"""
     serializer = DepositSerializer(data=request.data)
     if serializer.is_valid():
         amount = serializer.validated_data['amount']
         
-        # Obter ou criar a carteira
-        wallet, created = Wallet.objects.get_or_create(user=request.user)
-        
-        # Adicionar o valor à carteira usando uma transação atômica
-        with transaction.atomic():
-            wallet.balance += amount
-            wallet.save()
+        # Crédito aplicado pelo banco em um único UPDATE, com registro da transação
+        wallet, transaction_obj = services.deposit(request.user, amount)
         
         return Response({
             "message": f"Depósito de R$ {amount} realizado com sucesso.",